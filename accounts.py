@@ -0,0 +1,112 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 여러 계좌에 같은 거래 결정을 동시에 실행 (시장 데이터, AI 호출, 차트는 한 번만)
+#
+# ACCOUNTS=main,sub1 처럼 계좌 이름을 지정하면 계좌별 설정은 ACCOUNT_<이름>_<항목> 환경 변수로 읽음
+# - ACCESS_KEY, SECRET_KEY: 업비트 API 키
+# - SIZE_PCT: AI가 정한 비율에 곱할 배율 (%, 기본 100)
+# - MAX_ORDER_KRW: 1회 주문 금액 상한 (0이면 없음)
+# - PAPER_KRW: 모의 거래 시작 KRW (PAPER_TRADING=true일 때)
+# ACCOUNTS가 없으면 기존 UPBIT_ACCESS_KEY/UPBIT_SECRET_KEY로 "default" 계좌 하나만 사용
+################################################################################
+
+DEFAULT_ACCOUNT = "default"
+
+def parse_account_names(value):
+    """ACCOUNTS 값 → 계좌 이름 목록 (중복 제거, 순서 유지)"""
+    names = []
+    for name in (value or "").split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names or [DEFAULT_ACCOUNT]
+
+def account_env(name, key, default=None):
+    """계좌별 환경 변수 ACCOUNT_<이름>_<항목> (이름은 대문자, '-'는 '_'로 변환)"""
+    return os.getenv(f"ACCOUNT_{name.upper().replace('-', '_')}_{key}", default)
+
+class Account:
+    """거래 계좌 하나 (API 클라이언트, 주문 크기 설정, 계좌별 위험 관리/거래 금액 기록)"""
+
+    def __init__(self, name, client, size_pct=100.0, max_order_krw=0.0, risk=None):
+        self.name = name
+        self.client = client  # pyupbit.Upbit 또는 paper_exchange.PaperUpbit
+        self.size_pct = size_pct
+        self.max_order_krw = max_order_krw
+        self.risk = risk  # risk_engine.PreTradeRisk (일일 거래 금액은 계좌마다 따로 저장)
+
+    def order_percentage(self, percentage):
+        """AI가 정한 비율(%)에 계좌 배율을 적용 (0~100)"""
+        return min(max(percentage * self.size_pct / 100, 0.0), 100.0)
+
+    def cap_order_krw(self, amount_krw):
+        """1회 주문 금액 상한 적용"""
+        if self.max_order_krw and amount_krw > self.max_order_krw:
+            logger.info(f"[{self.name}] 주문 금액 상한 적용: {amount_krw:,.0f}원 → {self.max_order_krw:,.0f}원")
+            return self.max_order_krw
+        return amount_krw
+
+    def __repr__(self):
+        return f"Account({self.name!r}, size_pct={self.size_pct}, max_order_krw={self.max_order_krw})"
+
+class AccountRegistry:
+    """거래 계좌 목록 (첫 번째 계좌가 기준 계좌: AI 프롬프트의 잔고와 반성에 사용)"""
+
+    def __init__(self, accounts):
+        if not accounts:
+            raise ValueError("계좌가 하나 이상 필요합니다.")
+        self.accounts = list(accounts)
+        self._executor = None
+
+    @property
+    def primary(self):
+        return self.accounts[0]
+
+    @property
+    def names(self):
+        return [account.name for account in self.accounts]
+
+    def __iter__(self):
+        return iter(self.accounts)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def get(self, name):
+        return next((account for account in self.accounts if account.name == name), None)
+
+    def fan_out(self, fn, *args):
+        """fn(account, *args)를 모든 계좌에 동시에 실행 (계좌마다 스레드 하나)
+
+        한 계좌의 오류는 다른 계좌에 영향을 주지 않고 로그로 남김
+
+        Returns:
+            dict: 계좌 이름 → 결과 (오류가 난 계좌는 예외 객체)
+        """
+        started = time.time()
+        if len(self.accounts) == 1:
+            account = self.primary
+            try:
+                return {account.name: fn(account, *args)}
+            except Exception as e:
+                logger.error(f"[{account.name}] 계좌 작업 중 오류 발생: {e}")
+                return {account.name: e}
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.accounts), thread_name_prefix="account")
+        futures = {account.name: self._executor.submit(fn, account, *args) for account in self.accounts}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"[{name}] 계좌 작업 중 오류 발생: {e}")
+                results[name] = e
+        logger.info(f"계좌 {len(self.accounts)}개 작업 완료: {time.time() - started:.1f}초")
+        return results
@@ -1,44 +1,23 @@
 # 필수 라이브러리 임포트
+# pyupbit, pandas, ta, openai, requests, selenium, PIL 같은 무거운 라이브러리는
+# 실제로 사용하는 함수 안에서 임포트 (모듈을 불러오기만 할 때는 임포트 비용이 들지 않도록)
 import os  # 운영체제 관련 기능 (환경변수, 파일경로 등)
 from dotenv import load_dotenv  # .env 파일에서 환경변수 로드
-import pyupbit  # 업비트 API 사용을 위한 라이브러리
-import pandas as pd  # 데이터 분석/처리용 라이브러리
 import json  # JSON 데이터 처리
-from openai import OpenAI  # OpenAI API 사용 (GPT 모델)
-import ta  # 기술적 분석 지표 계산 라이브러리
-from ta.utils import dropna  # 결측값 처리
 
 # 시간 관련
 import time  # 시간 지연, 대기 기능
 from datetime import datetime, timedelta  # 날짜/시간 처리
 
-# 웹 관련
-import requests  # HTTP 요청 처리
-import base64  # 이미지 인코딩
-from PIL import Image  # 이미지 처리
-import io  # 입출력 스트림 처리
-
-# Selenium 관련 (웹 자동화)
-from selenium import webdriver  # 웹 브라우저 자동화
-from selenium.webdriver.chrome.service import Service  # 크롬드라이버 서비스
-from selenium.webdriver.chrome.options import Options  # 크롬 옵션 설정
-from selenium.webdriver.common.by import By  # 요소 찾기 방식 지정
-from selenium.webdriver.support.ui import WebDriverWait  # 요소 대기
-from selenium.webdriver.support import expected_conditions as EC  # 조건부 대기
-# Selenium 예외처리
-from selenium.common.exceptions import (
-   TimeoutException,  # 시간 초과
-   ElementClickInterceptedException,  # 클릭 불가
-   WebDriverException,  # 드라이버 오류
-   NoSuchElementException  # 요소 없음
-)
-
 # 기타 유틸리티
 import logging  # 로깅 처리
-from youtube_transcript_api import YouTubeTranscriptApi  # 유튜브 자막 추출
 from pydantic import BaseModel  # 데이터 모델 정의
 import sqlite3  # SQLite 데이터베이스 처리
-import schedule  # 작업 스케줄링
+from scheduler import TradingScheduler  # 사전 준비 기반 작업 스케줄링
+from signal_cache import SignalCache  # 외부 신호 TTL 캐시
+from strategy_index import StrategyIndex, build_market_query  # 전략 텍스트 검색 인덱스
+from transcript_store import TranscriptStore  # 유튜브 자막 저장소
+from decision_gate import DecisionGate  # 시장 변화가 작을 때 AI 호출 생략
 
 ################################################################################
 # 기본 설정 및 초기화 부분
@@ -53,13 +32,46 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # 업비트 API 연결 설정
-# .env 파일에서 API 키 불러오기
-access = os.getenv("UPBIT_ACCESS_KEY")
-secret = os.getenv("UPBIT_SECRET_KEY")
-if not access or not secret:
-   logger.error("API 키를 찾을 수 없습니다. .env 파일을 확인해주세요.")
-   raise ValueError("API 키가 없습니다. .env 파일을 확인해주세요.")
-upbit = pyupbit.Upbit(access, secret)
+# 처음 사용할 때 .env 파일의 API 키로 연결 생성
+upbit = None
+
+def get_upbit():
+   """
+   업비트 API 연결 객체 반환 (최초 호출 시 생성)
+   Returns:
+       pyupbit.Upbit: 업비트 API 연결 객체
+   """
+   global upbit
+   if upbit is None:
+       import pyupbit
+       access = os.getenv("UPBIT_ACCESS_KEY")
+       secret = os.getenv("UPBIT_SECRET_KEY")
+       if not access or not secret:
+           logger.error("API 키를 찾을 수 없습니다. .env 파일을 확인해주세요.")
+           raise ValueError("API 키가 없습니다. .env 파일을 확인해주세요.")
+       upbit = pyupbit.Upbit(access, secret)
+   return upbit
+
+# 유튜브 자막 저장소 (영상별로 한 번만 조회해서 transcripts 폴더에 저장)
+transcript_store = TranscriptStore("transcripts")
+
+# 투자 전략(유튜브 자막) 검색 인덱스
+# 처음 사용할 때 한 번만 청크로 나눠두고, 매 거래마다 관련된 청크만 프롬프트에 사용
+strategy_index = None
+
+def get_strategy_index():
+   """
+   투자 전략 검색 인덱스 반환 (최초 호출 시 생성)
+   STRATEGY_VIDEO_IDS(쉼표로 구분)가 있으면 해당 영상들의 자막을, 없으면 strategy.txt를 사용
+   """
+   global strategy_index
+   if strategy_index is None:
+       strategy_video_ids = [v.strip() for v in os.getenv("STRATEGY_VIDEO_IDS", "").split(",") if v.strip()]
+       if strategy_video_ids:
+           strategy_index = StrategyIndex(transcript_store.get_combined_text(strategy_video_ids))
+       else:
+           strategy_index = StrategyIndex.from_file("strategy.txt")
+   return strategy_index
 
 ################################################################################
 # 데이터 모델 및 데이터베이스 관련 클래스/함수
@@ -125,6 +137,7 @@ def get_recent_trades(conn, days=7):
    Returns:
        DataFrame: 최근 거래 내역
    """
+   import pandas as pd
    c = conn.cursor()
    seven_days_ago = (datetime.now() - timedelta(days=days)).isoformat()
    c.execute("SELECT * FROM trades WHERE timestamp > ? ORDER BY timestamp DESC", (seven_days_ago,))
@@ -156,6 +169,7 @@ def generate_reflection(trades_df, current_market_data):
     Returns:
         str: AI의 분석 결과
     """
+    from openai import OpenAI
     performance = calculate_performance(trades_df)
     
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -210,6 +224,7 @@ def generate_reflection(trades_df, current_market_data):
 
 # 데이터프레임에 보조 지표를 추가하는 함수
 def add_indicators(df):
+    import ta
     # 볼린저 밴드 추가
     indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
     df['bb_bbm'] = indicator_bb.bollinger_mavg()
@@ -233,6 +248,7 @@ def add_indicators(df):
 
 # 공포 탐욕 지수 조회
 def get_fear_and_greed_index():
+    import requests
     url = "https://api.alternative.me/fng/"
     try:
         response = requests.get(url, timeout=10)
@@ -245,6 +261,7 @@ def get_fear_and_greed_index():
 
 # 뉴스 데이터 가져오기
 def get_bitcoin_news():
+    import requests
     serpapi_key = os.getenv("SERPAPI_API_KEY")
     if not serpapi_key:
         logger.error("SERPAPI API key is missing.")
@@ -257,7 +274,7 @@ def get_bitcoin_news():
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -272,20 +289,39 @@ def get_bitcoin_news():
         return headlines[:5]
     except requests.RequestException as e:
         logger.error(f"Error fetching news: {e}")
-        return []
+        return None
+
+# 외부 신호 캐시 설정
+# 공포탐욕지수는 하루에 한 번 갱신되므로 TTL을 길게 설정
+# 캐시된 값이 있으면 바로 사용하고, TTL이 지나면 백그라운드에서 갱신
+signal_cache = SignalCache("signal_cache.json")
+signal_cache.register("fear_greed_index", get_fear_and_greed_index, ttl=int(os.getenv("FNG_CACHE_TTL", "3600")))
+signal_cache.register("news_headlines", get_bitcoin_news, ttl=int(os.getenv("NEWS_CACHE_TTL", "1800")))
+
+# AI 호출 생략 게이트 설정
+# 마지막 AI 결정 이후 가격, RSI, 볼린저 밴드 위치 변화가 모두 임계값보다 작으면
+# 차트 캡처와 AI 호출 없이 이전 판단으로 홀딩 기록
+decision_gate = DecisionGate(
+    price_change_pct=float(os.getenv("GATE_PRICE_CHANGE_PCT", "1.0")),
+    rsi_change=float(os.getenv("GATE_RSI_CHANGE", "5")),
+    bb_change=float(os.getenv("GATE_BB_CHANGE", "0.1")),
+    max_age_hours=float(os.getenv("GATE_MAX_AGE_HOURS", "24"))
+)
         
 # 유튜브 자막 데이터 가져오기
 def get_combined_transcript(video_id):
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['ko'])
-        combined_text = ' '.join(entry['text'] for entry in transcript)
-        return combined_text
+        # 저장소에 없을 때만 YouTube에서 조회하고, 이어 붙인 텍스트를 그대로 반환
+        return transcript_store.get_text(video_id, language='ko')
     except Exception as e:
         logger.error(f"Error fetching YouTube transcript: {e}")
         return ""
 
 #### Selenium 관련 함수
 def create_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
     env = os.getenv("ENVIRONMENT")
     logger.info("ChromeDriver 설정 중...")
     chrome_options = Options()
@@ -310,6 +346,14 @@ def create_driver():
 
 # XPath로 Element 찾기
 def click_element_by_xpath(driver, xpath, element_name, wait_time=10):
+    from selenium.webdriver.common.by import By  # 요소 찾기 방식 지정
+    from selenium.webdriver.support.ui import WebDriverWait  # 요소 대기
+    from selenium.webdriver.support import expected_conditions as EC  # 조건부 대기
+    from selenium.common.exceptions import (
+       TimeoutException,  # 시간 초과
+       ElementClickInterceptedException,  # 클릭 불가
+       NoSuchElementException  # 요소 없음
+    )
     try:
         element = WebDriverWait(driver, wait_time).until(
             EC.presence_of_element_located((By.XPATH, xpath))
@@ -359,33 +403,49 @@ def perform_chart_actions(driver):
     )
 # 스크린샷 캡쳐 및 base64 이미지 인코딩
 def capture_and_encode_screenshot(driver):
+    from chart_image import encode_chart_image  # 차트 이미지 인코딩 (PIL 사용)
     try:
         # 스크린샷 캡처
         png = driver.get_screenshot_as_png()
-        # PIL Image로 변환
-        img = Image.open(io.BytesIO(png))
-        # 이미지가 클 경우 리사이즈 (OpenAI API 제한에 맞춤)
-        img.thumbnail((2000, 2000))
-        # 이미지를 바이트로 변환
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        # base64로 인코딩
-        base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
-        return base64_image
+        # 차트 영역만 잘라내고 비전 모델 타일 크기에 맞게 줄인 뒤 JPEG로 인코딩 (data URL 반환)
+        return encode_chart_image(
+            png,
+            max_tiles=int(os.getenv("CHART_MAX_TILES", "4")),
+            image_format=os.getenv("CHART_IMAGE_FORMAT", "JPEG"),
+            quality=int(os.getenv("CHART_IMAGE_QUALITY", "80"))
+        )
     except Exception as e:
         logger.error(f"스크린샷 캡처 및 인코딩 중 오류 발생: {e}")
         return None
 
+# 현재 잔고와 BTC 가격을 조회해서 거래 기록 저장
+def log_current_balances(conn, decision, percentage, reason, reflection):
+    import pyupbit
+    balances = get_upbit().get_balances()
+    btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'BTC'), 0)
+    krw_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'KRW'), 0)
+    btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == 'BTC'), 0)
+    current_btc_price = pyupbit.get_current_price("KRW-BTC")
+
+    # 거래 기록을 DB에 저장하기
+    log_trade(conn, decision, percentage, reason, 
+            btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, reflection)
+
 ### 메인 AI 트레이딩 로직
-def ai_trading():
-    """메인 AI 트레이딩 로직
+def prepare_trading_context():
+    """거래 판단에 필요한 데이터를 미리 수집
     1. 시장 데이터 수집
     2. 기술적 분석 수행
-    3. AI 모델에 분석 요청
-    4. 거래 실행
-    5. 결과 기록
+    3. 차트 캡처
+    4. 최근 거래 반성 생성
+    Returns:
+        dict: execute_trading()에 전달할 데이터, 실패 시 None
     """
-    global upbit
+    import pyupbit
+    from ta.utils import dropna  # 결측값 처리
+    from selenium.common.exceptions import WebDriverException  # 드라이버 오류
+    upbit = get_upbit()
+    started = time.time()
     
     # 1. 현재 잔고 확인
     all_balances = upbit.get_balances()
@@ -403,17 +463,36 @@ def ai_trading():
     df_hourly = dropna(df_hourly)
     df_hourly = add_indicators(df_hourly)
 
+    # 마지막 AI 결정 이후 변화가 작으면 차트 캡처와 AI 호출 생략
+    try:
+        with sqlite3.connect('bitcoin_trades.db') as conn:
+            recent_trades = get_recent_trades(conn)
+    except sqlite3.Error as e:
+        logger.error(f"Database connection error: {e}")
+        return None
+    if os.getenv("GATE_ENABLED", "true").lower() == "true":
+        skip, gate_reason, last_trade = decision_gate.check(df_hourly, recent_trades)
+        if skip:
+            logger.info(gate_reason)
+            return {
+                "gate_reason": gate_reason,
+                "reflection": last_trade['reflection'],
+                "prepare_seconds": time.time() - started
+            }
+
     # 4. 공포 탐욕 지수 가져오기
-    fear_greed_index = get_fear_and_greed_index()
+    fear_greed_index = signal_cache.get("fear_greed_index")
 
     # 5. 뉴스 헤드라인 가져오기
-    news_headlines = get_bitcoin_news()
+    news_headlines = signal_cache.get("news_headlines")
 
     # 6. YouTube 자막 데이터 가져오기
     # youtube_transcript = get_combined_transcript("3XbtEX3jUv4")
-    f = open("strategy.txt", "r", encoding="utf-8")
-    youtube_transcript = f.read()
-    f.close()
+    # 전체 전략 대신 현재 시장 상황과 관련된 부분만 검색해서 사용
+    youtube_transcript = get_strategy_index().retrieve(
+        build_market_query(df_daily, df_hourly, fear_greed_index),
+        top_k=int(os.getenv("STRATEGY_TOP_K", "4"))
+    )
 
     # 7. Selenium으로 차트 캡처
     driver = None
@@ -437,6 +516,62 @@ def ai_trading():
         if driver:
             driver.quit()
 
+    # 8. 최근 거래 내역 기반 반성 생성
+    # 현재 시장 데이터 수집 (기존 코드에서 가져온 데이터 사용)
+    current_market_data = {
+        "fear_greed_index": fear_greed_index,
+        "news_headlines": news_headlines,
+        "orderbook": orderbook,
+        "daily_ohlcv": df_daily.to_dict(),
+        "hourly_ohlcv": df_hourly.to_dict()
+    }
+    
+    # 반성 및 개선 내용 생성
+    reflection = generate_reflection(recent_trades, current_market_data)
+
+    return {
+        "filtered_balances": filtered_balances,
+        "orderbook": orderbook,
+        "df_daily": df_daily,
+        "df_hourly": df_hourly,
+        "fear_greed_index": fear_greed_index,
+        "news_headlines": news_headlines,
+        "youtube_transcript": youtube_transcript,
+        "chart_image": chart_image,
+        "reflection": reflection,
+        "prepare_seconds": time.time() - started
+    }
+
+def execute_trading(context):
+    """준비된 데이터로 AI 판단을 받고 거래 실행 및 결과 기록
+    Args:
+        context: prepare_trading_context()가 반환한 데이터
+    """
+    import pyupbit
+    from openai import OpenAI
+    upbit = get_upbit()
+    started = time.time()
+
+    # 시장 변화가 작아 AI 호출을 생략한 경우: 이전 판단으로 홀딩 기록
+    if context.get("gate_reason"):
+        try:
+            with sqlite3.connect('bitcoin_trades.db') as conn:
+                log_current_balances(conn, "hold", 0, context["gate_reason"], context["reflection"])
+            decision_gate.record_skip(context["prepare_seconds"] + time.time() - started)
+        except sqlite3.Error as e:
+            logger.error(f"Database connection error: {e}")
+        return
+
+    filtered_balances = context["filtered_balances"]
+    orderbook = context["orderbook"]
+    df_daily = context["df_daily"]
+    df_hourly = context["df_hourly"]
+    fear_greed_index = context["fear_greed_index"]
+    news_headlines = context["news_headlines"]
+    youtube_transcript = context["youtube_transcript"]
+    chart_image = context["chart_image"]
+    reflection = context["reflection"]
+
     ### AI에게 데이터 제공하고 판단 받기
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     if not client.api_key:
@@ -445,21 +580,6 @@ def ai_trading():
     try:
         # 데이터베이스 연결
         with sqlite3.connect('bitcoin_trades.db') as conn:
-            # 최근 거래 내역 가져오기
-            recent_trades = get_recent_trades(conn)
-            
-            # 현재 시장 데이터 수집 (기존 코드에서 가져온 데이터 사용)
-            current_market_data = {
-                "fear_greed_index": fear_greed_index,
-                "news_headlines": news_headlines,
-                "orderbook": orderbook,
-                "daily_ohlcv": df_daily.to_dict(),
-                "hourly_ohlcv": df_hourly.to_dict()
-            }
-            
-            # 반성 및 개선 내용 생성
-            reflection = generate_reflection(recent_trades, current_market_data)
-            
             # AI 모델에 반성 내용 제공
             response = client.chat.completions.create(
                 model="gpt-4o-2024-08-06",
@@ -509,7 +629,7 @@ def ai_trading():
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/png;base64,{chart_image}"
+                                    "url": chart_image
                                 }
                             }
                         ]
@@ -586,49 +706,54 @@ def ai_trading():
                 else:
                     logger.warning("Sell Order Failed: Insufficient BTC (less than 5000 KRW worth)")
             
-            # 거래 실행 여부와 관계없이 현재 잔고 조회
+            # 거래 실행 여부와 관계없이 현재 잔고 조회 후 기록
             time.sleep(2)  # API 호출 제한을 고려하여 잠시 대기
-            balances = upbit.get_balances()
-            btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'BTC'), 0)
-            krw_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'KRW'), 0)
-            btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == 'BTC'), 0)
-            current_btc_price = pyupbit.get_current_price("KRW-BTC")
-
-            # 거래 기록을 DB에 저장하기
-            log_trade(conn, result.decision, result.percentage if order_executed else 0, result.reason, 
-                    btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, reflection)
+            log_current_balances(conn, result.decision, result.percentage if order_executed else 0,
+                                 result.reason, reflection)
     except sqlite3.Error as e:
         logger.error(f"Database connection error: {e}")
         return
 
-if __name__ == "__main__":
-    # 데이터베이스 초기화
-    init_db()
+    # AI 호출 생략 시 절약 시간 추정을 위해 전체 사이클 소요 시간 기록
+    decision_gate.record_full_cycle(context["prepare_seconds"] + time.time() - started)
 
-    # 중복 실행 방지를 위한 변수
-    trading_in_progress = False
+### 메인 AI 트레이딩 로직
+def ai_trading():
+    """메인 AI 트레이딩 로직
+    1. 시장 데이터 수집
+    2. 기술적 분석 수행
+    3. AI 모델에 분석 요청
+    4. 거래 실행
+    5. 결과 기록
+    """
+    context = prepare_trading_context()
+    if context is None:
+        return
+    execute_trading(context)
 
-    # 트레이딩 작업을 수행하는 함수
-    def job():
-        global trading_in_progress
-        if trading_in_progress:
-            logger.warning("Trading job is already in progress, skipping this run.")
-            return
-        try:
-            trading_in_progress = True
-            ai_trading()
-        except Exception as e:
-            logger.error(f"An error occurred: {e}")
-        finally:
-            trading_in_progress = False
+if __name__ == "__main__":
+    # API 키 확인 및 데이터베이스 초기화
+    get_upbit()
+    init_db()
 
     ## 테스트용 바로 실행
-    # job()
+    # ai_trading()
 
     ## 매일 특정 시간(예: 오전 9시, 오후 3시, 오후 9시)에 실행
-    schedule.every().day.at("09:00").do(job)
-    schedule.every().day.at("15:00").do(job)
-    schedule.every().day.at("21:00").do(job)
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+    ## 슬롯 시각보다 PREWARM_LEAD_SECONDS 초 먼저 데이터 수집, 차트 캡처, 반성 생성을 시작하고
+    ## 슬롯 시각에는 AI 결정과 주문만 수행
+    prepare, execute = prepare_trading_context, execute_trading
+    if os.getenv("RESOURCE_MONITOR", "false").lower() == "true":
+        # 사이클마다 메모리/파일/자식 프로세스 사용량을 기록해 누수 추세 보고
+        from resource_monitor import ResourceMonitor
+        # 사전 준비(크롬, 캔들 DataFrame)와 실행을 한 사이클로 기록
+        prepare, execute = ResourceMonitor(os.getenv("RESOURCE_REPORT_PATH", "resource_report.json")).wrap_cycle(
+            prepare_trading_context, execute_trading)
+
+    trading_scheduler = TradingScheduler(
+        prepare=prepare,
+        execute=execute,
+        slots=["09:00", "15:00", "21:00"],
+        lead_time=int(os.getenv("PREWARM_LEAD_SECONDS", "180"))
+    )
+    trading_scheduler.run()
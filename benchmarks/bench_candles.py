@@ -0,0 +1,86 @@
+"""캔들 처리 경로 벤치마크: DataFrame(pandas + ta) vs candles.Candles
+
+한 사이클에서 일봉/시간봉마다 하는 작업을 같은 순서로 실행해 비교합니다.
+  버퍼 행 → 캔들 객체 → 결측 제거 → 지표 추가 → 프롬프트 직렬화(전체 + 축소 구간)
+시간(ms)과 tracemalloc으로 잰 사이클 중 최대 메모리 사용량, 사이클 후 남은 할당 블록 수를 출력합니다.
+
+실행: python benchmarks/bench_candles.py [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from bench_hot_paths import synthetic_ohlcv  # noqa: E402
+from candles import Candles, compute_indicators  # noqa: E402
+from market_buffer import CANDLE_FIELDS  # noqa: E402
+
+def legacy_cycle(rows, windows):
+    """기존 방식: market_buffer.get_ohlcv() DataFrame → ta.utils.dropna → ta 지표 → to_json"""
+    import pandas as pd
+    import ta
+    from ta.utils import dropna
+    df = pd.DataFrame(rows[:, 1:], index=pd.to_datetime(rows[:, 0].astype(np.int64), unit="s"),
+                      columns=list(CANDLE_FIELDS[1:]))
+    df = dropna(df)
+    indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
+    df['bb_bbm'] = indicator_bb.bollinger_mavg()
+    df['bb_bbh'] = indicator_bb.bollinger_hband()
+    df['bb_bbl'] = indicator_bb.bollinger_lband()
+    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
+    macd = ta.trend.MACD(close=df['close'])
+    df['macd'] = macd.macd()
+    df['macd_signal'] = macd.macd_signal()
+    df['macd_diff'] = macd.macd_diff()
+    df['sma_20'] = ta.trend.SMAIndicator(close=df['close'], window=20).sma_indicator()
+    df['ema_12'] = ta.trend.EMAIndicator(close=df['close'], window=12).ema_indicator()
+    return [df.to_json()] + [df.tail(n).to_json() for n in windows if n < len(df)]
+
+def candles_cycle(rows, windows):
+    """새 방식: market_buffer.get_candles() → Candles.dropna → compute_indicators → Candles.to_json"""
+    candles = Candles.from_rows(rows, CANDLE_FIELDS[1:]).dropna()
+    for name, values in compute_indicators(candles['close']).items():
+        candles[name] = values
+    return [candles.to_json()] + [candles.tail(n).to_json() for n in windows if n < len(candles)]
+
+def measure(fn, rows, windows, repeat):
+    fn(rows, windows)  # 워밍업 (지연 임포트 포함)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows, windows)
+    elapsed_ms = (time.perf_counter() - started) / repeat * 1000
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn(rows, windows)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return elapsed_ms, peak, retained
+
+def main():
+    parser = argparse.ArgumentParser(description="캔들 처리 경로 벤치마크")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # (이름, 캔들 수, 프롬프트 축소 구간) - prompt_budget.build_decision_sections()의 기본값
+    cases = [("일봉", 30, (20, 14, 7)), ("시간봉", 24, (12, 6)), ("시간봉 x10", 240, (12, 6))]
+    print(f"{'데이터':<10} {'방식':<10} {'시간':>10} {'최대 메모리':>12} {'남은 블록':>10}")
+    for name, count, windows in cases:
+        df = synthetic_ohlcv(count)
+        rows = np.column_stack([np.asarray(df.index, dtype="datetime64[s]").astype(np.int64), df.to_numpy()])
+        legacy = measure(legacy_cycle, rows, windows, args.repeat)
+        new = measure(candles_cycle, rows, windows, args.repeat)
+        for label, (elapsed_ms, peak, retained) in (("DataFrame", legacy), ("Candles", new)):
+            print(f"{name:<10} {label:<10} {elapsed_ms:>8.2f}ms {peak / 1024:>10,.0f}KB {retained:>10,}")
+        print(f"{'':<10} {'개선':<10} {legacy[0] / new[0]:>9.1f}x {legacy[1] / max(new[1], 1):>11.1f}x "
+              f"{legacy[2] / max(new[2], 1):>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""차트 이미지 인코딩 벤치마크
+
+기존 방식(PNG 디코딩 → thumbnail(2000, 2000) → PNG 재인코딩)과 chart_image.encode_chart_image()의
+결과 크기, 인코딩 시간, 예상 이미지 토큰 수를 비교합니다.
+
+실행: python benchmarks/bench_chart_image.py [스크린샷.png]
+"""
+import base64
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image
+
+from chart_image import encode_chart_image, estimate_image_tokens
+
+def legacy_encode(png_bytes):
+    """기존 capture_and_encode_screenshot()의 인코딩 방식"""
+    img = Image.open(io.BytesIO(png_bytes))
+    img.thumbnail((2000, 2000))
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+def image_size(data_url):
+    """data URL에서 이미지 크기 읽기"""
+    data = base64.b64decode(data_url.split(",", 1)[1])
+    return Image.open(io.BytesIO(data)).size
+
+def measure(name, encode, png_bytes, repeat=5):
+    encode(png_bytes)  # 워밍업
+    started = time.perf_counter()
+    for _ in range(repeat):
+        data_url = encode(png_bytes)
+    elapsed_ms = (time.perf_counter() - started) / repeat * 1000
+    width, height = image_size(data_url)
+    tokens = estimate_image_tokens(width, height)
+    print(f"{name:<22} {width:>5}x{height:<5} {len(data_url):>10,} bytes {elapsed_ms:>8.1f} ms {tokens:>6} tokens")
+
+def main():
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "upbit_btc_full_chart.png")
+    path = sys.argv[1] if len(sys.argv) > 1 else default_path
+    with open(path, "rb") as f:
+        png_bytes = f.read()
+
+    print(f"입력: {path} ({len(png_bytes):,} bytes)")
+    print(f"{'방식':<22} {'크기':>11} {'data URL':>16} {'시간':>11} {'토큰':>13}")
+    measure("legacy png", legacy_encode, png_bytes)
+    measure("jpeg q80 (4 tiles)", lambda b: encode_chart_image(b), png_bytes)
+    measure("jpeg q70 (2 tiles)", lambda b: encode_chart_image(b, max_tiles=2, quality=70), png_bytes)
+    measure("webp q80 (4 tiles)", lambda b: encode_chart_image(b, image_format="WEBP"), png_bytes)
+    measure("png (4 tiles)", lambda b: encode_chart_image(b, image_format="PNG"), png_bytes)
+
+if __name__ == "__main__":
+    main()
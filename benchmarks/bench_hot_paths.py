@@ -0,0 +1,239 @@
+"""거래 사이클 주요 경로 벤치마크 (합성 데이터, 여러 크기)
+
+측정 대상:
+- add_indicators(): 캔들 수별 기술적 지표 계산 (DataFrame, candles.Candles)
+- to_json(): 지표를 포함한 캔들의 프롬프트 직렬화 (DataFrame, candles.Candles)
+- compute_chart_features(): 캔들 수별 차트 패턴 지표 (차트 스크린샷 대신 사용)
+- capture_and_encode_screenshot(): 스크린샷 크기별 차트 이미지 인코딩
+- log_trade(), get_recent_trades(), calculate_performance(): trades 테이블 행 수별
+- streamlit_app.load_data(): 대시보드의 전체 거래 내역 로드
+
+결과는 JSON으로 저장하고(기본: benchmarks/results/<커밋>.json), --compare로 이전 결과와 비교해
+최소 시간이 --threshold배 이상 느려진 항목을 회귀로 표시합니다 (회귀가 있으면 종료 코드 1).
+최소 시간은 다른 프로세스의 간섭을 덜 받으므로 중앙값보다 커밋 간 비교에 안정적입니다.
+
+실행: python benchmarks/bench_hot_paths.py [--quick] [--compare benchmarks/results/<커밋>.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+
+CANDLE_SIZES = (30, 200, 1000, 5000)
+TABLE_SIZES = (1_000, 10_000, 100_000)
+IMAGE_SIZES = ((1280, 720), (1920, 1080), (2560, 1440))
+QUICK_CANDLE_SIZES = (30, 200)
+QUICK_TABLE_SIZES = (1_000, 10_000)
+QUICK_IMAGE_SIZES = ((1920, 1080),)
+
+def synthetic_ohlcv(count, seed=0):
+    """pyupbit.get_ohlcv 형식의 랜덤 워크 캔들"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    close = 90_000_000 * np.exp(np.cumsum(rng.normal(0, 0.005, count)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.003, count)) * close
+    volume = rng.lognormal(3, 0.5, count)
+    index = pd.date_range(end=datetime.now().replace(minute=0, second=0, microsecond=0), periods=count, freq="h")
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": volume,
+        "value": volume * close,
+    }, index=index)
+
+def synthetic_screenshot(width, height, seed=0):
+    """업비트 차트 화면과 비슷한 PNG (상단 메뉴, 격자, 캔들)"""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, width, 60), fill=(9, 54, 135))  # 상단 메뉴
+    chart_top, chart_bottom = 120, height - 80
+    for y in range(chart_top, chart_bottom, 40):
+        draw.line((60, y, width - 120, y), fill=(235, 235, 235))
+    price = (chart_top + chart_bottom) / 2
+    for x in range(70, width - 130, 8):
+        close = min(max(price + rng.gauss(0, 12), chart_top), chart_bottom)
+        color = (200, 40, 40) if close < price else (30, 90, 200)
+        draw.line((x + 3, min(price, close) - rng.randint(0, 10), x + 3, max(price, close) + rng.randint(0, 10)),
+                  fill=color)
+        draw.rectangle((x, min(price, close), x + 6, max(price, close) + 1), fill=color)
+        price = close
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+class ScreenshotDriver:
+    """capture_and_encode_screenshot()용 가짜 WebDriver"""
+
+    def __init__(self, png):
+        self.png = png
+
+    def get_screenshot_as_png(self):
+        return self.png
+
+def fill_trades(path, rows, seed=0):
+    """trades 테이블에 rows개의 합성 거래 기록 (최근 30일에 고르게 분포)"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    step = timedelta(days=30) / rows
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM trades")
+        conn.executemany(
+            "INSERT INTO trades (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, "
+            "btc_krw_price, reflection) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((
+                (now - step * i).isoformat(),
+                rng.choice(("buy", "sell", "hold")),
+                rng.randint(0, 100),
+                "합성 거래 이유 " * rng.randint(5, 20),
+                rng.uniform(0, 0.1),
+                rng.uniform(0, 1_000_000),
+                rng.uniform(80_000_000, 100_000_000),
+                rng.uniform(80_000_000, 100_000_000),
+                "합성 반성 " * rng.randint(20, 80),
+            ) for i in range(rows))
+        )
+
+def measure(fn, repeat):
+    """워밍업 1회 후 repeat회 실행 시간(ms) 통계"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "repeat": repeat,
+    }
+
+def run_benchmarks(candle_sizes, table_sizes, image_sizes, repeat):
+    """모든 벤치마크 실행 → {이름[크기]: 통계}"""
+    import main
+    import streamlit_app
+    from candles import Candles
+    from chart_features import compute_chart_features
+
+    results = {}
+
+    def record(name, stats):
+        results[name] = stats
+        print(f"{name:<40} 중앙값 {stats['median_ms']:>10.2f} ms   최소 {stats['min_ms']:>10.2f} ms")
+
+    for size in candle_sizes:
+        df = synthetic_ohlcv(size)
+        record(f"add_indicators[{size}]", measure(lambda: main.add_indicators(df.copy()), repeat))
+        with_indicators = main.add_indicators(df.copy())
+        record(f"to_json[{size}]", measure(with_indicators.to_json, repeat))
+        # 거래 사이클이 실제로 쓰는 캔들 컨테이너 (candles.Candles)
+        candles = Candles.from_dataframe(df)
+        record(f"add_indicators_candles[{size}]", measure(lambda: main.add_indicators(candles.copy()), repeat))
+        record(f"to_json_candles[{size}]", measure(main.add_indicators(candles.copy()).to_json, repeat))
+        record(f"compute_chart_features[{size}]", measure(lambda: compute_chart_features(candles, candles), repeat))
+
+    for width, height in image_sizes:
+        driver = ScreenshotDriver(synthetic_screenshot(width, height))
+        record(f"capture_and_encode_screenshot[{width}x{height}]",
+               measure(lambda: main.capture_and_encode_screenshot(driver), max(1, repeat // 2)))
+
+    main.init_db().close()
+    for rows in table_sizes:
+        fill_trades("bitcoin_trades.db", rows)
+        with sqlite3.connect("bitcoin_trades.db") as conn:
+            record(f"log_trade[{rows}]", measure(
+                lambda: main.log_trade(conn, "hold", 0, "벤치마크", 0.01, 500_000, 90_000_000, 90_000_000, "반성"),
+                repeat))
+            record(f"get_recent_trades[{rows}]", measure(lambda: main.get_recent_trades(conn), repeat))
+            trades_df = main.get_recent_trades(conn)
+        record(f"calculate_performance[{rows}]", measure(lambda: main.calculate_performance(trades_df), repeat))
+        record(f"load_data[{rows}]", measure(streamlit_app.load_data, repeat))
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def compare(results, baseline_path, threshold):
+    """이전 결과와 최소 시간 비교, 회귀 항목 수 반환"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n비교 기준: {baseline_path} (커밋 {baseline.get('commit')}, {baseline.get('created_at')})")
+    regressions = 0
+    for name, stats in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<40} (새 항목)")
+            continue
+        ratio = stats["min_ms"] / before["min_ms"] if before["min_ms"] else float("inf")
+        mark = ""
+        if ratio >= threshold:
+            mark = "  ← 회귀"
+            regressions += 1
+        elif ratio <= 1 / threshold:
+            mark = "  ← 개선"
+        print(f"{name:<40} {before['min_ms']:>10.2f} → {stats['min_ms']:>10.2f} ms  x{ratio:.2f}{mark}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="거래 사이클 주요 경로 벤치마크")
+    parser.add_argument("--quick", action="store_true", help="작은 크기만 측정")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=1.2, help="이 배수 이상 느려지면 회귀로 표시")
+    args = parser.parse_args()
+
+    import logging
+    logging.basicConfig(level=logging.ERROR)
+
+    commit = git_commit()
+    output = os.path.abspath(args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"{commit}.json"))
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    # 데이터베이스/저널 파일은 임시 디렉터리에 생성 (main과 대시보드는 현재 디렉터리 기준 경로 사용)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        if args.quick:
+            results = run_benchmarks(QUICK_CANDLE_SIZES, QUICK_TABLE_SIZES, QUICK_IMAGE_SIZES, args.repeat)
+        else:
+            results = run_benchmarks(CANDLE_SIZES, TABLE_SIZES, IMAGE_SIZES, args.repeat)
+        os.chdir(REPO_DIR)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n결과 저장: {output}")
+
+    if baseline and compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
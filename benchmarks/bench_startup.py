@@ -0,0 +1,80 @@
+"""봇 진입점 시작 시간(임포트 시간) 벤치마크
+
+python -X importtime 으로 main.py / autotrade.py 를 임포트하는 데 걸리는 시간을 측정하고,
+예산(STARTUP_BUDGET_MS)을 넘거나 무거운 라이브러리가 시작 시점에 임포트되면 실패(종료 코드 1)합니다.
+
+실행: python benchmarks/bench_startup.py [--budget-ms 300] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+ENTRY_POINTS = ["main", "autotrade"]
+
+# 시작 시점에 임포트되면 안 되는 무거운 라이브러리 (실제로 사용하는 함수 안에서 임포트)
+HEAVY_MODULES = ["selenium", "openai", "pandas", "numpy", "ta", "PIL", "youtube_transcript_api", "pyupbit", "requests"]
+
+def run_importtime(module):
+    """모듈 하나를 새 프로세스에서 임포트하고 importtime 결과를 (모듈명, 깊이, cumulative_us) 목록으로 반환"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} 임포트 실패:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # 헤더 줄
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(cumulative_us)))
+    return rows
+
+def check_entry_point(module, budget_ms, repeat):
+    """진입점 하나의 임포트 시간(중앙값)과 무거운 라이브러리 임포트 여부 검사"""
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        rows = run_importtime(module)
+        total_us = next(cumulative for name, _, cumulative in rows if name == module)
+        timings.append(total_us / 1000)
+    median_ms = statistics.median(timings)
+
+    imported = {name.split(".")[0] for name, _, _ in rows}
+    heavy = sorted(m for m in HEAVY_MODULES if m in imported)
+
+    print(f"\n[{module}] 임포트 시간 중앙값 {median_ms:.1f} ms (예산 {budget_ms} ms, {repeat}회)")
+    top = sorted((r for r in rows if r[1] == 1), key=lambda r: -r[2])[:8]
+    for name, _, cumulative in top:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    ok = True
+    if median_ms > budget_ms:
+        print(f"  예산 초과: {median_ms:.1f} ms > {budget_ms} ms")
+        ok = False
+    if heavy:
+        print(f"  시작 시점에 임포트된 무거운 라이브러리: {', '.join(heavy)}")
+        ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="봇 진입점 시작 시간 벤치마크")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "300")))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [check_entry_point(module, args.budget_ms, args.repeat) for module in ENTRY_POINTS]
+    if not all(results):
+        print("\n시작 시간 예산 검사 실패")
+        sys.exit(1)
+    print("\n시작 시간 예산 검사 통과")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""로컬 가짜 OpenAI chat.completions 서버 (AI 호출 계층 테스트/벤치마크용)
+
+지연 시간(대부분 빠르고 일부는 매우 느린 꼬리 지연)과 오류(429/500)를 흉내 냅니다.
+항상 {"decision": "hold", "percentage": 0, "reason": ...} JSON을 응답합니다.
+
+실행: python benchmarks/fake_openai_server.py [--port 8765] [--median 0.3] [--slow-rate 0.05] [--error-rate 0.05]
+봇 연결: OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeOpenAIServer:
+    """백그라운드 스레드에서 실행되는 가짜 OpenAI 서버"""
+
+    def __init__(self, port=0, median=0.3, slow_rate=0.05, slow_factor=10.0, error_rate=0.0, seed=None, script=None):
+        self.median = median  # 일반 응답 지연 시간 중앙값(초)
+        self.slow_rate = slow_rate  # 꼬리 지연 비율
+        self.slow_factor = slow_factor  # 꼬리 지연 배수
+        self.error_rate = error_rate  # 429/500 응답 비율
+        self.random = random.Random(seed)
+        # 정해진 순서로 보낼 응답 [(상태 코드, 지연 시간), ...] (테스트용, 다 쓰면 무작위 응답)
+        self.script = deque(script or [])
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload, delay = server._respond(body)
+                time.sleep(delay)
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 클라이언트가 요청을 취소한 경우 (헤지 요청 등)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+
+    def _respond(self, body):
+        with self._lock:
+            self.requests += 1
+            if self.script:
+                status, delay = self.script.popleft()
+                error, error_status = status != 200, status
+            else:
+                slow = self.random.random() < self.slow_rate
+                error = self.random.random() < self.error_rate
+                delay = self.random.lognormvariate(0, 0.3) * self.median * (self.slow_factor if slow else 1)
+                error_status = self.random.choice([429, 500])
+                if error:
+                    delay /= 3
+        if error:
+            return error_status, {"error": {"message": "fake error", "type": "server_error"}}, delay
+        prompt = json.dumps(body.get("messages", []), ensure_ascii=False)
+        content = json.dumps({"decision": "hold", "percentage": 0, "reason": "fake server"})
+        return 200, {
+            "id": f"chatcmpl-fake{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": len(prompt) // 4 + len(content) // 4},
+        }, delay
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 가짜 OpenAI 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--median", type=float, default=0.3)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.port, args.median, args.slow_rate, error_rate=args.error_rate).start()
+    print(f"가짜 OpenAI 서버 실행 중: {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import json
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 캔들 컨테이너 (열마다 연속된 NumPy 배열, 슬라이스는 복사 없는 뷰, 제자리 추가)
+#
+# 거래 사이클에서 수십 개 캔들을 담으려고 DataFrame을 여러 번 만들고 복사하지 않도록
+# 캔들 조회 → 결측 제거 → 지표 계산 → 프롬프트 직렬화를 이 컨테이너로 처리하고,
+# DataFrame 변환은 pyupbit 조회 결과를 받을 때와 DataFrame이 필요한 외부 코드에 넘길 때만 수행
+#
+# 의사결정 게이트/전략 검색이 쓰는 DataFrame 기능(len, empty, index 비교, 불리언 필터,
+# iloc[i] 행 조회, tail, to_json)은 같은 이름으로 제공
+################################################################################
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume", "value")
+
+class _RowIndexer:
+    """candles.iloc[i] → 해당 행의 {열 이름: 값} dict"""
+
+    def __init__(self, candles):
+        self.candles = candles
+
+    def __getitem__(self, i):
+        return self.candles.row(i)
+
+class Candles:
+    """시간순 캔들 (timestamp: int64 초, 열: float64)
+
+    - 모든 열은 같은 용량의 연속 배열에 저장하고, 앞의 len개만 유효
+    - candles[a:b], tail(n)은 같은 배열을 공유하는 뷰 (뷰에 append하면 그때 복사)
+    - append()는 용량이 남으면 제자리에 쓰고, 부족하면 두 배로 늘림
+    """
+
+    def __init__(self, timestamps, columns, capacity=None):
+        n = len(timestamps)
+        capacity = max(capacity or n, n, 1)
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._timestamps[:n] = timestamps
+        self._columns = {}
+        for name, values in columns.items():
+            column = np.empty(capacity, dtype=np.float64)
+            column[:n] = values
+            self._columns[name] = column
+        self._length = n
+        self._owner = True  # False이면 다른 Candles의 배열을 공유하는 뷰
+
+    @classmethod
+    def _view(cls, timestamps, columns):
+        view = cls.__new__(cls)
+        view._timestamps = timestamps
+        view._columns = columns
+        view._length = len(timestamps)
+        view._owner = False
+        return view
+
+    # 변환 (경계에서만 사용) ---------------------------------------------------------
+
+    @classmethod
+    def from_dataframe(cls, df, capacity=None):
+        """pyupbit.get_ohlcv 형식 DataFrame → Candles (숫자 열만)"""
+        timestamps = np.asarray(df.index, dtype="datetime64[s]").astype(np.int64)
+        columns = {str(name): df[name].to_numpy(dtype=np.float64)
+                   for name in df.columns if np.issubdtype(df[name].dtype, np.number)}
+        return cls(timestamps, columns, capacity)
+
+    @classmethod
+    def from_rows(cls, rows, columns=OHLCV_COLUMNS, capacity=None):
+        """(N, 1 + 열 수) 배열 (첫 열 timestamp) → Candles (market_buffer 링 버퍼 형식)"""
+        rows = np.asarray(rows, dtype=np.float64)
+        return cls(rows[:, 0].astype(np.int64), {name: rows[:, i + 1] for i, name in enumerate(columns)}, capacity)
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame({name: values.copy() for name, values in self.items()},
+                            index=pd.to_datetime(self.timestamps, unit="s"))
+
+    # 조회 ------------------------------------------------------------------------
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def empty(self):
+        return self._length == 0
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self._length]
+
+    @property
+    def index(self):
+        """datetime64[s] 배열 (datetime과 비교 가능)"""
+        return self.timestamps.astype("datetime64[s]")
+
+    @property
+    def iloc(self):
+        return _RowIndexer(self)
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, key):
+        """열 이름 → 열 배열 뷰, 슬라이스 → Candles 뷰, 불리언 배열 → 해당 행만 복사한 Candles"""
+        if isinstance(key, str):
+            return self._columns[key][:self._length]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                raise ValueError("Candles 슬라이스는 간격 1만 지원합니다.")
+            return Candles._view(self._timestamps[start:stop],
+                                 {name: column[start:stop] for name, column in self._columns.items()})
+        mask = np.asarray(key)
+        return Candles(self.timestamps[mask], {name: values[mask] for name, values in self.items()})
+
+    def get(self, name, default=None):
+        return self[name] if name in self._columns else default
+
+    def items(self):
+        return ((name, column[:self._length]) for name, column in self._columns.items())
+
+    def row(self, i):
+        """i번째 행 (음수 가능) → {"timestamp": 초, 열 이름: 값}"""
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(f"캔들 행 번호 범위 초과: {i}")
+        row = {"timestamp": int(self._timestamps[i])}
+        row.update((name, float(column[i])) for name, column in self._columns.items())
+        return row
+
+    def tail(self, n):
+        return self[max(self._length - n, 0):]
+
+    def copy(self):
+        return Candles(self.timestamps, dict(self.items()))
+
+    # 수정 ------------------------------------------------------------------------
+
+    def _reserve(self, capacity):
+        """용량 확보 (뷰이면 자기 배열로 복사)"""
+        if self._owner and capacity <= len(self._timestamps):
+            return
+        capacity = max(capacity, 2 * self._length, 16)
+        timestamps = np.empty(capacity, dtype=np.int64)
+        timestamps[:self._length] = self.timestamps
+        columns = {}
+        for name, values in self.items():
+            column = np.empty(capacity, dtype=np.float64)
+            column[:self._length] = values
+            columns[name] = column
+        self._timestamps, self._columns, self._owner = timestamps, columns, True
+
+    def append(self, timestamp, **values):
+        """캔들 하나 추가 (timestamp가 마지막 캔들과 같으면 진행 중인 봉 갱신), 빠진 열은 NaN"""
+        if self._length and timestamp == self._timestamps[self._length - 1]:
+            i = self._length - 1
+        elif self._length and timestamp < self._timestamps[self._length - 1]:
+            raise ValueError(f"이전 캔들보다 이른 timestamp입니다: {timestamp}")
+        else:
+            self._reserve(self._length + 1)
+            i = self._length
+            self._length += 1
+        if not self._owner:
+            self._reserve(self._length)
+        self._timestamps[i] = timestamp
+        for name, column in self._columns.items():
+            column[i] = values.get(name, np.nan)
+
+    def __setitem__(self, name, values):
+        """열 추가/교체 (길이는 캔들 수와 같아야 함)"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) != self._length:
+            raise ValueError(f"열 길이({len(values)})가 캔들 수({self._length})와 다릅니다.")
+        if not self._owner:
+            self._reserve(self._length)
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = np.empty(len(self._timestamps), dtype=np.float64)
+        column[:self._length] = values
+
+    def dropna(self):
+        """결측/0/비정상적으로 큰 값이 있는 행 제거 (ta.utils.dropna와 같은 기준)
+
+        제거할 행이 없으면 복사 없이 자신을 반환
+        """
+        valid = np.ones(self._length, dtype=bool)
+        for _, values in self.items():
+            valid &= np.isfinite(values) & (values != 0.0) & (values < math.exp(709))
+        if valid.all():
+            return self
+        return self[valid]
+
+    # 직렬화 ----------------------------------------------------------------------
+
+    def to_json(self):
+        """DataFrame.to_json()과 같은 구조의 JSON ({열: {밀리초 timestamp: 값}}, 소수점 10자리, NaN은 null)
+
+        값마다 dict를 만들지 않고 문자열을 바로 이어 붙임
+        """
+        keys = ['"%d":' % (t * 1000) for t in self.timestamps.tolist()]
+        parts = []
+        for name, values in self.items():
+            body = ",".join([key + ("null" if v != v else repr(v)) for key, v in zip(keys, np.round(values, 10).tolist())])
+            parts.append(f"{json.dumps(name)}:{{{body}}}")
+        return "{" + ",".join(parts) + "}"
+
+    def to_dict(self):
+        """{열: {ISO 시각: 값}} (프롬프트에 넣을 때 사용)"""
+        keys = self.index.astype(str).tolist()
+        return {name: dict(zip(keys, values.tolist())) for name, values in self.items()}
+
+################################################################################
+# 기술적 지표 (ta 라이브러리의 BollingerBands, RSIIndicator, MACD, SMA, EMA와 같은 계산)
+################################################################################
+
+def rolling_mean(values, window):
+    """window개 단순 이동 평균 (처음 window-1개는 NaN)"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+    return result
+
+def rolling_std(values, window):
+    """window개 이동 표준편차 (모표준편차, ddof=0)"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1)
+    return result
+
+def ewm_mean(values, alpha, min_periods=0):
+    """지수 가중 평균 (pandas ewm(adjust=False).mean()과 같음, 앞쪽 NaN은 건너뜀)"""
+    result = np.full(len(values), np.nan)
+    average = None
+    count = 0
+    for i, value in enumerate(values.tolist()):
+        if value != value:
+            if average is not None and count >= min_periods:
+                result[i] = average
+            continue
+        average = value if average is None else average + alpha * (value - average)
+        count += 1
+        if count >= min_periods:
+            result[i] = average
+    return result
+
+def ema(values, span):
+    return ewm_mean(values, 2 / (span + 1), min_periods=span)
+
+def rsi(close, window=14):
+    diff = np.diff(close, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ema_up = ewm_mean(up, 1 / window, min_periods=window)
+    ema_down = ewm_mean(down, 1 / window, min_periods=window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+
+def compute_indicators(close):
+    """종가 배열 → add_indicators()가 추가하는 지표 dict (볼린저 밴드, RSI, MACD, SMA20, EMA12)"""
+    close = np.asarray(close, dtype=np.float64)
+    bb_mavg = rolling_mean(close, 20)
+    bb_std = rolling_std(close, 20)
+    ema_12 = ema(close, 12)
+    macd = ema_12 - ema(close, 26)
+    macd_signal = ema(macd, 9)
+    return {
+        "bb_bbm": bb_mavg,
+        "bb_bbh": bb_mavg + 2 * bb_std,
+        "bb_bbl": bb_mavg - 2 * bb_std,
+        "rsi": rsi(close, 14),
+        "macd": macd,
+        "macd_signal": macd_signal,
+        "macd_diff": macd - macd_signal,
+        "sma_20": bb_mavg.copy(),
+        "ema_12": ema_12,
+    }
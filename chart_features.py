@@ -0,0 +1,198 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 캔들 배열에서 차트 패턴을 숫자 지표로 계산 (차트 스크린샷 대신 프롬프트에 전달)
+#
+# - 스윙 고점/저점, 지지/저항 구간, 캔들 패턴, 추세 기울기/강도, 고점/저점 구조
+# - 모든 계산은 OHLC 열 배열에 대해 벡터화 (candles.Candles와 DataFrame 모두 사용 가능)
+################################################################################
+
+def _ohlc(df):
+    return tuple(np.asarray(df[name], dtype=np.float64) for name in ("open", "high", "low", "close"))
+
+def average_true_range(high, low, close, window=14):
+    """최근 window개 캔들의 평균 진폭 (단순 평균 ATR)"""
+    prev_close = np.concatenate([[close[0]], close[:-1]])
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return float(true_range[-window:].mean())
+
+def swing_points(high, low, order=2):
+    """좌우 order개 캔들보다 높은 고점 / 낮은 저점의 위치
+
+    Returns:
+        tuple: (스윙 고점 인덱스 배열, 스윙 저점 인덱스 배열)
+    """
+    width = 2 * order + 1
+    if len(high) < width:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    high_windows = np.lib.stride_tricks.sliding_window_view(high, width)
+    low_windows = np.lib.stride_tricks.sliding_window_view(low, width)
+    # 같은 값이 이어지면 첫 번째 캔들만 스윙으로 인정 (argmax/argmin은 첫 위치 반환)
+    highs = np.flatnonzero(high_windows.argmax(axis=1) == order) + order
+    lows = np.flatnonzero(low_windows.argmin(axis=1) == order) + order
+    return highs, lows
+
+def support_resistance(levels, touched_at, price, tolerance, count=2):
+    """스윙 가격들을 tolerance 이내끼리 묶어 지지(현재가 아래)/저항(현재가 위) 구간 계산
+
+    Args:
+        levels: 스윙 고점/저점 가격 배열
+        touched_at: 각 가격의 캔들 인덱스
+        price: 현재가
+        tolerance: 같은 구간으로 묶을 가격 차이 (보통 ATR의 절반)
+        count: 방향별로 반환할 가까운 구간 수
+    Returns:
+        tuple: (지지 구간 목록, 저항 구간 목록), 구간은 {"price", "touches", "distance_pct", "last"}
+    """
+    if len(levels) == 0:
+        return [], []
+    order = np.argsort(levels)
+    levels, touched_at = levels[order], touched_at[order]
+    groups = np.split(np.arange(len(levels)), np.flatnonzero(np.diff(levels) > tolerance) + 1)
+    zones = [{
+        "price": round(float(levels[group].mean())),
+        "touches": int(len(group)),
+        "distance_pct": round((float(levels[group].mean()) / price - 1) * 100, 2),
+        "last": int(touched_at[group].max()),
+    } for group in groups]
+    supports = sorted((z for z in zones if z["price"] < price), key=lambda z: -z["price"])[:count]
+    resistances = sorted((z for z in zones if z["price"] >= price), key=lambda z: z["price"])[:count]
+    return supports, resistances
+
+def candlestick_patterns(open_, high, low, close):
+    """캔들 패턴 → {패턴 이름: 캔들별 불리언 배열}
+
+    패턴이 끝나는 캔들에 True (여러 캔들 패턴은 마지막 캔들 기준)
+    """
+    body = close - open_
+    size = np.abs(body)
+    span = np.maximum(high - low, 1e-12)
+    upper = high - np.maximum(open_, close)
+    lower = np.minimum(open_, close) - low
+    bullish = body > 0
+    bearish = body < 0
+
+    def prev(a, k=1, fill=False):
+        """k캔들 전 값 (앞의 k개는 fill)"""
+        if len(a) <= k:
+            return np.full(len(a), fill)
+        return np.concatenate([np.full(k, fill), a[:-k]])
+
+    prev_open, prev_close = prev(open_, fill=np.nan), prev(close, fill=np.nan)
+
+    patterns = {
+        "doji": size <= 0.1 * span,
+        "hammer": (lower >= 2 * size) & (upper <= 0.25 * span) & (size > 0.05 * span),
+        "shooting_star": (upper >= 2 * size) & (lower <= 0.25 * span) & (size > 0.05 * span),
+        "bullish_engulfing": bullish & prev(bearish) & (open_ <= prev_close) & (close >= prev_open),
+        "bearish_engulfing": bearish & prev(bullish) & (open_ >= prev_close) & (close <= prev_open),
+        "three_white_soldiers": bullish & prev(bullish) & prev(bullish, 2)
+                                & (close > prev_close) & (prev_close > prev(close, 2, np.nan)),
+        "three_black_crows": bearish & prev(bearish) & prev(bearish, 2)
+                             & (close < prev_close) & (prev_close < prev(close, 2, np.nan)),
+    }
+    return patterns
+
+def trend_strength(close, window=20):
+    """최근 window개 종가의 로그 선형 회귀 (캔들당 변화율 %, 결정계수 R²)"""
+    y = np.log(close[-window:])
+    x = np.arange(len(y), dtype=np.float64)
+    x -= x.mean()
+    slope = float((x * (y - y.mean())).sum() / (x * x).sum())
+    residual = y - y.mean() - slope * x
+    total = float(((y - y.mean()) ** 2).sum())
+    r2 = 1 - float((residual ** 2).sum()) / total if total > 0 else 0.0
+    return (np.exp(slope) - 1) * 100, r2
+
+def swing_structure(high, low, swing_highs, swing_lows):
+    """최근 두 스윙 고점/저점 비교 (HH/LH: 고점 상승/하락, HL/LL: 저점 상승/하락)"""
+    structure = []
+    if len(swing_highs) >= 2:
+        structure.append("HH" if high[swing_highs[-1]] > high[swing_highs[-2]] else "LH")
+    if len(swing_lows) >= 2:
+        structure.append("HL" if low[swing_lows[-1]] > low[swing_lows[-2]] else "LL")
+    return ",".join(structure) or None
+
+def timeframe_features(df, order=2, trend_window=20, recent=3, zones=2):
+    """캔들 하나의 시간 단위에 대한 차트 지표
+
+    Args:
+        df: open/high/low/close 열이 있는 Candles 또는 DataFrame (시간순)
+        order: 스윙 판단에 쓰는 좌우 캔들 수
+        trend_window: 추세 회귀에 쓰는 최근 캔들 수
+        recent: 캔들 패턴을 확인할 최근 캔들 수
+        zones: 방향별 지지/저항 구간 수
+    Returns:
+        dict: 프롬프트용 지표 (가격은 원 단위 정수, 위치는 "몇 캔들 전")
+    """
+    open_, high, low, close = _ohlc(df)
+    n = len(close)
+    if n < 2 * order + 2:
+        return {"candles": n}
+    price = float(close[-1])
+    atr = average_true_range(high, low, close)
+    swing_highs, swing_lows = swing_points(high, low, order)
+
+    levels = np.concatenate([high[swing_highs], low[swing_lows]])
+    touched_at = np.concatenate([swing_highs, swing_lows])
+    supports, resistances = support_resistance(levels, touched_at, price, atr / 2, zones)
+    for zone in supports + resistances:
+        zone["last"] = n - 1 - zone["last"]  # 캔들 인덱스 → 몇 캔들 전
+
+    slope_pct, r2 = trend_strength(close, min(trend_window, n))
+    if r2 < 0.3 or abs(slope_pct) * min(trend_window, n) < atr / price * 100:
+        direction = "sideways"
+    else:
+        direction = "up" if slope_pct > 0 else "down"
+
+    window_high, window_low = float(high[-trend_window:].max()), float(low[-trend_window:].min())
+    patterns = [{"pattern": name, "ago": int(n - 1 - i)}
+                for name, hits in candlestick_patterns(open_, high, low, close).items()
+                for i in np.flatnonzero(hits[-recent:]) + max(n - recent, 0)]
+    patterns.sort(key=lambda p: p["ago"])
+
+    return {
+        "candles": n,
+        "trend": {
+            "direction": direction,
+            "slope_pct_per_candle": round(slope_pct, 3),
+            "r2": round(r2, 2),
+            "structure": swing_structure(high, low, swing_highs, swing_lows),
+        },
+        "atr_pct": round(atr / price * 100, 2),
+        "range_position": round((price - window_low) / (window_high - window_low), 2) if window_high > window_low else None,
+        "support": supports,
+        "resistance": resistances,
+        "last_swing_high": {"price": round(float(high[swing_highs[-1]])), "ago": int(n - 1 - swing_highs[-1])}
+                           if len(swing_highs) else None,
+        "last_swing_low": {"price": round(float(low[swing_lows[-1]])), "ago": int(n - 1 - swing_lows[-1])}
+                          if len(swing_lows) else None,
+        "patterns": patterns,
+    }
+
+def compute_chart_features(df_daily, df_hourly):
+    """일봉/시간봉 차트 지표 (차트 스크린샷 대신 AI에게 전달)"""
+    return {
+        "daily": timeframe_features(df_daily),
+        "hourly": timeframe_features(df_hourly),
+    }
+
+def compact_chart_features(features):
+    """예산이 부족할 때 쓰는 축약 지표 (추세, 가장 가까운 지지/저항 가격, 패턴 이름)"""
+    compact = {}
+    for timeframe, values in (features or {}).items():
+        if "trend" not in values:
+            continue
+        compact[timeframe] = {
+            "trend": values["trend"]["direction"],
+            "slope_pct": values["trend"]["slope_pct_per_candle"],
+            "r2": values["trend"]["r2"],
+            "support": values["support"][0]["price"] if values["support"] else None,
+            "resistance": values["resistance"][0]["price"] if values["resistance"] else None,
+            "patterns": sorted({p["pattern"] for p in values["patterns"]}),
+        }
+    return compact
@@ -0,0 +1,87 @@
+import base64
+import io
+import logging
+import math
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 차트 스크린샷 → 비전 모델 입력용 이미지 인코딩
+################################################################################
+
+# OpenAI 비전 모델(high detail) 타일 크기와 토큰 계산 기준
+TILE_SIZE = 512
+BASE_TOKENS = 85
+TOKENS_PER_TILE = 170
+
+# 업비트 전체 차트 화면에서 상단 시세/툴바 영역을 제외한 차트 영역 (가로/세로 비율: 왼쪽, 위, 오른쪽, 아래)
+DEFAULT_CROP_BOX = (0.0, 0.2, 1.0, 1.0)
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+def estimate_image_tokens(width, height):
+    """OpenAI high detail 기준 이미지 입력 토큰 수 추정
+
+    2048x2048 안으로 축소 → 짧은 변을 768로 축소 → 512px 타일 수 × 170 + 85
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return BASE_TOKENS + TOKENS_PER_TILE * tiles
+
+def fit_to_tiles(width, height, max_tiles=4):
+    """타일 경계에 맞춰 max_tiles 개 이하의 타일에 들어가는 가장 큰 크기 계산
+
+    모델 쪽에서 다시 축소되지 않도록 짧은 변은 768 이하로 맞춤
+    """
+    best_scale = 0
+    for cols in range(1, max_tiles + 1):
+        rows = max_tiles // cols
+        scale = min(1.0, cols * TILE_SIZE / width, rows * TILE_SIZE / height, 768 / min(width, height))
+        if scale > best_scale:
+            best_scale = scale
+    return max(1, int(width * best_scale)), max(1, int(height * best_scale))
+
+def encode_chart_image(png_bytes, crop_box=DEFAULT_CROP_BOX, max_tiles=4, image_format="JPEG", quality=80):
+    """스크린샷 PNG를 잘라내고 타일 크기에 맞게 줄인 뒤 data URL로 인코딩
+
+    Args:
+        png_bytes: 스크린샷 PNG 바이트
+        crop_box: 잘라낼 영역 (가로/세로 비율), None이면 자르지 않음
+        max_tiles: 최대 타일 수 (이미지 토큰 상한)
+        image_format: JPEG, WEBP 또는 PNG
+        quality: JPEG/WEBP 품질
+    Returns:
+        str: data:image/...;base64,... 형식의 URL
+    """
+    image_format = image_format.upper()
+    img = Image.open(io.BytesIO(png_bytes))
+    width, height = img.size
+
+    if crop_box is not None:
+        left, top, right, bottom = crop_box
+        img = img.crop((int(width * left), int(height * top), int(width * right), int(height * bottom)))
+        width, height = img.size
+
+    target_size = fit_to_tiles(width, height, max_tiles)
+    if image_format == "PNG" and crop_box is None and target_size == (width, height):
+        # 변환할 것이 없으면 원본 PNG를 다시 인코딩하지 않고 그대로 사용
+        data = png_bytes
+    else:
+        if target_size != (width, height):
+            img = img.resize(target_size, Image.BICUBIC, reducing_gap=2.0)
+        if image_format != "PNG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        buffered = io.BytesIO()
+        if image_format == "PNG":
+            img.save(buffered, format="PNG")
+        else:
+            img.save(buffered, format=image_format, quality=quality)
+        data = buffered.getvalue()
+
+    encoded = base64.b64encode(data).decode("utf-8")
+    return f"data:{MIME_TYPES[image_format]};base64,{encoded}"
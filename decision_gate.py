@@ -0,0 +1,105 @@
+import logging
+import math
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 시장 변화가 작을 때 AI 호출을 건너뛰는 게이트
+################################################################################
+
+# 게이트가 기록한 홀딩 거래의 reason 앞에 붙는 표시 (다음 비교 대상에서 제외하기 위함)
+GATE_PREFIX = "[자동 홀딩]"
+
+def bb_position(row):
+    """볼린저 밴드 내 위치 (하단 0, 상단 1)"""
+    width = row['bb_bbh'] - row['bb_bbl']
+    if not width or math.isnan(width):
+        return float('nan')
+    return (row['close'] - row['bb_bbl']) / width
+
+class DecisionGate:
+    """마지막 AI 결정 이후 가격, RSI, 볼린저 밴드 위치 변화가 작으면
+    AI 호출(반성 + 결정)과 차트 캡처를 건너뛰고 이전 판단으로 홀딩하도록 판단
+
+    - 비교 기준: trades 테이블에서 게이트가 기록하지 않은 가장 최근 거래
+    - 그 거래 시점의 RSI/BB 위치는 시간봉 지표(add_indicators 결과)에서 조회
+    - 절약한 AI 호출 수와 시간(전체 사이클 평균 소요 시간 기준)을 누적 기록
+    """
+
+    def __init__(self, price_change_pct=1.0, rsi_change=5.0, bb_change=0.1, max_age_hours=24,
+                 calls_per_cycle=2):
+        self.price_change_pct = price_change_pct  # 가격 변화율 임계값 (%)
+        self.rsi_change = rsi_change  # RSI 변화 임계값
+        self.bb_change = bb_change  # 볼린저 밴드 위치 변화 임계값 (0~1)
+        self.max_age = timedelta(hours=max_age_hours)  # 이보다 오래된 결정은 재사용하지 않음
+        self.calls_per_cycle = calls_per_cycle  # 한 사이클의 AI 호출 수 (반성 + 결정)
+
+        self.skipped_cycles = 0
+        self.calls_saved = 0
+        self.seconds_saved = 0.0
+        self._avg_cycle_seconds = None
+
+    def last_decision(self, recent_trades):
+        """게이트가 기록하지 않은 가장 최근 거래 (없으면 None)"""
+        if recent_trades is None or recent_trades.empty:
+            return None
+        decided = recent_trades[~recent_trades['reason'].fillna('').str.startswith(GATE_PREFIX)]
+        if decided.empty:
+            return None
+        return decided.iloc[0]  # get_recent_trades()는 최신순 정렬
+
+    def check(self, df_hourly, recent_trades, now=None):
+        """AI 호출을 건너뛸지 판단
+
+        Returns:
+            tuple: (건너뛸지 여부, 자동 홀딩 사유 또는 None, 기준 거래 또는 None)
+        """
+        now = now or datetime.now()
+        last_trade = self.last_decision(recent_trades)
+        if last_trade is None or df_hourly is None or df_hourly.empty:
+            return False, None, None
+
+        traded_at = datetime.fromisoformat(last_trade['timestamp'])
+        if now - traded_at > self.max_age:
+            return False, None, last_trade
+
+        # 마지막 결정 시점의 시간봉 (해당 시각 이전의 가장 최근 봉)
+        past = df_hourly[df_hourly.index <= traded_at]
+        if past.empty:
+            return False, None, last_trade
+        then = past.iloc[-1]
+        current = df_hourly.iloc[-1]
+
+        price_then = last_trade['btc_krw_price'] or then['close']
+        price_change = (current['close'] - price_then) / price_then * 100
+        rsi_change = current['rsi'] - then['rsi']
+        bb_change = bb_position(current) - bb_position(then)
+
+        changes = (price_change, rsi_change, bb_change)
+        if any(math.isnan(v) for v in changes):
+            return False, None, last_trade
+        if (abs(price_change) >= self.price_change_pct or abs(rsi_change) >= self.rsi_change
+                or abs(bb_change) >= self.bb_change):
+            return False, None, last_trade
+
+        reason = (f"{GATE_PREFIX} 마지막 결정({traded_at:%m-%d %H:%M}) 이후 변화가 작아 이전 판단 유지 "
+                  f"(가격 {price_change:+.2f}%, RSI {rsi_change:+.1f}, BB 위치 {bb_change:+.2f}). "
+                  f"이전 판단 이유: {last_trade['reason']}")
+        return True, reason, last_trade
+
+    def record_full_cycle(self, seconds):
+        """AI를 호출한 전체 사이클 소요 시간 기록 (절약 시간 추정용 이동평균)"""
+        if self._avg_cycle_seconds is None:
+            self._avg_cycle_seconds = seconds
+        else:
+            self._avg_cycle_seconds = 0.8 * self._avg_cycle_seconds + 0.2 * seconds
+
+    def record_skip(self, spent_seconds=0.0):
+        """AI 호출을 건너뛴 사이클 기록"""
+        self.skipped_cycles += 1
+        self.calls_saved += self.calls_per_cycle
+        if self._avg_cycle_seconds is not None:
+            self.seconds_saved += max(self._avg_cycle_seconds - spent_seconds, 0)
+        logger.info(f"AI 호출 생략: 누적 {self.skipped_cycles}회, AI 호출 {self.calls_saved}회, "
+                    f"약 {self.seconds_saved:.0f}초 절약")
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import statistics
+import time
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 여러 모델/temperature 동시 호출 후 조기 합의(quorum)로 거래 결정
+################################################################################
+
+def parse_members(spec):
+    """ENSEMBLE_MODELS 형식("모델:temperature,모델:temperature,...")을 (모델, temperature) 목록으로 변환
+
+    temperature를 생략하면 None (모델 기본값)
+    """
+    members = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, temperature = item.partition(":")
+        members.append((model.strip(), float(temperature) if temperature.strip() else None))
+    return members
+
+async def decide_with_quorum(llm_client, request, members, quorum, parse):
+    """같은 요청을 여러 모델/temperature로 동시에 보내고, quorum개가 같은 결정을 내리면 즉시 반환
+
+    남은 요청은 취소. 합의한 응답들의 percentage 중앙값을 최종 비율로 사용.
+    모든 응답을 받아도 합의하지 못하면 안전하게 홀딩(0%)으로 결정
+
+    Args:
+        llm_client: LLMClient
+        request: chat.completions.create 인자 (model 제외)
+        members: (모델, temperature) 목록
+        quorum: 합의에 필요한 같은 결정 수
+        parse: 응답 → TradingDecision 변환 함수
+    Returns:
+        tuple: (TradingDecision, 보고서 dict)
+    """
+    started = time.monotonic()
+
+    async def call(model, temperature):
+        member_started = time.monotonic()
+        kwargs = dict(request, model=model)
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        response = await llm_client.acreate(**kwargs)
+        usage = getattr(response, "usage", None)
+        tokens = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+        return parse(response), time.monotonic() - member_started, tokens
+
+    tasks = {asyncio.ensure_future(call(model, temperature)): (model, temperature)
+             for model, temperature in members}
+    votes = {}
+    results = []
+    failures = 0
+    agreed = None
+    pending = set(tasks)
+    try:
+        while pending and agreed is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                model, temperature = tasks[task]
+                try:
+                    decision, latency, tokens = task.result()
+                except Exception as e:
+                    failures += 1
+                    logger.warning(f"앙상블 멤버 {model}(t={temperature}) 실패: {e}")
+                    continue
+                results.append((decision, latency, tokens))
+                votes.setdefault(decision.decision, []).append(decision)
+                if len(votes[decision.decision]) >= quorum:
+                    agreed = decision.decision
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    elapsed = time.monotonic() - started
+    if agreed is not None:
+        agreeing = votes[agreed]
+        percentage = 0 if agreed == "hold" else int(round(statistics.median(d.percentage for d in agreeing)))
+        result = type(agreeing[0])(
+            decision=agreed,
+            percentage=percentage,
+            reason=f"{agreeing[0].reason} (앙상블 {len(agreeing)}/{len(members)} 합의)"
+        )
+    else:
+        summary = ", ".join(f"{decision} {len(items)}" for decision, items in votes.items()) or "응답 없음"
+        if not results:
+            raise RuntimeError(f"앙상블 멤버 {len(members)}개가 모두 실패했습니다.")
+        result = type(results[0][0])(
+            decision="hold", percentage=0,
+            reason=f"앙상블 합의 실패({summary})로 홀딩. 첫 응답 이유: {results[0][0].reason}"
+        )
+
+    # 단일 호출 대비 지연 시간/비용 비교 (단일 호출 = 완료된 멤버 응답의 중앙값)
+    single_latency = statistics.median(latency for _, latency, _ in results) if results else None
+    single_tokens = statistics.mean(tokens for _, _, tokens in results) if results else None
+    total_tokens = sum(tokens for _, _, tokens in results)
+    report = {
+        "members": len(members),
+        "quorum": quorum,
+        "responses": len(results),
+        "failures": failures,
+        "cancelled": len(pending),
+        "agreed": agreed,
+        "votes": {decision: len(items) for decision, items in votes.items()},
+        "latency": elapsed,
+        "single_latency": single_latency,
+        "latency_overhead": elapsed / single_latency if single_latency else None,
+        "tokens": total_tokens,
+        # 취소된 요청도 이미 보낸 입력 토큰은 과금될 수 있으므로 멤버 수 기준 상한도 함께 기록
+        "cost_overhead": total_tokens / single_tokens if single_tokens else None,
+        "cost_overhead_max": len(members),
+    }
+    logger.info(f"앙상블 결정: {result.decision} {result.percentage}% (투표 {report['votes']}, "
+                f"응답 {len(results)}/{len(members)}, 취소 {len(pending)}), "
+                f"지연 {elapsed:.1f}초 (단일 대비 x{report['latency_overhead'] or 0:.2f}), "
+                f"토큰 {total_tokens:,} (단일 대비 x{report['cost_overhead'] or 0:.2f})")
+    return result, report
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# OpenAI 호출 계층 (공유 클라이언트, 호출 마감 시간, 재시도, 헤지 요청)
+################################################################################
+
+class LLMDeadlineExceeded(Exception):
+    """마감 시간 안에 응답을 받지 못한 경우"""
+
+def _is_retryable(error):
+    """재시도할 가치가 있는 오류인지 판단 (시간 초과, 연결 오류, 429, 5xx)"""
+    import openai
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                          openai.InternalServerError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409) or error.status_code >= 500
+    return False
+
+class LLMClient:
+    """하나의 AsyncOpenAI 클라이언트를 공유하는 chat.completions 호출 계층
+
+    - deadline: 호출 1회(재시도 포함)의 전체 마감 시간(초)
+    - 재시도: 지수 백오프 + 지터 (full jitter), 마감 시간 안에서만
+    - 헤지 요청: 응답이 최근 지연 시간의 hedge_percentile 백분위보다 늦어지면 같은 요청을
+      한 번 더 보내고 먼저 온 응답 사용 (느린 꼬리 지연 완화, 비용은 그만큼 증가)
+    - 호출별 지연 시간, 시도 횟수, 토큰 사용량 기록
+
+    동기 코드(스케줄러 스레드 등)에서는 complete()를 사용.
+    클라이언트가 하나의 이벤트 루프에 묶여 있어야 하므로 전용 백그라운드 루프에서 실행
+    """
+
+    def __init__(self, api_key=None, base_url=None, deadline=120.0, max_retries=3, backoff=1.0,
+                 max_backoff=20.0, hedge=False, hedge_percentile=95, hedge_min_samples=10,
+                 history=200):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+        self.latencies = deque(maxlen=history)  # 성공한 요청 1건의 응답 시간 (헤지 기준)
+        self.calls = deque(maxlen=history)  # 호출별 기록
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+
+        self._client = None
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            # 재시도는 이 계층에서 처리하므로 SDK 자체 재시도는 끔
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            if not self._client.api_key:
+                raise ValueError("OpenAI API 키가 없습니다.")
+        return self._client
+
+    def hedge_delay(self):
+        """헤지 요청을 보낼 대기 시간 (기록이 부족하면 None)"""
+        if not self.hedge or len(self.latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def _request(self, kwargs, timeout):
+        started = time.monotonic()
+        response = await self._get_client().chat.completions.create(timeout=timeout, **kwargs)
+        self.latencies.append(time.monotonic() - started)
+        return response
+
+    async def _attempt(self, kwargs, timeout):
+        """요청 1회 (필요하면 헤지 요청 포함)
+
+        Returns:
+            tuple: (응답, 헤지 요청을 보냈는지 여부)
+        """
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout:
+            return await asyncio.wait_for(self._request(kwargs, timeout), timeout), False
+
+        primary = asyncio.ensure_future(self._request(kwargs, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result(), False
+
+        logger.info(f"응답이 {delay:.1f}초 이상 지연되어 헤지 요청 전송")
+        hedged = asyncio.ensure_future(self._request(kwargs, timeout - delay))
+        pending = {primary, hedged}
+        error = None
+        try:
+            deadline = time.monotonic() + timeout - delay
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), True
+                    error = task.exception()
+            raise error or asyncio.TimeoutError()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def acreate(self, **kwargs):
+        """chat.completions.create와 같은 인자로 호출 (마감 시간 안에서 재시도)"""
+        started = time.monotonic()
+        deadline = started + self.deadline
+        attempt = 0
+        hedged = False
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                response, hedged_now = await self._attempt(kwargs, remaining)
+                hedged = hedged or hedged_now
+                break
+            except Exception as e:
+                if not _is_retryable(e) or attempt > self.max_retries:
+                    self._record(kwargs, started, attempt, hedged, None, error=e)
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise LLMDeadlineExceeded(f"{self.deadline:.0f}초 안에 응답을 받지 못했습니다.") from e
+                    raise
+                sleep = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+                remaining = deadline - time.monotonic()
+                if sleep >= remaining:
+                    self._record(kwargs, started, attempt, hedged, None, error=e)
+                    raise LLMDeadlineExceeded(f"{self.deadline:.0f}초 안에 응답을 받지 못했습니다.") from e
+                logger.warning(f"AI 호출 실패 ({attempt}회째, {sleep:.1f}초 후 재시도): {e}")
+                await asyncio.sleep(sleep)
+
+        self._record(kwargs, started, attempt, hedged, response)
+        return response
+
+    def _record(self, kwargs, started, attempts, hedged, response, error=None):
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.total_prompt_tokens += prompt_tokens
+        self.total_completion_tokens += completion_tokens
+        call = {
+            "model": kwargs.get("model"),
+            "latency": time.monotonic() - started,
+            "attempts": attempts,
+            "hedged": hedged,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "error": repr(error) if error else None,
+        }
+        self.calls.append(call)
+        if error is None:
+            logger.info(f"AI 호출 완료: {call['model']} {call['latency']:.1f}초, 시도 {attempts}회"
+                        f"{', 헤지' if hedged else ''}, 토큰 입력 {prompt_tokens:,} / 출력 {completion_tokens:,}")
+
+    def _get_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True).start()
+        return self._loop
+
+    def run(self, coro):
+        """동기 코드에서 코루틴을 클라이언트 전용 이벤트 루프에서 실행하고 결과를 기다림"""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+    def complete(self, **kwargs):
+        """동기 코드용 호출 (acreate를 전용 이벤트 루프에서 실행)"""
+        return self.run(self.acreate(**kwargs))
+
+    def stats(self):
+        """최근 호출 통계 (지연 시간 백분위, 재시도/헤지 비율, 누적 토큰)"""
+        calls = list(self.calls)
+        latencies = sorted(call["latency"] for call in calls if call["error"] is None)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+        return {
+            "calls": len(calls),
+            "errors": sum(1 for call in calls if call["error"]),
+            "retried": sum(1 for call in calls if call["attempts"] > 1),
+            "hedged": sum(1 for call in calls if call["hedged"]),
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "prompt_tokens": self.total_prompt_tokens,
+            "completion_tokens": self.total_completion_tokens,
+        }
@@ -1,29 +1,26 @@
+# pyupbit, pandas, ta, openai, selenium, PIL 등 무거운 라이브러리는 실제로 사용하는 함수 안에서 임포트
+# (테스트나 드라이런에서 모듈을 불러올 때 전체 임포트 비용을 내지 않도록)
+import asyncio
 import os
 from dotenv import load_dotenv
-import pyupbit
-import pandas as pd
-import json
-from openai import OpenAI
-import ta
-from ta.utils import dropna
 import time
-import requests
-import base64
-from PIL import Image
-import io
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, WebDriverException, NoSuchElementException
 import logging
-from youtube_transcript_api import YouTubeTranscriptApi
 from pydantic import BaseModel
 import sqlite3
 from datetime import datetime, timedelta
-import schedule
+from scheduler import TradingScheduler
+from signal_cache import SignalCache
+from strategy_index import StrategyIndex, build_market_query
+from transcript_store import TranscriptStore
+from decision_gate import DecisionGate
+from snapshot_journal import SnapshotJournal
+from news_pipeline import NewsPipeline
+from llm_client import LLMClient
+from accounts import DEFAULT_ACCOUNT, Account, AccountRegistry, account_env, parse_account_names
+from write_behind import WriteBehindLogger, install_signal_handlers
+from prompt_budget import build_decision_prompt
+from ensemble import parse_members, decide_with_quorum
+from volatility_detector import VolatilityDetector, watch_volatility
 
 ################################################################################
 # 기본 설정
@@ -36,18 +33,153 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Upbit API 연결 설정
-access = os.getenv("UPBIT_ACCESS_KEY")
-secret = os.getenv("UPBIT_SECRET_KEY")
-if not access or not secret:
-    logger.error("API 키를 찾을 수 없습니다. .env 파일을 확인해주세요.")
-    raise ValueError("API 키가 없습니다. .env 파일을 확인해주세요.")
-upbit = pyupbit.Upbit(access, secret)
+# 거래 계좌 목록은 처음 사용할 때 생성 (get_accounts, ACCOUNTS로 여러 계좌 지정)
+accounts = None
+
+def account_file(prefix, name):
+    """계좌별 상태 파일 이름 (default 계좌는 기존 파일 이름 그대로 사용)"""
+    return f"{prefix}.json" if name == DEFAULT_ACCOUNT else f"{prefix}_{name}.json"
+
+def create_upbit(name):
+    """계좌의 Upbit API 연결 생성 (PAPER_TRADING=true이면 모의 거래소)"""
+    if os.getenv("PAPER_TRADING", "false").lower() == "true":
+        # 모의 거래: 실시간 호가로 체결하지만 실제 주문은 하지 않음 (잔고는 paper_account*.json에 저장)
+        from paper_exchange import PaperUpbit
+        logger.info(f"[{name}] 모의 거래 모드로 실행합니다.")
+        return PaperUpbit(krw=float(account_env(name, "PAPER_KRW", os.getenv("PAPER_KRW", "1000000"))),
+                          state_path=account_file("paper_account", name))
+    import pyupbit
+    if name == DEFAULT_ACCOUNT:
+        access = os.getenv("UPBIT_ACCESS_KEY")
+        secret = os.getenv("UPBIT_SECRET_KEY")
+    else:
+        access = account_env(name, "ACCESS_KEY")
+        secret = account_env(name, "SECRET_KEY")
+    if not access or not secret:
+        logger.error(f"[{name}] API 키를 찾을 수 없습니다. .env 파일을 확인해주세요.")
+        raise ValueError(f"[{name}] API 키가 없습니다. .env 파일을 확인해주세요.")
+    return pyupbit.Upbit(access, secret)
+
+def get_accounts():
+    """거래 계좌 목록 생성 (최초 1회, ACCOUNTS가 없으면 default 계좌 하나)"""
+    global accounts
+    if accounts is None:
+        accounts = AccountRegistry([
+            Account(name, create_upbit(name),
+                    size_pct=float(account_env(name, "SIZE_PCT", "100")),
+                    max_order_krw=float(account_env(name, "MAX_ORDER_KRW", "0")))
+            for name in parse_account_names(os.getenv("ACCOUNTS"))
+        ])
+        logger.info(f"거래 계좌: {', '.join(accounts.names)} (기준 계좌: {accounts.primary.name})")
+    return accounts
+
+def get_upbit():
+    """기준 계좌의 Upbit API 연결"""
+    return get_accounts().primary.client
+
+# AI 호출 계층 (공유 클라이언트, 마감 시간, 재시도, 헤지 요청)은 처음 사용할 때 생성
+llm_client = None
+
+def get_llm_client():
+    """AI 호출 클라이언트 생성 (최초 1회)"""
+    global llm_client
+    if llm_client is None:
+        llm_client = LLMClient(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            deadline=float(os.getenv("LLM_DEADLINE_SECONDS", "120")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            hedge=os.getenv("LLM_HEDGE", "false").lower() == "true",
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        )
+    return llm_client
+
+# 수집 프로세스가 채우는 공유 메모리 시세 버퍼 (pipeline.py에서 연결, 없으면 pyupbit 직접 호출)
+market_data_buffer = None
+
+def get_ohlcv(interval, count):
+    """KRW-BTC 캔들 조회: 공유 메모리 버퍼에 충분한 데이터가 있으면 버퍼에서, 없으면 pyupbit에서"""
+    if market_data_buffer is not None:
+        try:
+            df = market_data_buffer.get_ohlcv("KRW-BTC", interval, count)
+            if df is not None:
+                return df
+        except Exception as e:
+            logger.warning(f"시세 버퍼 조회 실패, API로 조회합니다: {e}")
+    import pyupbit
+    return pyupbit.get_ohlcv("KRW-BTC", interval=interval, count=count)
+
+def get_candles(interval, count):
+    """KRW-BTC 캔들을 candles.Candles로 조회 (버퍼에서는 DataFrame을 거치지 않음)"""
+    if market_data_buffer is not None:
+        try:
+            candles = market_data_buffer.get_candles("KRW-BTC", interval, count)
+            if candles is not None:
+                return candles
+        except Exception as e:
+            logger.warning(f"시세 버퍼 조회 실패, API로 조회합니다: {e}")
+    import pyupbit
+    from candles import Candles
+    df = pyupbit.get_ohlcv("KRW-BTC", interval=interval, count=count)
+    return None if df is None else Candles.from_dataframe(df)
+
+# 유튜브 자막 저장소 (자막 파일은 처음 요청될 때 로드)
+transcript_store = TranscriptStore("transcripts")
+strategy_index = None
+
+def get_strategy_index():
+    """투자 전략 검색 인덱스 생성 (최초 1회)
+    STRATEGY_VIDEO_IDS(쉼표 구분)가 있으면 해당 영상 자막을, 없으면 strategy.txt 사용
+    """
+    global strategy_index
+    if strategy_index is None:
+        strategy_video_ids = [v.strip() for v in os.getenv("STRATEGY_VIDEO_IDS", "").split(",") if v.strip()]
+        if strategy_video_ids:
+            strategy_index = StrategyIndex(transcript_store.get_combined_text(strategy_video_ids))
+        else:
+            strategy_index = StrategyIndex.from_file("strategy.txt")
+    return strategy_index
+
+# 주문 전 위험 관리 (VaR/CVaR, 최대 포지션, 일일 거래 금액 상한)는 계좌마다 처음 사용할 때 생성
+
+def get_risk_engine(account=None):
+    """계좌(기본값: 기준 계좌)의 주문 전 위험 관리 생성 (최초 1회, 일일 거래 금액은 계좌별 risk_state*.json에 저장)"""
+    account = account or get_accounts().primary
+    if account.risk is None:
+        from risk_engine import PreTradeRisk
+        account.risk = PreTradeRisk(
+            max_var_pct=float(os.getenv("RISK_MAX_VAR_PCT", "4")),
+            max_cvar_pct=float(os.getenv("RISK_MAX_CVAR_PCT", "6")),
+            max_position_pct=float(os.getenv("RISK_MAX_POSITION_PCT", "80")),
+            max_daily_turnover_pct=float(os.getenv("RISK_MAX_DAILY_TURNOVER_PCT", "200")),
+            confidence=float(os.getenv("RISK_CONFIDENCE", "0.95")),
+            horizon=int(os.getenv("RISK_HORIZON_HOURS", "24")),
+            method=os.getenv("RISK_METHOD", "historical"),
+            state_path=account_file("risk_state", account.name)
+        )
+    return account.risk
+
+def refresh_risk_engine(account=None):
+    """저장된 시간봉으로 위험 지표 갱신 (account가 없으면 모든 계좌, 캔들이 바뀌지 않았으면 계산 생략)"""
+    df = get_candles("minute60", int(os.getenv("RISK_LOOKBACK_HOURS", "720")))
+    for target in [account] if account else get_accounts():
+        get_risk_engine(target).refresh(df)
 
 ################################################################################
 # 데이터 모델 및 데이터베이스 관련
 ################################################################################
 
+# 거래 기록, 스냅샷, 사이클 지표는 백그라운드 스레드에서 모아서 저장 (WRITE_BEHIND=false이면 바로 저장)
+write_behind = WriteBehindLogger(
+    batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "0.5")),
+    enabled=os.getenv("WRITE_BEHIND", "true").lower() == "true"
+)
+
+TRADE_INSERT = """INSERT INTO trades (timestamp, decision, percentage, reason, btc_balance, krw_balance,
+                                     btc_avg_buy_price, btc_krw_price, reflection, account)
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
 class TradingDecision(BaseModel):
     """AI의 거래 결정을 저장할 데이터 모델"""
     decision: str  # 결정: 매수/매도/홀딩
@@ -68,25 +200,53 @@ def init_db():
                   krw_balance REAL,       -- KRW 잔고
                   btc_avg_buy_price REAL, -- BTC 평균 매수가
                   btc_krw_price REAL,     -- 현재 BTC 가격
-                  reflection TEXT)         -- AI의 분석 및 반성
+                  reflection TEXT,         -- AI의 분석 및 반성
+                  account TEXT DEFAULT 'default') -- 거래 계좌 이름
+                ''')
+    # 계좌 열이 없던 기존 데이터베이스는 열 추가 (기존 기록은 default 계좌)
+    if "account" not in [row[1] for row in c.execute("PRAGMA table_info(trades)")]:
+        c.execute("ALTER TABLE trades ADD COLUMN account TEXT DEFAULT 'default'")
+    c.execute('''CREATE TABLE IF NOT EXISTS cycle_metrics
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  timestamp TEXT,          -- 기록 시간
+                  name TEXT,               -- 지표 이름 (prepare_seconds, decision_seconds 등)
+                  value REAL)
                 ''')
     conn.commit()
     return conn
 
-def log_trade(conn, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection=''):
-    """거래 기록을 데이터베이스에 저장"""
-    c = conn.cursor()
+def log_trade(conn, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection='',
+              account=DEFAULT_ACCOUNT):
+    """거래 기록을 데이터베이스에 저장
+
+    conn이 WriteBehindLogger이면 큐에 넣고 바로 반환 (백그라운드 스레드에서 일괄 저장)
+    """
     timestamp = datetime.now().isoformat()
-    c.execute("""INSERT INTO trades 
-                 VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection))
+    row = (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection,
+           account)
+    if isinstance(conn, WriteBehindLogger):
+        conn.insert('bitcoin_trades.db', TRADE_INSERT, row)
+        return
+    c = conn.cursor()
+    c.execute(TRADE_INSERT, row)
     conn.commit()
 
-def get_recent_trades(conn, days=7):
-    """최근 거래 내역 조회"""
+def log_metrics(metrics):
+    """사이클 지표 기록 (이름 → 값, 백그라운드 스레드에서 저장)"""
+    timestamp = datetime.now().isoformat()
+    write_behind.insert_many('bitcoin_trades.db', "INSERT INTO cycle_metrics (timestamp, name, value) VALUES (?, ?, ?)",
+                             [(timestamp, name, value) for name, value in metrics.items() if value is not None])
+
+def get_recent_trades(conn, days=7, account=None):
+    """최근 거래 내역 조회 (account를 지정하면 해당 계좌만)"""
+    import pandas as pd
     c = conn.cursor()
     seven_days_ago = (datetime.now() - timedelta(days=days)).isoformat()
-    c.execute("SELECT * FROM trades WHERE timestamp > ? ORDER BY timestamp DESC", (seven_days_ago,))
+    if account is None:
+        c.execute("SELECT * FROM trades WHERE timestamp > ? ORDER BY timestamp DESC", (seven_days_ago,))
+    else:
+        c.execute("SELECT * FROM trades WHERE timestamp > ? AND account = ? ORDER BY timestamp DESC",
+                  (seven_days_ago, account))
     columns = [column[0] for column in c.description]
     return pd.DataFrame.from_records(data=c.fetchall(), columns=columns)
 
@@ -95,26 +255,12 @@ def get_recent_trades(conn, days=7):
 ################################################################################
 
 def add_indicators(df):
-    """주어진 데이터프레임에 기술적 지표들을 추가"""
-    # 볼린저 밴드 (20일 기준)
-    indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
-    df['bb_bbm'] = indicator_bb.bollinger_mavg()
-    df['bb_bbh'] = indicator_bb.bollinger_hband()
-    df['bb_bbl'] = indicator_bb.bollinger_lband()
-    
-    # RSI (14일 기준)
-    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
-    
-    # MACD
-    macd = ta.trend.MACD(close=df['close'])
-    df['macd'] = macd.macd()
-    df['macd_signal'] = macd.macd_signal()
-    df['macd_diff'] = macd.macd_diff()
-    
-    # 이동평균선
-    df['sma_20'] = ta.trend.SMAIndicator(close=df['close'], window=20).sma_indicator()
-    df['ema_12'] = ta.trend.EMAIndicator(close=df['close'], window=12).ema_indicator()
-    
+    """주어진 캔들(candles.Candles 또는 DataFrame)에 기술적 지표들을 추가
+    볼린저 밴드(20, 2), RSI(14), MACD(12, 26, 9), SMA 20, EMA 12 (ta 라이브러리와 같은 계산)
+    """
+    from candles import compute_indicators
+    for name, values in compute_indicators(df['close']).items():
+        df[name] = values
     return df
 
 def calculate_performance(trades_df):
@@ -131,6 +277,7 @@ def calculate_performance(trades_df):
 
 def get_fear_and_greed_index():
     """공포 탐욕 지수 조회"""
+    import requests
     url = "https://api.alternative.me/fng/"
     try:
         response = requests.get(url, timeout=10)
@@ -142,7 +289,8 @@ def get_fear_and_greed_index():
         return None
 
 def get_bitcoin_news():
-    """비트코인 관련 최신 뉴스 수집"""
+    """비트코인 관련 최신 뉴스 수집 (NEWS_FETCH_LIMIT개, 중복 제거/감성 점수는 news_pipeline에서 처리)"""
+    import requests
     serpapi_key = os.getenv("SERPAPI_API_KEY")
     if not serpapi_key:
         logger.error("SERPAPI API 키가 없습니다.")
@@ -156,17 +304,48 @@ def get_bitcoin_news():
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         news_results = data.get("news_results", [])
+        limit = int(os.getenv("NEWS_FETCH_LIMIT", "20"))
         return [{
             "title": item.get("title", ""),
-            "date": item.get("date", "")
-        } for item in news_results[:5]]
+            "date": item.get("date", ""),
+            "source": item["source"].get("name", "") if isinstance(item.get("source"), dict) else ""
+        } for item in news_results[:limit]]
     except requests.RequestException as e:
         logger.error(f"뉴스 데이터 수집 중 오류 발생: {e}")
-        return []
+        return None
+
+# 외부 신호 캐시 (공포탐욕지수는 하루 1회 갱신되므로 TTL을 길게 설정)
+signal_cache = SignalCache("signal_cache.json")
+signal_cache.register("fear_greed_index", get_fear_and_greed_index, ttl=int(os.getenv("FNG_CACHE_TTL", "3600")))
+signal_cache.register("news_headlines", get_bitcoin_news, ttl=int(os.getenv("NEWS_CACHE_TTL", "1800")))
+
+# 뉴스 헤드라인 중복 제거 + 감성 점수 (이미 AI에게 보여준 헤드라인은 다시 보내지 않음)
+news_pipeline = NewsPipeline(
+    "news.db",
+    window_hours=int(os.getenv("NEWS_WINDOW_HOURS", "24")),
+    retention_days=int(os.getenv("NEWS_RETENTION_DAYS", "30")),
+    max_new=int(os.getenv("NEWS_MAX_NEW", "5"))
+)
+
+def digest_news(items):
+    """조회한 뉴스 → 새 헤드라인과 감성 요약 (실패하면 None)"""
+    try:
+        return news_pipeline.digest(items)
+    except Exception as e:
+        logger.error(f"뉴스 헤드라인 처리 중 오류 발생: {e}")
+        return None
+
+# 마지막 AI 결정 이후 시장 변화가 작으면 AI 호출과 차트 캡처를 생략하는 게이트
+decision_gate = DecisionGate(
+    price_change_pct=float(os.getenv("GATE_PRICE_CHANGE_PCT", "1.0")),
+    rsi_change=float(os.getenv("GATE_RSI_CHANGE", "5")),
+    bb_change=float(os.getenv("GATE_BB_CHANGE", "0.1")),
+    max_age_hours=float(os.getenv("GATE_MAX_AGE_HOURS", "24"))
+)
 
 ################################################################################
 # 차트 캡처 관련 (Selenium)
@@ -174,6 +353,9 @@ def get_bitcoin_news():
 
 def create_driver():
     """크롬 드라이버 생성"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
     env = os.getenv("ENVIRONMENT")
     logger.info("크롬 드라이버 설정을 시작합니다...")
     chrome_options = Options()
@@ -197,6 +379,10 @@ def create_driver():
 
 def click_element_by_xpath(driver, xpath, element_name, wait_time=10):
     """XPath로 요소를 찾아 클릭"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException
     try:
         element = WebDriverWait(driver, wait_time).until(
             EC.presence_of_element_located((By.XPATH, xpath))
@@ -244,14 +430,16 @@ def perform_chart_actions(driver):
     )
 
 def capture_and_encode_screenshot(driver):
-    """차트 스크린샷 캡처 및 인코딩"""
+    """차트 스크린샷 캡처 및 인코딩 (차트 영역만 잘라 비전 타일 크기에 맞춘 data URL 반환)"""
+    from chart_image import encode_chart_image
     try:
         png = driver.get_screenshot_as_png()
-        img = Image.open(io.BytesIO(png))
-        img.thumbnail((2000, 2000))
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        return encode_chart_image(
+            png,
+            max_tiles=int(os.getenv("CHART_MAX_TILES", "4")),
+            image_format=os.getenv("CHART_IMAGE_FORMAT", "JPEG"),
+            quality=int(os.getenv("CHART_IMAGE_QUALITY", "80"))
+        )
     except Exception as e:
         logger.error(f"스크린샷 캡처/인코딩 오류: {e}")
         return None
@@ -260,12 +448,11 @@ def generate_reflection(trades_df, current_market_data):
     """AI를 사용한 투자 분석 및 반성"""
     performance = calculate_performance(trades_df)
     
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    if not client.api_key:
+    if not os.getenv("OPENAI_API_KEY"):
         logger.error("OpenAI API 키가 없습니다.")
         return None
     
-    response = client.chat.completions.create(
+    response = get_llm_client().complete(
         model="gpt-4o-2024-08-06",
         messages=[
             {
@@ -306,241 +493,470 @@ def generate_reflection(trades_df, current_market_data):
 # 메인 트레이딩 로직
 ################################################################################
 
-def ai_trading():
-    """메인 AI 트레이딩 로직
-    1. 시장 데이터 수집
-    2. 기술적 분석 수행
-    3. AI 분석 및 거래 결정
-    4. 주문 실행
-    5. 결과 기록
+def log_current_balances(decision, percentage, reason, reflection, account=None):
+    """계좌(기본값: 기준 계좌)의 현재 잔고와 BTC 가격을 조회해 거래 기록 (저장은 백그라운드 스레드에서)"""
+    import pyupbit
+    account = account or get_accounts().primary
+    balances = account.client.get_balances()
+    btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'BTC'), 0)
+    krw_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'KRW'), 0)
+    btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == 'BTC'), 0)
+    current_btc_price = pyupbit.get_current_price("KRW-BTC")
+
+    log_trade(write_behind, decision, percentage, reason, 
+             btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, reflection, account.name)
+
+def record_hold(reason, reflection):
+    """주문 없이 모든 계좌의 현재 잔고로 홀딩 기록 (계좌별 동시 실행)"""
+    get_accounts().fan_out(lambda account: log_current_balances("hold", 0, reason, reflection, account))
+
+def collect_market_data():
+    """잔고, 호가, 일봉/시간봉(지표 포함), 공포탐욕지수, 뉴스, 최근 거래 내역 수집
+
+    잔고와 거래 내역은 기준 계좌 기준 (결정은 모든 계좌에 함께 적용)
     """
- 
- ### 데이터 수집
-    global upbit
-    
+    import pyupbit
+
     # 잔고 조회
-    all_balances = upbit.get_balances()
+    all_balances = get_upbit().get_balances()
     filtered_balances = [balance for balance in all_balances if balance['currency'] in ['BTC', 'KRW']]
-    
+
     # 시장 데이터 수집
+    orderbook = pyupbit.get_orderbook("KRW-BTC")
+    
+    # 일봉/시간봉 데이터 수집 및 지표 계산 (DataFrame 대신 열 배열 컨테이너 사용)
+    df_daily = get_candles("day", 30).dropna()
+    df_daily = add_indicators(df_daily)
+
+    df_hourly = get_candles("minute60", 24).dropna()
+    df_hourly = add_indicators(df_hourly)
+
+    # 부가 데이터 수집
+    fear_greed_index = signal_cache.get("fear_greed_index")
+    news_headlines = digest_news(signal_cache.get("news_headlines"))
+
+    # 최근 거래 내역 (아직 저장 대기 중인 기록까지 반영)
+    write_behind.flush(timeout=10)
+    with sqlite3.connect('bitcoin_trades.db') as conn:
+        recent_trades = get_recent_trades(conn, account=get_accounts().primary.name)
+
+    # 위험 지표는 사전 준비 단계에서 갱신해 두고 주문 시에는 캐시한 값만 사용
+    if os.getenv("RISK_ENABLED", "true").lower() == "true":
+        try:
+            refresh_risk_engine()
+        except Exception as e:
+            logger.error(f"위험 지표 갱신 중 오류 발생: {e}")
+
+    return {
+        "filtered_balances": filtered_balances,
+        "orderbook": orderbook,
+        "df_daily": df_daily,
+        "df_hourly": df_hourly,
+        "fear_greed_index": fear_greed_index,
+        "news_headlines": news_headlines,
+        "recent_trades": recent_trades
+    }
+
+def build_trading_context(market_data, started):
+    """수집한 시장 데이터에 전략 검색, 차트 지표, 반성을 더해 AI 판단용 데이터 생성
+
+    차트 패턴은 캔들 배열로 계산한 숫자 지표(chart_features.py)로 전달하고,
+    CHART_IMAGE_ENABLED=true일 때만 Selenium으로 차트 스크린샷도 캡처해 함께 전달
+    마지막 AI 결정 이후 변화가 작으면 차트 캡처와 AI 호출 없이 자동 홀딩 데이터 반환
+    """
+    df_daily = market_data["df_daily"]
+    df_hourly = market_data["df_hourly"]
+    fear_greed_index = market_data["fear_greed_index"]
+
+    # 마지막 AI 결정 이후 변화가 작으면 차트 캡처와 AI 호출 생략
+    if os.getenv("GATE_ENABLED", "true").lower() == "true":
+        skip, gate_reason, last_trade = decision_gate.check(df_hourly, market_data["recent_trades"])
+        if skip:
+            logger.info(gate_reason)
+            return {
+                "gate_reason": gate_reason,
+                "reflection": last_trade['reflection'],
+                "prepare_seconds": time.time() - started
+            }
+
+    # 투자 전략 중 현재 시장 상황과 관련된 부분만 검색
+    strategy_text = get_strategy_index().retrieve(
+        build_market_query(df_daily, df_hourly, fear_greed_index),
+        top_k=int(os.getenv("STRATEGY_TOP_K", "4"))
+    )
+
+    # 차트 패턴 지표 (지지/저항, 스윙 고점/저점, 캔들 패턴, 추세)
+    from chart_features import compute_chart_features
     try:
-        orderbook = pyupbit.get_orderbook("KRW-BTC")
-        
-        # 일봉/시간봉 데이터 수집 및 지표 계산
-        df_daily = pyupbit.get_ohlcv("KRW-BTC", interval="day", count=30)
-        df_daily = dropna(df_daily)
-        df_daily = add_indicators(df_daily)
-        
-        df_hourly = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=24)
-        df_hourly = dropna(df_hourly)
-        df_hourly = add_indicators(df_hourly)
-
-        # 부가 데이터 수집
-        fear_greed_index = get_fear_and_greed_index()
-        news_headlines = get_bitcoin_news()
-
-        # 투자 전략 로드
-        with open("strategy.txt", "r", encoding="utf-8") as f:
-            strategy_text = f.read()
-
-        # 차트 캡처
+        chart_features = compute_chart_features(df_daily, df_hourly)
+    except Exception as e:
+        logger.error(f"차트 지표 계산 중 오류 발생: {e}")
+        chart_features = None
+
+    # 차트 캡처 (선택, 캡처에 30초 이상 걸려 기본값은 사용 안 함)
+    chart_image = None
+    if os.getenv("CHART_IMAGE_ENABLED", "false").lower() == "true":
         driver = None
         try:
             driver = create_driver()
             driver.get("https://upbit.com/full_chart?code=CRIX.UPBIT.KRW-BTC")
             logger.info("차트 페이지 로드 완료")
             time.sleep(30)  # 차트 로딩 대기
-            
+
             logger.info("차트 설정 시작")
             perform_chart_actions(driver)
             logger.info("차트 설정 완료")
-            
+
             chart_image = capture_and_encode_screenshot(driver)
             logger.info("차트 캡처 완료")
-            
+
         except Exception as e:
             logger.error(f"차트 캡처 중 오류 발생: {e}")
-            chart_image = None
         finally:
             if driver:
                 driver.quit()
 
-        ### AI 분석 및 거래 실행
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        if not client.api_key:
-            raise ValueError("OpenAI API 키가 없습니다.")
-
-        # 데이터베이스 연결 및 거래 이력 분석
-        with sqlite3.connect('bitcoin_trades.db') as conn:
-            recent_trades = get_recent_trades(conn)
-            
-            current_market_data = {
-                "fear_greed_index": fear_greed_index,
-                "news_headlines": news_headlines,
-                "orderbook": orderbook,
-                "daily_ohlcv": df_daily.to_dict(),
-                "hourly_ohlcv": df_hourly.to_dict()
+    # 거래 이력 분석 및 반성 생성
+    from orderbook_features import summarize_orderbook
+    current_market_data = {
+        "fear_greed_index": fear_greed_index,
+        "news_headlines": market_data["news_headlines"],
+        "orderbook": summarize_orderbook(market_data["orderbook"]),
+        "daily_ohlcv": df_daily.to_dict(),
+        "hourly_ohlcv": df_hourly.to_dict()
+    }
+    
+    reflection = generate_reflection(market_data["recent_trades"], current_market_data)
+
+    context = dict(market_data)
+    context.update({
+        "strategy_text": strategy_text,
+        "chart_features": chart_features,
+        "chart_image": chart_image,
+        "reflection": reflection,
+        "prepare_seconds": time.time() - started
+    })
+    return context
+
+def prepare_trading_context():
+    """거래 판단에 필요한 데이터를 미리 수집 (시장 데이터, 차트 캡처, 반성 생성)
+
+    Returns:
+        dict: execute_trading()에 전달할 데이터, 실패 시 None
+    """
+    started = time.time()
+    try:
+        return build_trading_context(collect_market_data(), started)
+    except Exception as e:
+        logger.error(f"거래 데이터 준비 중 오류 발생: {e}")
+        return None
+
+def parse_trading_decision(response):
+    """AI 응답 → TradingDecision"""
+    return TradingDecision.model_validate_json(response.choices[0].message.content)
+
+def request_trading_decision(context):
+    """준비된 데이터로 AI에게 거래 결정 요청
+
+    Returns:
+        TradingDecision: AI의 거래 결정
+    """
+    chart_image = context["chart_image"]
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("OpenAI API 키가 없습니다.")
+
+    # 입력 토큰 예산 안에서 프롬프트 생성 (섹션별 토큰 수 로그 출력)
+    system_content, user_text, breakdown = build_decision_prompt(
+        context, budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+    )
+
+    user_content = [
+        {
+            "type": "text",
+            "text": user_text
+        }
+    ]
+    # 차트 스크린샷은 캡처에 성공했을 때만 첨부 (없으면 텍스트의 차트 지표만 사용)
+    if chart_image:
+        user_content.append({
+            "type": "image_url",
+            "image_url": {
+                "url": chart_image
             }
-            
-            reflection = generate_reflection(recent_trades, current_market_data)
-            
-            # AI 모델에 분석 요청
-            response = client.chat.completions.create(
-                model="gpt-4o-2024-08-06",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"""비트코인 전문 트레이더로서 현재 상황을 분석하고 매수/매도/홀딩 결정을 내려주세요.
-                        다음 요소들을 고려해 주세요:
-
-                        - 기술적 지표와 시장 데이터
-                        - 최근 뉴스의 영향
-                        - 공포탐욕지수
-                        - 전반적인 시장 심리
-                        - 차트 패턴과 추세
-                        - 최근 거래 성과와 반성
-
-                        최근 거래 분석:
-                        {reflection}
-
-                        원연토의 투자 방법을 참고하여 현재 상황을 판단해주세요:
-
-                        {strategy_text}
-
-                        응답 형식:
-                        1. 결정 (매수/매도/홀딩)
-                        2. 매수/매도시 비율(1-100%), 홀딩시 0%
-                        3. 결정 이유
-
-                        매수/매도 결정시 확신의 정도를 비율에 반영해주세요."""
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"""현재 투자 상태: {json.dumps(filtered_balances)}
-                                호가 데이터: {json.dumps(orderbook)}
-                                일봉 데이터: {df_daily.to_json()}
-                                시간봉 데이터: {df_hourly.to_json()}
-                                뉴스 헤드라인: {json.dumps(news_headlines)}
-                                공포탐욕지수: {json.dumps(fear_greed_index)}"""
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{chart_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "type": "object",
-                        "properties": {
-                            "decision": {"type": "string", "enum": ["buy", "sell", "hold"]},
-                            "percentage": {"type": "integer"},
-                            "reason": {"type": "string"}
-                        },
-                        "required": ["decision", "percentage", "reason"]
-                    }
+        })
+
+    request = dict(
+        messages=[
+            {
+                "role": "system",
+                "content": system_content
+            },
+            {
+                "role": "user",
+                "content": user_content
+            }
+        ],
+        response_format={
+            "type": "json_schema",
+            "json_schema": {
+                "type": "object",
+                "properties": {
+                    "decision": {"type": "string", "enum": ["buy", "sell", "hold"]},
+                    "percentage": {"type": "integer"},
+                    "reason": {"type": "string"}
                 },
-                max_tokens=4095
-            )
+                "required": ["decision", "percentage", "reason"]
+            }
+        },
+        max_tokens=int(os.getenv("DECISION_MAX_TOKENS", "4095"))
+    )
+
+    # AI 모델에 분석 요청
+    # ENSEMBLE_MODELS에 2개 이상 지정하면 동시에 요청하고 ENSEMBLE_QUORUM개가 합의하면 바로 결정
+    client = get_llm_client()
+    members = parse_members(os.getenv("ENSEMBLE_MODELS", ""))
+    ensemble_report = None
+    if len(members) > 1:
+        quorum = int(os.getenv("ENSEMBLE_QUORUM", str(len(members) // 2 + 1)))
+        result, ensemble_report = client.run(decide_with_quorum(client, request, members, quorum, parse_trading_decision))
+    else:
+        response = client.complete(model="gpt-4o-2024-08-06", **request)
+        result = parse_trading_decision(response)
+
+    decision_kr = "매수" if result.decision == "buy" else "매도" if result.decision == "sell" else "홀딩"
+    logger.info(f"AI 결정: {decision_kr}")
+    logger.info(f"결정 이유: {result.reason}")
+
+    record_snapshot(context, result, ensemble_report)
+
+    # 이번에 보여준 새 헤드라인은 다음 사이클부터 감성 요약에만 반영 (예산 때문에 빠진 헤드라인은 다음 사이클에 다시 후보)
+    try:
+        news_pipeline.mark_sent(context["news_headlines"], breakdown["news_shown"])
+    except Exception as e:
+        logger.error(f"뉴스 헤드라인 상태 저장 중 오류 발생: {e}")
+    return result
+
+# AI에게 보여준 입력 데이터와 결정을 사이클마다 저장 (재현/감사용, snapshot_journal.py로 조회)
+snapshot_journal = SnapshotJournal("journal")
+
+def record_snapshot(context, result, ensemble_report=None):
+    """이번 사이클의 입력 스냅샷과 결정을 저널에 저장 (백그라운드 스레드에서 저장, 실패해도 거래는 계속 진행)"""
+    if os.getenv("JOURNAL_ENABLED", "true").lower() != "true":
+        return
+    try:
+        sections = {
+            "balances": context["filtered_balances"],
+            "orderbook": context["orderbook"],
+            "df_daily": context["df_daily"],
+            "df_hourly": context["df_hourly"],
+            "fear_greed_index": context["fear_greed_index"],
+            "news_headlines": context["news_headlines"],
+            "chart_features": context["chart_features"],
+            "strategy_text": context["strategy_text"],
+            "reflection": context["reflection"],
+            "decision": result.model_dump()
+        }
+        if context["chart_image"]:
+            sections["chart_image"] = context["chart_image"]
+        if ensemble_report:
+            sections["ensemble"] = ensemble_report
+        write_behind.call(snapshot_journal.record, sections)
+    except Exception as e:
+        logger.error(f"스냅샷 저장 중 오류 발생: {e}")
+
+def apply_risk_limits(side, amount, account, current_price=None):
+    """계좌의 주문 크기를 위험 한도에 맞게 조정 (RISK_ENABLED=false이면 그대로)
+
+    위험 점검이 실패하면 매수는 하지 않고, 매도는 위험을 줄이므로 그대로 실행
+    """
+    if os.getenv("RISK_ENABLED", "true").lower() != "true":
+        return amount
+    try:
+        engine = get_risk_engine(account)
+        if not engine.ready or time.time() - engine.refreshed_at > 3600:
+            refresh_risk_engine(account)  # 사전 준비 단계를 거치지 않은 경우 (파이프라인 주문 프로세스 등)
+        balances = {b['currency']: float(b['balance']) for b in account.client.get_balances()}
+        if current_price is None:
+            import pyupbit
+            current_price = pyupbit.get_current_price("KRW-BTC")
+        adjusted, report = engine.check(side, amount, balances.get("KRW", 0.0), balances.get("BTC", 0.0),
+                                        current_price)
+        logger.info(f"[{account.name}] 위험 점검: 주문 후 BTC 비중 {report['post_position_pct']:.1f}%, "
+                    f"{engine.horizon}시간 VaR {report['post_var_pct']:.2f}% / CVaR {report['post_cvar_pct']:.2f}% "
+                    f"(총자산 대비, {report['elapsed_ms']:.2f}ms)")
+        return adjusted
+    except Exception as e:
+        logger.error(f"[{account.name}] 위험 점검 중 오류 발생: {e}")
+        return 0 if side == "buy" else amount
+
+def is_order_accepted(order):
+    """주문 응답이 접수 성공인지 (실패 시 pyupbit는 None 또는 {"error": ...}, 모의 거래소도 같은 형식)"""
+    return isinstance(order, dict) and "error" not in order and bool(order.get("uuid"))
+
+def execute_decision(result, reflection):
+    """AI 결정을 모든 계좌에 동시에 실행하고 계좌별로 결과 기록"""
+    get_accounts().fan_out(execute_account_decision, result, reflection)
+
+def execute_account_decision(account, result, reflection):
+    """계좌 하나에 AI 결정에 따른 주문을 실행하고 결과 기록 (비율은 계좌 배율 적용)"""
+    import pyupbit
+    upbit = account.client
+    percentage = account.order_percentage(result.percentage)
+
+    # 주문 실행 (기록하는 비율은 위험 한도/계좌 설정을 적용한 뒤 실제로 주문한 비율)
+    executed_percentage = 0
+
+    if result.decision == "buy":
+        my_krw = upbit.get_balance("KRW")
+        if my_krw is None:
+            logger.error(f"[{account.name}] KRW 잔고 조회 실패")
+            return
 
-            # AI 응답 처리
-            result = TradingDecision.model_validate_json(response.choices[0].message.content)
-            
-            decision_kr = "매수" if result.decision == "buy" else "매도" if result.decision == "sell" else "홀딩"
-            logger.info(f"AI 결정: {decision_kr}")
-            logger.info(f"결정 이유: {result.reason}")
-
-            # 주문 실행
-            order_executed = False
-
-            if result.decision == "buy":
-                my_krw = upbit.get_balance("KRW")
-                if my_krw is None:
-                    logger.error("KRW 잔고 조회 실패")
-                    return
-                    
-                buy_amount = my_krw * (result.percentage / 100) * 0.9995  # 수수료 고려
-                if buy_amount > 5000:
-                    logger.info(f"매수 주문 실행: 보유 KRW의 {result.percentage}%")
-                    try:
-                        order = upbit.buy_market_order("KRW-BTC", buy_amount)
-                        if order:
-                            logger.info(f"매수 주문 성공: {order}")
-                            order_executed = True
-                        else:
-                            logger.error("매수 주문 실패")
-                    except Exception as e:
-                        logger.error(f"매수 주문 중 오류 발생: {e}")
+        buy_amount = account.cap_order_krw(my_krw * (percentage / 100) * 0.9995)  # 수수료 고려
+        buy_amount = apply_risk_limits("buy", buy_amount, account)
+        if buy_amount > 5000:
+            logger.info(f"[{account.name}] 매수 주문 실행: 보유 KRW의 {buy_amount / my_krw * 100:.1f}% "
+                        f"(AI 결정 {result.percentage}%)")
+            try:
+                order = upbit.buy_market_order("KRW-BTC", buy_amount)
+                if is_order_accepted(order):
+                    logger.info(f"[{account.name}] 매수 주문 성공: {order}")
+                    executed_percentage = buy_amount / my_krw * 100
+                    get_risk_engine(account).record_turnover(buy_amount)
                 else:
-                    logger.warning("매수 실패: 최소 주문금액(5000 KRW) 미달")
-
-            elif result.decision == "sell":
-                my_btc = upbit.get_balance("KRW-BTC")
-                if my_btc is None:
-                    logger.error("BTC 잔고 조회 실패")
-                    return
-                    
-                sell_amount = my_btc * (result.percentage / 100)
-                current_price = pyupbit.get_current_price("KRW-BTC")
-                if sell_amount * current_price > 5000:
-                    logger.info(f"매도 주문 실행: 보유 BTC의 {result.percentage}%")
-                    try:
-                        order = upbit.sell_market_order("KRW-BTC", sell_amount)
-                        if order:
-                            order_executed = True
-                        else:
-                            logger.error("매도 주문 실패")
-                    except Exception as e:
-                        logger.error(f"매도 주문 중 오류 발생: {e}")
+                    logger.error(f"[{account.name}] 매수 주문 실패: {order}")
+            except Exception as e:
+                logger.error(f"[{account.name}] 매수 주문 중 오류 발생: {e}")
+        else:
+            logger.warning(f"[{account.name}] 매수 실패: 최소 주문금액(5000 KRW) 미달")
+
+    elif result.decision == "sell":
+        my_btc = upbit.get_balance("KRW-BTC")
+        if my_btc is None:
+            logger.error(f"[{account.name}] BTC 잔고 조회 실패")
+            return
+
+        current_price = pyupbit.get_current_price("KRW-BTC")
+        sell_amount = account.cap_order_krw(my_btc * (percentage / 100) * current_price) / current_price
+        sell_amount = apply_risk_limits("sell", sell_amount, account, current_price)
+        if sell_amount * current_price > 5000:
+            logger.info(f"[{account.name}] 매도 주문 실행: 보유 BTC의 {sell_amount / my_btc * 100:.1f}% "
+                        f"(AI 결정 {result.percentage}%)")
+            try:
+                order = upbit.sell_market_order("KRW-BTC", sell_amount)
+                if is_order_accepted(order):
+                    executed_percentage = sell_amount / my_btc * 100
+                    get_risk_engine(account).record_turnover(sell_amount * current_price)
                 else:
-                    logger.warning("매도 실패: 최소 주문금액(5000 KRW) 미달")
+                    logger.error(f"[{account.name}] 매도 주문 실패: {order}")
+            except Exception as e:
+                logger.error(f"[{account.name}] 매도 주문 중 오류 발생: {e}")
+        else:
+            logger.warning(f"[{account.name}] 매도 실패: 최소 주문금액(5000 KRW) 미달")
+
+    # 거래 결과 기록
+    time.sleep(2)  # API 호출 제한 고려
+    log_current_balances(result.decision, round(executed_percentage), result.reason, reflection, account)
+
+def record_gate_skip(prepare_seconds, spent_seconds):
+    """AI 호출을 생략한 사이클의 절약 시간과 지표 기록"""
+    decision_gate.record_skip(spent_seconds)
+    log_metrics({"prepare_seconds": prepare_seconds, "gate_skip": 1, "cycle_seconds": spent_seconds})
+
+def record_cycle_metrics(prepare_seconds, decision_seconds, execute_seconds=None):
+    """AI를 호출한 사이클의 단계별 소요 시간 기록 (AI 호출 생략 시 절약 시간 추정에도 사용)
+
+    execute_seconds가 없으면 준비/결정 단계만 기록 (파이프라인의 decider, 주문은 executor가 기록)
+    """
+    metrics = {"prepare_seconds": prepare_seconds, "decision_seconds": decision_seconds}
+    cycle_seconds = prepare_seconds + decision_seconds
+    if execute_seconds is not None:
+        cycle_seconds += execute_seconds
+        metrics.update({"execute_seconds": execute_seconds, "cycle_seconds": cycle_seconds})
+    decision_gate.record_full_cycle(cycle_seconds)
+    log_metrics(metrics)
+
+def execute_trading(context):
+    """준비된 데이터로 AI 거래 결정을 받고 주문 실행 및 결과 기록
+
+    Args:
+        context: prepare_trading_context()가 반환한 데이터
+    """
+    started = time.time()
+    if context.get("gate_reason"):
+        # 시장 변화가 작아 AI 호출을 생략한 경우: 이전 판단으로 홀딩 기록
+        try:
+            record_hold(context["gate_reason"], context["reflection"])
+            record_gate_skip(context["prepare_seconds"], context["prepare_seconds"] + time.time() - started)
+        except Exception as e:
+            logger.error(f"자동 홀딩 기록 중 오류 발생: {e}")
+        return
 
-            # 거래 결과 기록
-            time.sleep(2)  # API 호출 제한 고려
-            balances = upbit.get_balances()
-            btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'BTC'), 0)
-            krw_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'KRW'), 0)
-            btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == 'BTC'), 0)
-            current_btc_price = pyupbit.get_current_price("KRW-BTC")
+    try:
+        ### AI 분석 및 거래 실행
+        result = request_trading_decision(context)
+        decided = time.time()
+        execute_decision(result, context["reflection"])
 
-            log_trade(conn, result.decision, result.percentage if order_executed else 0, result.reason, 
-                     btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, reflection)
+        record_cycle_metrics(context["prepare_seconds"], decided - started, time.time() - decided)
 
     except Exception as e:
         logger.error(f"트레이딩 프로세스 중 오류 발생: {e}")
         return
 
+
+def ai_trading():
+    """메인 AI 트레이딩 로직
+    1. 시장 데이터 수집
+    2. 기술적 분석 수행
+    3. AI 분석 및 거래 결정
+    4. 주문 실행
+    5. 결과 기록
+    """
+    context = prepare_trading_context()
+    if context is None:
+        return
+    execute_trading(context)
+
 if __name__ == "__main__":
-    # 데이터베이스 초기화
+    # 계좌별 API 키 확인 및 데이터베이스 초기화
+    get_accounts()
     init_db()
-    trading_in_progress = False
+    install_signal_handlers()  # SIGTERM/SIGHUP에도 저장 대기 중인 기록을 남기고 종료
+
+    # 매일 정해진 시간(09:00, 15:00, 21:00)에 실행
+    # 슬롯 시각보다 PREWARM_LEAD_SECONDS 초 먼저 데이터 수집/차트 캡처/반성을 시작
+    prepare, execute = prepare_trading_context, execute_trading
+    if os.getenv("RESOURCE_MONITOR", "false").lower() == "true":
+        # 사이클마다 RSS, 할당 위치, 열린 파일/소켓, 자식 프로세스(크롬 등)를 기록해 누수 추세 보고
+        from resource_monitor import ResourceMonitor
+        # 사전 준비(크롬, 캔들 DataFrame)와 실행을 한 사이클로 기록
+        prepare, execute = ResourceMonitor(os.getenv("RESOURCE_REPORT_PATH", "resource_report.json")).wrap_cycle(
+            prepare_trading_context, execute_trading)
+
+    trading_scheduler = TradingScheduler(
+        prepare=prepare,
+        execute=execute,
+        slots=["09:00", "15:00", "21:00"],
+        lead_time=int(os.getenv("PREWARM_LEAD_SECONDS", "180"))
+    )
 
-    def job():
-        """정해진 시간에 실행될 트레이딩 작업"""
-        global trading_in_progress
-        if trading_in_progress:
-            logger.warning("이미 거래가 진행 중입니다.")
-            return
-        try:
-            trading_in_progress = True
-            ai_trading()
-        except Exception as e:
-            logger.error(f"오류 발생: {e}")
-        finally:
-            trading_in_progress = False
+    if os.getenv("VOLATILITY_TRIGGER", "true").lower() == "true":
+        # 1분봉 수익률/거래량이 급변하면 슬롯 외 거래 사이클 실행 (쿨다운, 일일 상한 적용)
+        volatility_detector = VolatilityDetector(
+            return_z=float(os.getenv("VOLATILITY_RETURN_Z", "4")),
+            volume_z=float(os.getenv("VOLATILITY_VOLUME_Z", "4")),
+            cooldown=int(os.getenv("VOLATILITY_COOLDOWN_SECONDS", "3600")),
+            daily_cap=int(os.getenv("VOLATILITY_DAILY_CAP", "3"))
+        )
 
-    # 매일 정해진 시간에 실행
-    schedule.every().day.at("09:00").do(job)
-    schedule.every().day.at("15:00").do(job)
-    schedule.every().day.at("21:00").do(job)
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+        async def run_with_volatility_trigger():
+            await asyncio.gather(
+                trading_scheduler.run_forever(),
+                watch_volatility(volatility_detector, lambda: get_ohlcv("minute1", 60), trading_scheduler.trigger)
+            )
+
+        asyncio.run(run_with_volatility_trigger())
+    else:
+        trading_scheduler.run()
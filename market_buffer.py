@@ -0,0 +1,246 @@
+import logging
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 공유 메모리 링 버퍼 (실시간 가격 / 캔들)
+#
+# 수집 프로세스 하나가 쓰고(single writer), 판단/주문/대시보드 프로세스는 잠금 없이 읽음.
+# 각 프로세스가 pyupbit를 따로 호출하지 않고 같은 데이터를 공유하기 위함.
+#
+# 메모리 구조: [헤더 int64 x 2: seq, count] + [데이터 float64 (capacity, 필드 수)]
+# - seq: 쓰는 중에는 홀수, 쓰기가 끝나면 짝수 (seqlock). 읽는 쪽은 읽기 전후 seq가 같고
+#   짝수일 때만 결과를 사용하고, 아니면 다시 읽음
+# - count: 지금까지 쓴 행 수 (다음에 쓸 위치 = count % capacity)
+################################################################################
+
+TICK_FIELDS = ("timestamp", "price")
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume", "value")
+
+# 시장별로 유지하는 버퍼: 이름 → (필드, 기본 용량)
+DEFAULT_SERIES = {
+    "tick": (TICK_FIELDS, 4096),
+    "minute1": (CANDLE_FIELDS, 1440),
+    "minute60": (CANDLE_FIELDS, 720),
+    "day": (CANDLE_FIELDS, 200),
+}
+
+# 캔들 종류별 길이(초), 마지막 캔들이 이 길이 + max_delay보다 오래되었으면 수집이 멈춘 것으로 판단
+INTERVAL_SECONDS = {
+    "minute1": 60, "minute3": 180, "minute5": 300, "minute10": 600, "minute15": 900, "minute30": 1800,
+    "minute60": 3600, "minute240": 14400, "day": 86400, "week": 604800,
+}
+# pyupbit 캔들 시각은 KST(UTC+9) naive 시각이고 버퍼에도 그대로 저장되므로, 비교할 현재 시각도 KST로 맞춤
+CANDLE_UTC_OFFSET = 9 * 3600
+
+_HEADER_SIZE = 16  # int64 x 2
+
+def _attach_shared_memory(name):
+    """기존 공유 메모리에 연결 (연결한 프로세스가 종료될 때 해제되지 않도록 추적 제외)
+
+    multiprocessing으로 시작된 워커는 소유자와 같은 resource tracker를 쓰므로 그대로 두고,
+    대시보드처럼 별도로 실행된 프로세스만 추적에서 제외
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if multiprocessing.parent_process() is not None:
+        return shm
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+class RingBuffer:
+    """고정 크기 float64 행 배열 링 버퍼 (공유 메모리)
+
+    create=True로 만든 쪽(소유자)이 close(unlink=True)로 해제하고,
+    다른 프로세스는 같은 name으로 create=False 연결
+    """
+
+    def __init__(self, name, fields, capacity=1024, create=False):
+        self.name = name
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        size = _HEADER_SIZE + capacity * len(self.fields) * 8
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = _attach_shared_memory(name)
+        self._header = np.ndarray((2,), dtype=np.int64, buffer=self._shm.buf)
+        self._data = np.ndarray((capacity, len(self.fields)), dtype=np.float64,
+                                buffer=self._shm.buf, offset=_HEADER_SIZE)
+        if create:
+            self._header[:] = 0
+
+    def __len__(self):
+        return int(min(self._header[1], self.capacity))
+
+    def column(self, field):
+        return self.fields.index(field)
+
+    # 쓰기 (수집 프로세스 전용) ----------------------------------------------------
+
+    def append(self, row):
+        """행 하나 추가 (가장 오래된 행을 덮어씀)"""
+        self._header[0] += 1
+        count = self._header[1]
+        self._data[count % self.capacity] = row
+        self._header[1] = count + 1
+        self._header[0] += 1
+
+    def upsert(self, row):
+        """첫 번째 필드(timestamp)가 마지막 행과 같으면 마지막 행을 갱신, 더 최신이면 추가
+
+        진행 중인 캔들을 계속 갱신하기 위함. 마지막 행보다 오래된 행은 무시
+        """
+        count = self._header[1]
+        if count:
+            last = self._data[(count - 1) % self.capacity]
+            if row[0] < last[0]:
+                return
+            if row[0] == last[0]:
+                self._header[0] += 1
+                self._data[(count - 1) % self.capacity] = row
+                self._header[0] += 1
+                return
+        self.append(row)
+
+    # 읽기 (모든 프로세스) -----------------------------------------------------------
+
+    def view(self, n=None):
+        """최근 n개 행의 복사 없는 뷰 (시간순)
+
+        버퍼 경계를 넘는 경우에만 복사. 쓰기와 동시에 읽으면 값이 섞일 수 있으므로
+        일관된 값이 필요하면 read() 사용
+        """
+        count = int(self._header[1])
+        n = min(count, self.capacity) if n is None else min(n, count, self.capacity)
+        if n <= 0:
+            return self._data[:0]
+        start = (count - n) % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            return self._data[start:end]
+        return np.concatenate((self._data[start:], self._data[:end - self.capacity]))
+
+    def read(self, n=None, retries=100):
+        """최근 n개 행의 일관된 복사본 (시간순), 쓰기 중이면 다시 읽음"""
+        for _ in range(retries):
+            seq = int(self._header[0])
+            if seq % 2:
+                continue
+            rows = np.array(self.view(n))
+            if int(self._header[0]) == seq:
+                return rows
+        raise RuntimeError(f"{self.name} 버퍼를 읽지 못했습니다 (쓰기 경합).")
+
+    def latest(self):
+        """가장 최근 행 (없으면 None)"""
+        rows = self.read(1)
+        return rows[0] if len(rows) else None
+
+    def close(self, unlink=False):
+        self._header = None
+        self._data = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+class MarketDataBuffer:
+    """시장(KRW-BTC 등)별 실시간 가격 / 캔들 링 버퍼 묶음
+
+    버퍼 이름: {prefix}_{시장}_{종류} (예: btcbot_KRW-BTC_minute60)
+    """
+
+    def __init__(self, prefix, markets=("KRW-BTC",), series=DEFAULT_SERIES, create=False):
+        self.prefix = prefix
+        self.markets = tuple(markets)
+        self.series = dict(series)
+        self.owner = create
+        self.buffers = {}
+        try:
+            for market in self.markets:
+                for kind, (fields, capacity) in self.series.items():
+                    self.buffers[(market, kind)] = RingBuffer(f"{prefix}_{market}_{kind}", fields, capacity, create)
+        except Exception:
+            self.close()
+            raise
+
+    def buffer(self, market, kind):
+        return self.buffers[(market, kind)]
+
+    def write_tick(self, market, timestamp, price):
+        self.buffer(market, "tick").append((timestamp, price))
+
+    def write_candles(self, market, interval, df):
+        """pyupbit.get_ohlcv 결과(DataFrame)를 캔들 버퍼에 반영"""
+        if df is None or df.empty:
+            return
+        ring = self.buffer(market, interval)
+        timestamps = np.asarray(df.index, dtype="datetime64[s]").astype(np.int64)
+        values = df[list(CANDLE_FIELDS[1:])].to_numpy(dtype=np.float64)
+        for timestamp, row in zip(timestamps, values):
+            ring.upsert((timestamp, *row))
+
+    def latest_price(self, market, max_age=None, now=None):
+        """가장 최근 가격 (max_age초보다 오래되었으면 None)"""
+        row = self.buffer(market, "tick").latest()
+        if row is None:
+            return None
+        if max_age is not None:
+            if (now or time.time()) - row[0] > max_age:
+                return None
+        return float(row[1])
+
+    def candles_to_fetch(self, market, interval, initial=200, now=None):
+        """다음 갱신 때 조회할 캔들 수
+
+        버퍼가 비어 있으면 initial개(용량 이하), 아니면 마지막으로 저장한 캔들부터 지금까지
+        (조회 실패가 길어졌다가 복구되어도 빠진 캔들까지 받아 링 버퍼에 빈 구간이 생기지 않도록, 최대 용량)
+        """
+        ring = self.buffer(market, interval)
+        last = ring.latest()
+        length = INTERVAL_SECONDS.get(interval)
+        if last is None:
+            return min(ring.capacity, initial)
+        if length is None:
+            return 2  # 길이를 모르는 캔들은 진행 중인 캔들과 새 캔들만
+        elapsed = (now or time.time()) + CANDLE_UTC_OFFSET - last[0]
+        return int(min(ring.capacity, max(elapsed, 0) // length + 2))
+
+    def get_candles(self, market, interval, count, max_delay=300, now=None):
+        """최근 count개 캔들 (candles.Candles)
+
+        데이터가 count개보다 적거나, 마지막 캔들이 캔들 길이 + max_delay초보다 오래되었으면
+        (수집 프로세스가 멈춘 경우) None을 반환해 호출한 쪽이 pyupbit로 조회하도록 함
+        """
+        from candles import Candles
+        rows = self.buffer(market, interval).read(count)
+        if len(rows) < count:
+            return None
+        length = INTERVAL_SECONDS.get(interval)
+        if length is not None and max_delay is not None and len(rows):
+            age = (now or time.time()) + CANDLE_UTC_OFFSET - rows[-1, 0]
+            if age > length + max_delay:
+                logger.warning(f"{market} {interval} 버퍼의 마지막 캔들이 {age / 60:,.0f}분 전 캔들이라 사용하지 않습니다.")
+                return None
+        return Candles.from_rows(rows, CANDLE_FIELDS[1:])
+
+    def get_ohlcv(self, market, interval, count, max_delay=300, now=None):
+        """pyupbit.get_ohlcv와 같은 형식의 DataFrame (데이터가 부족하거나 오래되었으면 None)"""
+        candles = self.get_candles(market, interval, count, max_delay, now)
+        return None if candles is None else candles.to_dataframe()
+
+    def close(self):
+        for ring in self.buffers.values():
+            ring.close(unlink=self.owner)
+        self.buffers = {}
@@ -59,6 +59,10 @@ def ai_trading():
     elif result["decision"] == "hold":
         print("hold:",result["reason"])
 
+if os.getenv("RESOURCE_MONITOR", "false").lower() == "true":
+    from resource_monitor import ResourceMonitor
+    ai_trading = ResourceMonitor(os.getenv("RESOURCE_REPORT_PATH", "resource_report.json")).wrap(ai_trading)
+
 while True:
     import time
     time.sleep(10)
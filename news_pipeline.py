@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import math
+import re
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 뉴스 헤드라인 파이프라인 (사이클 간 중복 제거 + 로컬 감성 점수)
+#
+# - 조회한 헤드라인은 정규화한 제목의 해시로 news.db에 저장 (재시작 후에도 유지되는 seen-set)
+# - 처음 본 헤드라인만 한 번에 모아 감성 점수 계산 (영어/한국어 어휘 사전, 외부 호출 없음)
+# - 프롬프트에는 아직 AI에게 보여주지 않은 헤드라인과 최근 헤드라인 전체의 감성 요약만 전달
+################################################################################
+
+# 어휘별 감성 가중치 (-1 ~ 1). 영어는 단어 단위, 한국어는 어절 안에 포함되면 일치
+POSITIVE_TERMS = {
+    "surge": 1.0, "surges": 1.0, "soar": 1.0, "soars": 1.0, "rally": 0.8, "rallies": 0.8, "jump": 0.7,
+    "jumps": 0.7, "gain": 0.5, "gains": 0.5, "rise": 0.5, "rises": 0.5, "climb": 0.5, "climbs": 0.5,
+    "bull": 0.7, "bullish": 0.8, "record": 0.5, "high": 0.3, "ath": 0.8, "adoption": 0.6, "adopt": 0.5,
+    "approve": 0.8, "approves": 0.8, "approval": 0.8, "approved": 0.8, "inflow": 0.6, "inflows": 0.6,
+    "buy": 0.3, "buys": 0.4, "buying": 0.4, "accumulate": 0.5, "accumulation": 0.5, "breakout": 0.7,
+    "rebound": 0.6, "rebounds": 0.6, "recover": 0.5, "recovers": 0.5, "recovery": 0.5, "upgrade": 0.5,
+    "optimism": 0.6, "optimistic": 0.6, "boost": 0.5, "boosts": 0.5, "tops": 0.4, "outperform": 0.5,
+    "strong": 0.3, "support": 0.2, "partnership": 0.4, "launch": 0.2, "launches": 0.2,
+    "급등": 1.0, "상승": 0.5, "반등": 0.6, "강세": 0.7, "최고": 0.5, "신고가": 0.8, "돌파": 0.6, "승인": 0.8,
+    "유입": 0.6, "매수": 0.3, "호재": 0.8, "기대": 0.4, "회복": 0.5, "채택": 0.6,
+}
+NEGATIVE_TERMS = {
+    "crash": -1.0, "crashes": -1.0, "plunge": -1.0, "plunges": -1.0, "plummet": -1.0, "plummets": -1.0,
+    "drop": -0.6, "drops": -0.6, "fall": -0.5, "falls": -0.5, "slump": -0.7, "slumps": -0.7,
+    "tumble": -0.8, "tumbles": -0.8, "sink": -0.6, "sinks": -0.6, "bear": -0.7, "bearish": -0.8,
+    "selloff": -0.8, "sell-off": -0.8, "dump": -0.7, "dumps": -0.7, "hack": -0.9, "hacked": -0.9,
+    "exploit": -0.8, "scam": -0.8, "fraud": -0.9, "ban": -0.8, "bans": -0.8, "banned": -0.8,
+    "crackdown": -0.8, "lawsuit": -0.6, "sue": -0.6, "sues": -0.6, "probe": -0.5, "investigation": -0.5,
+    "reject": -0.7, "rejects": -0.7, "rejected": -0.7, "delay": -0.4, "delays": -0.4, "outflow": -0.6,
+    "outflows": -0.6, "liquidation": -0.6, "liquidations": -0.6, "fear": -0.5, "fears": -0.5,
+    "warning": -0.5, "warns": -0.5, "risk": -0.3, "risks": -0.3, "concern": -0.4, "concerns": -0.4,
+    "loss": -0.5, "losses": -0.5, "bankrupt": -1.0, "bankruptcy": -1.0, "collapse": -1.0, "weak": -0.3,
+    "급락": -1.0, "하락": -0.5, "폭락": -1.0, "약세": -0.7, "매도": -0.3, "해킹": -0.9, "규제": -0.5,
+    "소송": -0.6, "조사": -0.4, "거절": -0.7, "유출": -0.6, "청산": -0.6, "악재": -0.8, "우려": -0.4,
+    "경고": -0.5, "파산": -1.0,
+}
+NEGATIONS = {"not", "no", "never", "without", "fails", "fail", "안", "못", "없"}
+_LEXICON = {**POSITIVE_TERMS, **NEGATIVE_TERMS}
+_KOREAN_TERMS = sorted((t for t in _LEXICON if re.match(r"[가-힣]", t)), key=len, reverse=True)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'\-]*|[가-힣]+")
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–]\s+[^-|–]{2,40}$")  # "제목 - Reuters" 형식의 출처 꼬리
+
+def normalize_title(title):
+    """중복 판별용 제목 (출처 꼬리, 대소문자, 구두점, 공백 차이 무시)"""
+    title = _SOURCE_SUFFIX.sub("", title.strip())
+    return " ".join(_TOKEN.findall(title.lower()))
+
+def headline_key(title):
+    return hashlib.sha1(normalize_title(title).encode("utf-8")).hexdigest()[:16]
+
+def _token_score(token):
+    if token in _LEXICON:
+        return _LEXICON[token]
+    for term in _KOREAN_TERMS:
+        if term in token:
+            return _LEXICON[term]
+    return 0.0
+
+def score_headlines(titles):
+    """헤드라인 목록의 감성 점수 (-1 부정 ~ 1 긍정, 한 번에 계산)
+
+    부정어(not, 안 등) 바로 뒤의 감성 단어는 부호를 뒤집고, 합계를 tanh로 -1~1 범위로 줄임
+    """
+    scores = []
+    for title in titles:
+        total = 0.0
+        negate = False
+        for token in _TOKEN.findall(normalize_title(title)):
+            if token in NEGATIONS:
+                negate = True
+                continue
+            score = _token_score(token)
+            if score:
+                total += -score if negate else score
+            negate = False
+        scores.append(round(math.tanh(total), 3))
+    return scores
+
+class NewsPipeline:
+    """헤드라인 seen-set과 감성 점수를 news.db에 저장하고 프롬프트용 요약 생성"""
+
+    def __init__(self, path="news.db", window_hours=24, retention_days=30, max_new=5):
+        self.path = path
+        self.window = window_hours * 3600  # 감성 요약에 포함할 최근 헤드라인 기간
+        self.retention = retention_days * 86400  # seen-set 보관 기간
+        self.max_new = max_new  # 프롬프트에 넣을 새 헤드라인 최대 수
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """news.db 연결 (블록이 끝나면 커밋 또는 롤백한 뒤 연결을 닫음)"""
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            if not self._initialized:
+                conn.execute('''CREATE TABLE IF NOT EXISTS headlines
+                                (key TEXT PRIMARY KEY,
+                                 title TEXT,
+                                 source TEXT,
+                                 published TEXT,        -- 뉴스 검색 결과의 날짜 문자열
+                                 first_seen REAL,       -- 처음 조회한 시각 (유닉스 시간)
+                                 sentiment REAL,
+                                 sent INTEGER DEFAULT 0) -- AI에게 보여줬는지 여부''')
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_headlines_first_seen ON headlines (first_seen)")
+                self._initialized = True
+            yield conn
+
+    def ingest(self, items, now=None):
+        """조회한 헤드라인 중 처음 본 것만 감성 점수를 매겨 저장
+
+        Args:
+            items: [{"title", "date", "source"}] (get_bitcoin_news 결과)
+        Returns:
+            int: 새로 저장한 헤드라인 수
+        """
+        now = now or time.time()
+        candidates = {}
+        for item in items or []:
+            title = (item.get("title") or "").strip()
+            if title:
+                candidates.setdefault(headline_key(title), item)
+        if not candidates:
+            return 0
+
+        with self._connect() as conn:
+            keys = list(candidates)
+            placeholders = ",".join("?" * len(keys))
+            seen = {row[0] for row in conn.execute(f"SELECT key FROM headlines WHERE key IN ({placeholders})", keys)}
+            new = [(key, candidates[key]) for key in keys if key not in seen]
+            if new:
+                scores = score_headlines([item["title"] for _, item in new])
+                conn.executemany(
+                    "INSERT INTO headlines (key, title, source, published, first_seen, sentiment) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(key, item["title"].strip(), item.get("source", ""), item.get("date", ""), now, score)
+                     for (key, item), score in zip(new, scores)]
+                )
+            conn.execute("DELETE FROM headlines WHERE first_seen < ?", (now - self.retention,))
+        logger.info(f"뉴스 헤드라인 {len(candidates)}개 중 새 헤드라인 {len(new)}개")
+        return len(new)
+
+    def digest(self, items=None, now=None):
+        """새 헤드라인을 반영한 뒤 프롬프트용 요약 반환
+
+        Returns:
+            dict: {"new": 아직 AI에게 보여주지 않은 헤드라인 (감성 점수 절댓값 큰 순),
+                   "sentiment": 최근 window_hours 헤드라인 감성 요약}
+        """
+        now = now or time.time()
+        if items:
+            self.ingest(items, now)
+        with self._connect() as conn:
+            unsent = conn.execute(
+                "SELECT key, title, published, sentiment FROM headlines WHERE sent = 0 AND first_seen >= ? "
+                "ORDER BY ABS(sentiment) DESC, first_seen DESC LIMIT ?",
+                (now - self.window, self.max_new)
+            ).fetchall()
+            count, mean, positive, negative = conn.execute(
+                "SELECT COUNT(*), AVG(sentiment), SUM(sentiment > 0.2), SUM(sentiment < -0.2) "
+                "FROM headlines WHERE first_seen >= ?", (now - self.window,)
+            ).fetchone()
+        return {
+            "new": [{"key": key, "title": title, "date": published, "sentiment": sentiment}
+                    for key, title, published, sentiment in unsent],
+            "sentiment": {
+                "hours": self.window // 3600,
+                "count": count,
+                "mean": round(mean, 3) if mean is not None else None,
+                "positive": positive or 0,
+                "negative": negative or 0,
+            },
+        }
+
+    def mark_sent(self, digest, count=None):
+        """digest()의 새 헤드라인 중 앞에서부터 count개(None이면 전부)를 AI에게 보여준 것으로 표시 (다음 사이클부터 제외)
+
+        프롬프트 예산 때문에 빠진 헤드라인은 다음 사이클에 다시 후보가 되도록 prompt_view(digest, n)의 n을 그대로 전달
+        """
+        keys = [item["key"] for item in (digest or {}).get("new", [])[:count]]
+        if not keys:
+            return
+        with self._connect() as conn:
+            conn.executemany("UPDATE headlines SET sent = 1 WHERE key = ?", [(key,) for key in keys])
+
+def prompt_view(digest, max_new=None):
+    """digest()를 프롬프트에 넣을 형태로 축소 (내부 key 제거, 새 헤드라인 수 제한)"""
+    if not digest:
+        return None
+    new = digest.get("new", [])[:max_new]
+    view = {"sentiment": digest.get("sentiment")}
+    if new:
+        view["new"] = [{"title": item["title"], "date": item["date"], "sentiment": item["sentiment"]} for item in new]
+    return view
@@ -0,0 +1,148 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 호가 미시구조 지표 (스프레드, 마이크로프라이스, 잔량 불균형, 금액별 체결 슬리피지)
+#
+# 모든 계산은 (스냅샷 수 N, 호가 단계 L) 배열에 대해 벡터화되어 있어
+# 스냅샷 하나(N=1)와 기록된 호가 스트림 전체를 같은 함수로 처리
+################################################################################
+
+DEFAULT_LEVELS = (1, 5, 15)  # 잔량 불균형을 계산할 호가 단계 수
+DEFAULT_DEPTH_KRW = (10_000_000, 50_000_000, 100_000_000)  # 슬리피지를 계산할 주문 금액
+
+def _units(orderbook):
+    """pyupbit.get_orderbook 결과에서 orderbook_units 추출 (dict 또는 [dict] 형식)"""
+    if isinstance(orderbook, list):
+        orderbook = orderbook[0] if orderbook else {}
+    return orderbook.get("orderbook_units", []) if isinstance(orderbook, dict) else []
+
+def orderbook_arrays(snapshots, max_levels=15):
+    """호가 스냅샷 목록 → (ask_price, ask_size, bid_price, bid_size) 배열, 각각 (N, L)
+
+    호가 단계가 max_levels보다 적은 스냅샷은 NaN으로 채움
+    """
+    arrays = np.full((4, len(snapshots), max_levels), np.nan)
+    for i, snapshot in enumerate(snapshots):
+        units = _units(snapshot)[:max_levels]
+        if units:
+            arrays[:, i, :len(units)] = np.array(
+                [(u["ask_price"], u["ask_size"], u["bid_price"], u["bid_size"]) for u in units], dtype=np.float64
+            ).T
+    return arrays[0], arrays[1], arrays[2], arrays[3]
+
+def _fill_slippage(prices, sizes, amount, mid, side):
+    """amount(KRW)만큼 시장가 주문 시 평균 체결가의 중간가 대비 슬리피지(bp), 잔량이 부족하면 NaN"""
+    notional = np.nan_to_num(prices * sizes)
+    cumulative = np.cumsum(notional, axis=1)
+    enough = cumulative[:, -1] >= amount
+    idx = np.argmax(cumulative >= amount, axis=1)  # 주문이 끝나는 호가 단계
+    rows = np.arange(len(prices))
+    before = np.where(idx > 0, cumulative[rows, idx - 1], 0.0)
+    size_before = np.where(idx > 0, np.cumsum(np.nan_to_num(sizes), axis=1)[rows, idx - 1], 0.0)
+    quantity = size_before + (amount - before) / prices[rows, idx]
+    average = amount / quantity
+    slippage = (average / mid - 1) * 1e4 if side == "buy" else (1 - average / mid) * 1e4
+    return np.where(enough, slippage, np.nan)
+
+def compute_features(ask_price, ask_size, bid_price, bid_size, levels=DEFAULT_LEVELS, depth_krw=DEFAULT_DEPTH_KRW):
+    """(N, L) 호가 배열로 스냅샷별 지표 계산
+
+    Returns:
+        dict: 지표 이름 → (N,) 배열
+            spread_bps: 최우선 매도/매수 호가 차이 (중간가 대비 bp)
+            microprice: 최우선 잔량으로 가중한 가격 (매수 잔량이 많으면 매도 호가 쪽으로 치우침)
+            microprice_bps: 마이크로프라이스의 중간가 대비 위치 (bp)
+            ask_depth_krw, bid_depth_krw: 호가창 전체 매도/매수 잔량 금액 (KRW)
+            imbalance_{k}: 상위 k단계 (매수 잔량 - 매도 잔량) / 합계 (-1 ~ 1)
+            buy_slippage_{X}, sell_slippage_{X}: X원 시장가 주문의 슬리피지 (bp)
+    """
+    best_ask = ask_price[:, 0]
+    best_bid = bid_price[:, 0]
+    mid = (best_ask + best_bid) / 2
+    top_ask_size = ask_size[:, 0]
+    top_bid_size = bid_size[:, 0]
+    microprice = (best_ask * top_bid_size + best_bid * top_ask_size) / (top_bid_size + top_ask_size)
+
+    features = {
+        "mid": mid,
+        "ask_depth_krw": np.nansum(ask_price * ask_size, axis=1),
+        "bid_depth_krw": np.nansum(bid_price * bid_size, axis=1),
+        "spread_bps": (best_ask - best_bid) / mid * 1e4,
+        "microprice": microprice,
+        "microprice_bps": (microprice - mid) / mid * 1e4,
+    }
+    cumulative_ask = np.cumsum(np.nan_to_num(ask_size), axis=1)
+    cumulative_bid = np.cumsum(np.nan_to_num(bid_size), axis=1)
+    for k in levels:
+        k = min(k, ask_price.shape[1])
+        ask_depth = cumulative_ask[:, k - 1]
+        bid_depth = cumulative_bid[:, k - 1]
+        features[f"imbalance_{k}"] = (bid_depth - ask_depth) / (bid_depth + ask_depth)
+    for amount in depth_krw:
+        label = f"{amount // 1_000_000}m"
+        features[f"buy_slippage_{label}"] = _fill_slippage(ask_price, ask_size, amount, mid, "buy")
+        features[f"sell_slippage_{label}"] = _fill_slippage(bid_price, bid_size, amount, mid, "sell")
+    return features
+
+def summarize_orderbook(orderbook, levels=DEFAULT_LEVELS, depth_krw=DEFAULT_DEPTH_KRW):
+    """호가 스냅샷 하나의 지표를 프롬프트용 dict로 변환 (원본 호가 데이터 대신 사용)"""
+    arrays = orderbook_arrays([orderbook])
+    if np.isnan(arrays[0][0, 0]):
+        return {}
+    features = compute_features(*arrays, levels=levels, depth_krw=depth_krw)
+    summary = {
+        "best_ask": float(arrays[0][0, 0]),
+        "best_bid": float(arrays[2][0, 0]),
+    }
+    for name, values in features.items():
+        value = float(values[0])
+        if np.isnan(value):
+            summary[name] = None  # 잔량 부족
+        else:
+            summary[name] = round(value, 0 if name in ("mid", "microprice", "ask_depth_krw", "bid_depth_krw") else 3)
+    return summary
+
+class OrderbookFeatureStream:
+    """연속으로 들어오는 호가 스냅샷을 모아 일정 개수마다 한 번에 지표 계산
+
+    스냅샷마다 작은 배열을 만들지 않고 미리 할당한 (batch, L) 버퍼에 채운 뒤 벡터화 계산
+    """
+
+    def __init__(self, batch_size=256, max_levels=15, levels=DEFAULT_LEVELS, depth_krw=DEFAULT_DEPTH_KRW):
+        self.batch_size = batch_size
+        self.max_levels = max_levels
+        self.levels = levels
+        self.depth_krw = depth_krw
+        self._buffer = np.full((4, batch_size, max_levels), np.nan)
+        self._timestamps = np.zeros(batch_size)
+        self._count = 0
+
+    def add(self, timestamp, orderbook):
+        """스냅샷 추가, 배치가 차면 계산한 지표 반환 (아니면 None)"""
+        units = _units(orderbook)[:self.max_levels]
+        row = self._buffer[:, self._count, :]
+        row[:] = np.nan
+        if units:
+            row[:, :len(units)] = np.array(
+                [(u["ask_price"], u["ask_size"], u["bid_price"], u["bid_size"]) for u in units], dtype=np.float64
+            ).T
+        self._timestamps[self._count] = timestamp
+        self._count += 1
+        if self._count == self.batch_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """쌓인 스냅샷의 지표 계산 (timestamp 배열 포함)"""
+        n = self._count
+        if n == 0:
+            return None
+        b = self._buffer[:, :n, :]
+        features = compute_features(b[0], b[1], b[2], b[3], levels=self.levels, depth_krw=self.depth_krw)
+        features["timestamp"] = self._timestamps[:n].copy()
+        self._count = 0
+        return features
@@ -0,0 +1,204 @@
+import logging
+import os
+import struct
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 호가 스냅샷 기록기 (고정 길이 바이너리 레코드, 추가 전용 파일 + 메모리 매핑 조회)
+#
+# 파일: {directory}/{시장}.obk
+#   헤더 64바이트: 매직(b"OBK1"), 호가 단계 수, 레코드 크기
+#   레코드: timestamp(float64, 초) + 단계별 ask_price, ask_size, bid_price, bid_size (모두 float64)
+#           → 15단계 기준 488바이트 (잔량은 소수점 8자리까지 있어 float32로는 정밀도가 부족함)
+# - 기록은 파일 끝에 이어 쓰기만 하고, 조회는 np.memmap으로 필요한 부분만 페이지 단위로 읽음
+# - timestamp가 증가하는 순서로만 기록하므로 시간 범위 조회는 이진 탐색
+################################################################################
+
+MAGIC = b"OBK1"
+HEADER_SIZE = 64
+
+def record_dtype(levels=15):
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("ask_price", "<f8", (levels,)),
+        ("ask_size", "<f8", (levels,)),
+        ("bid_price", "<f8", (levels,)),
+        ("bid_size", "<f8", (levels,)),
+    ])
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        magic, levels, record_size = struct.unpack("<4sII", f.read(12))
+    if magic != MAGIC:
+        raise ValueError(f"호가 기록 파일 형식이 아닙니다: {path}")
+    dtype = record_dtype(levels)
+    if dtype.itemsize != record_size:
+        raise ValueError(f"레코드 크기가 맞지 않습니다: {path}")
+    return levels, dtype
+
+class OrderbookRecorder:
+    """호가 스냅샷을 시장별 파일에 기록 (단일 writer)"""
+
+    def __init__(self, directory="orderbooks", levels=15, flush_interval=1.0):
+        self.directory = directory
+        self.levels = levels
+        self.dtype = record_dtype(levels)
+        self.flush_interval = flush_interval
+        self._files = {}
+        self._last_timestamp = {}
+        self._last_flush = time.monotonic()
+        self._record = np.zeros(1, dtype=self.dtype)
+        os.makedirs(directory, exist_ok=True)
+
+    def _file(self, market):
+        if market not in self._files:
+            path = os.path.join(self.directory, f"{market}.obk")
+            if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+                levels, _ = _read_header(path)
+                if levels != self.levels:
+                    raise ValueError(f"{path}의 호가 단계 수({levels})가 설정({self.levels})과 다릅니다.")
+                size = os.path.getsize(path)
+                f = open(path, "ab")
+                # 비정상 종료로 잘린 마지막 레코드 제거
+                complete = HEADER_SIZE + (size - HEADER_SIZE) // self.dtype.itemsize * self.dtype.itemsize
+                if complete != size:
+                    f.truncate(complete)
+                if complete > HEADER_SIZE:
+                    last = np.memmap(path, dtype=self.dtype, mode="r", offset=complete - self.dtype.itemsize, shape=(1,))
+                    self._last_timestamp[market] = float(last["timestamp"][0])
+                    del last
+            else:
+                f = open(path, "wb")
+                f.write(struct.pack("<4sII", MAGIC, self.levels, self.dtype.itemsize).ljust(HEADER_SIZE, b"\0"))
+            self._files[market] = f
+        return self._files[market]
+
+    def record(self, orderbook, timestamp=None):
+        """호가 스냅샷 하나 기록 (pyupbit.get_orderbook 또는 웹소켓 orderbook 메시지)
+
+        Returns:
+            bool: 기록했는지 여부 (이전 기록보다 오래된 스냅샷은 무시)
+        """
+        market = orderbook.get("market") or orderbook.get("code")
+        if timestamp is None:
+            timestamp = orderbook["timestamp"] / 1000 if orderbook.get("timestamp") else time.time()
+        f = self._file(market)  # 기존 파일이면 마지막 timestamp도 함께 읽음
+        if timestamp <= self._last_timestamp.get(market, 0):
+            return False
+
+        units = orderbook.get("orderbook_units", [])[:self.levels]
+        record = self._record[0]
+        record["timestamp"] = timestamp
+        for field in ("ask_price", "ask_size", "bid_price", "bid_size"):
+            record[field][:] = np.nan
+        if units:
+            values = np.array([(u["ask_price"], u["ask_size"], u["bid_price"], u["bid_size"]) for u in units])
+            record["ask_price"][:len(units)] = values[:, 0]
+            record["ask_size"][:len(units)] = values[:, 1]
+            record["bid_price"][:len(units)] = values[:, 2]
+            record["bid_size"][:len(units)] = values[:, 3]
+
+        f.write(self._record.tobytes())
+        self._last_timestamp[market] = timestamp
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return True
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def run(self, markets, interval=0.5, heartbeat=None):
+        """interval초마다 markets의 호가를 한 번의 요청으로 조회해 기록 (무한 반복)"""
+        import pyupbit
+        try:
+            while True:
+                started = time.monotonic()
+                if heartbeat is not None:
+                    heartbeat.value = time.time()
+                try:
+                    orderbooks = pyupbit.get_orderbook(list(markets))
+                    if isinstance(orderbooks, dict):
+                        orderbooks = [orderbooks]
+                    for orderbook in orderbooks or []:
+                        self.record(orderbook)
+                except Exception as e:
+                    logger.error(f"호가 조회 중 오류 발생: {e}")
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            self.close()
+
+class OrderbookStore:
+    """기록된 호가를 메모리 매핑으로 조회 (복사 없는 NumPy 뷰 반환)"""
+
+    def __init__(self, directory="orderbooks"):
+        self.directory = directory
+        self._maps = {}
+
+    def _map(self, market):
+        """파일을 메모리 매핑 (기록이 늘어났으면 다시 매핑)"""
+        path = os.path.join(self.directory, f"{market}.obk")
+        size = os.path.getsize(path)
+        cached = self._maps.get(market)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        _, dtype = _read_header(path)
+        count = (size - HEADER_SIZE) // dtype.itemsize
+        records = (np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+                   if count else np.zeros(0, dtype=dtype))
+        self._maps[market] = (size, records)
+        return records
+
+    def markets(self):
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".obk"))
+
+    def count(self, market):
+        return len(self._map(market))
+
+    def range(self, market, start=None, end=None):
+        """start <= timestamp < end 인 레코드의 뷰 (구조화 배열, 복사 없음)
+
+        start/end: 유닉스 시간(초) 또는 datetime
+        """
+        records = self._map(market)
+        timestamps = records["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, _to_seconds(start), side="left"))
+        hi = len(records) if end is None else int(np.searchsorted(timestamps, _to_seconds(end), side="left"))
+        return records[lo:hi]
+
+    def latest(self, market, n=1):
+        records = self._map(market)
+        return records[max(len(records) - n, 0):]
+
+    def features(self, market, start=None, end=None, **kwargs):
+        """시간 범위의 호가 미시구조 지표 (orderbook_features.compute_features, timestamp 포함)"""
+        from orderbook_features import compute_features
+        records = self.range(market, start, end)
+        features = compute_features(records["ask_price"], records["ask_size"],
+                                    records["bid_price"], records["bid_size"], **kwargs)
+        features["timestamp"] = records["timestamp"]
+        return features
+
+def _to_seconds(value):
+    return value.timestamp() if hasattr(value, "timestamp") else float(value)
+
+if __name__ == "__main__":
+    # 사용법: python orderbook_recorder.py [시장 ...] (기본 KRW-BTC)
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    markets = sys.argv[1:] or ["KRW-BTC"]
+    logger.info(f"호가 기록 시작: {', '.join(markets)}")
+    OrderbookRecorder(os.getenv("ORDERBOOK_DIR", "orderbooks")).run(
+        markets, interval=float(os.getenv("ORDERBOOK_INTERVAL_SECONDS", "0.5")))
@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 모의 거래소 (pyupbit.Upbit 대체, 실제 주문 없이 호가에 맞춰 체결)
+################################################################################
+
+FEE_RATE = 0.0005  # 업비트 KRW 마켓 수수료 0.05%
+MIN_ORDER_KRW = 5000  # 최소 주문 금액
+
+def live_orderbook(ticker):
+    """실시간 업비트 호가 (가격은 실제, 주문은 모의)"""
+    import pyupbit
+    orderbook = pyupbit.get_orderbook(ticker)
+    return orderbook[0] if isinstance(orderbook, list) else orderbook
+
+class SyntheticOrderbook:
+    """랜덤 워크 가격으로 만든 합성 호가 (soak 테스트, 벤치마크용)"""
+
+    def __init__(self, price=90_000_000, volatility=0.001, spread_bps=2.0, tick=1000, levels=15,
+                 size=0.5, seed=None):
+        self.price = price
+        self.volatility = volatility
+        self.spread_bps = spread_bps
+        self.tick = tick
+        self.levels = levels
+        self.size = size
+        self.random = random.Random(seed)
+
+    def __call__(self, ticker):
+        self.price *= 1 + self.random.gauss(0, self.volatility)
+        half = max(self.price * self.spread_bps / 2e4, self.tick)
+        best_ask = round((self.price + half) / self.tick) * self.tick
+        best_bid = best_ask - max(round(2 * half / self.tick), 1) * self.tick
+        units = []
+        for level in range(self.levels):
+            units.append({
+                "ask_price": best_ask + level * self.tick,
+                "bid_price": best_bid - level * self.tick,
+                "ask_size": self.size * self.random.uniform(0.2, 2.0),
+                "bid_size": self.size * self.random.uniform(0.2, 2.0),
+            })
+        return {"market": ticker, "timestamp": int(time.time() * 1000), "orderbook_units": units}
+
+class RecordedOrderbook:
+    """orderbook_recorder로 기록한 호가를 순서대로 재생 (끝에 도달하면 처음부터 반복)"""
+
+    def __init__(self, store, market="KRW-BTC", start=None, end=None):
+        records = store.range(market, start, end)
+        if not len(records):
+            raise ValueError(f"{market}의 기록된 호가가 없습니다.")
+        self.records = records
+        self.market = market
+        self.position = 0
+
+    def __call__(self, ticker):
+        record = self.records[self.position]
+        self.position = (self.position + 1) % len(self.records)
+        units = [
+            {"ask_price": float(ap), "ask_size": float(asz), "bid_price": float(bp), "bid_size": float(bsz)}
+            for ap, asz, bp, bsz in zip(record["ask_price"], record["ask_size"],
+                                        record["bid_price"], record["bid_size"])
+            if ap == ap  # NaN(비어 있는 단계) 제외
+        ]
+        return {"market": ticker, "timestamp": int(record["timestamp"] * 1000), "orderbook_units": units}
+
+def _error(name, message):
+    """업비트 API 오류 응답 형식"""
+    return {"error": {"name": name, "message": message}}
+
+class PaperUpbit:
+    """pyupbit.Upbit의 잔고/시장가 주문 API를 흉내 내는 모의 거래소
+
+    - 시장가 주문은 orderbook_source(ticker)가 주는 호가를 단계별로 소진하며 체결
+    - 수수료 0.05%, 최소 주문 금액 5000원 적용, 잔고 부족/최소 금액 미달은 업비트 오류 형식으로 반환
+    - state_path를 지정하면 잔고를 파일에 저장해 재시작 후에도 이어서 모의 거래
+    - 잔고 조회/주문 때마다 파일이 바뀌었으면 다시 읽음 (파이프라인에서 다른 프로세스가 체결한 잔고 반영)
+    """
+
+    def __init__(self, krw=1_000_000, orderbook_source=live_orderbook, state_path=None, fee_rate=FEE_RATE,
+                 keep_orders=1000):
+        self.orderbook_source = orderbook_source
+        self.state_path = state_path
+        self.fee_rate = fee_rate
+        self.keep_orders = keep_orders
+        self.balances = {"KRW": {"balance": float(krw), "avg_buy_price": 0.0}}
+        self.orders = {}
+        self._state_version = None
+        if self._reload():
+            logger.info(f"모의 거래 잔고 불러옴: {state_path}")
+
+    def _reload(self):
+        """상태 파일이 마지막으로 읽거나 쓴 뒤 바뀌었으면 잔고를 다시 읽음
+
+        Returns:
+            bool: 다시 읽었는지 여부
+        """
+        if not self.state_path:
+            return False
+        version = _file_version(self.state_path)
+        if version is None or version == self._state_version:
+            return False
+        with open(self.state_path, encoding="utf-8") as f:
+            self.balances = json.load(f)["balances"]
+        self._state_version = version
+        return True
+
+    # 잔고 ------------------------------------------------------------------------
+
+    def get_balances(self):
+        self._reload()
+        return [
+            {"currency": currency, "balance": str(b["balance"]), "locked": "0.0",
+             "avg_buy_price": str(b["avg_buy_price"]), "avg_buy_price_modified": False, "unit_currency": "KRW"}
+            for currency, b in self.balances.items()
+        ]
+
+    def get_balance(self, ticker="KRW"):
+        """ticker: "KRW" 또는 "KRW-BTC"/"BTC" 형식"""
+        self._reload()
+        currency = ticker.split("-")[-1] if "-" in ticker else ticker
+        return self.balances.get(currency, {"balance": 0.0})["balance"]
+
+    def get_avg_buy_price(self, ticker="KRW-BTC"):
+        self._reload()
+        currency = ticker.split("-")[-1]
+        return self.balances.get(currency, {"avg_buy_price": 0.0})["avg_buy_price"]
+
+    def current_price(self, ticker="KRW-BTC"):
+        """현재 호가의 중간가"""
+        units = self.orderbook_source(ticker)["orderbook_units"]
+        return (units[0]["ask_price"] + units[0]["bid_price"]) / 2
+
+    # 주문 ------------------------------------------------------------------------
+
+    def buy_market_order(self, ticker, price):
+        """price(KRW)만큼 시장가 매수 (수수료는 별도로 KRW에서 차감)"""
+        if price < MIN_ORDER_KRW:
+            return _error("under_min_total_bid", "최소주문금액 이상으로 주문해주세요")
+        self._reload()
+        fee = price * self.fee_rate
+        krw = self.balances["KRW"]
+        if krw["balance"] + 1e-6 < price + fee:
+            return _error("insufficient_funds_bid", "주문가능한 금액(KRW)이 부족합니다.")
+
+        remaining = price
+        volume = 0.0
+        trades = []
+        for unit in self.orderbook_source(ticker)["orderbook_units"]:
+            cost = min(remaining, unit["ask_price"] * unit["ask_size"])
+            filled = cost / unit["ask_price"]
+            volume += filled
+            remaining -= cost
+            trades.append((unit["ask_price"], filled))
+            if remaining <= 1e-9:
+                break
+        spent = price - remaining
+        if spent < MIN_ORDER_KRW:
+            return _error("insufficient_liquidity", "호가 잔량이 부족합니다.")
+        fee = spent * self.fee_rate
+
+        currency = ticker.split("-")[1]
+        position = self.balances.setdefault(currency, {"balance": 0.0, "avg_buy_price": 0.0})
+        total = position["balance"] + volume
+        position["avg_buy_price"] = (position["balance"] * position["avg_buy_price"] + spent) / total
+        position["balance"] = total
+        krw["balance"] -= spent + fee
+        return self._fill(ticker, "bid", "price", trades, volume, fee, price=price)
+
+    def sell_market_order(self, ticker, volume):
+        """volume(코인 수량)만큼 시장가 매도 (수수료는 받은 KRW에서 차감)"""
+        self._reload()
+        currency = ticker.split("-")[1]
+        position = self.balances.get(currency)
+        if position is None or position["balance"] + 1e-12 < volume:
+            return _error("insufficient_funds_ask", f"주문가능한 금액({currency})이 부족합니다.")
+        units = self.orderbook_source(ticker)["orderbook_units"]
+        if volume * units[0]["bid_price"] < MIN_ORDER_KRW:
+            return _error("under_min_total_ask", "최소주문금액 이상으로 주문해주세요")
+
+        remaining = volume
+        proceeds = 0.0
+        trades = []
+        for unit in units:
+            filled = min(remaining, unit["bid_size"])
+            proceeds += filled * unit["bid_price"]
+            remaining -= filled
+            trades.append((unit["bid_price"], filled))
+            if remaining <= 1e-12:
+                break
+        executed = volume - remaining
+        fee = proceeds * self.fee_rate
+
+        position["balance"] -= executed
+        if position["balance"] <= 1e-12:
+            position["balance"] = 0.0
+            position["avg_buy_price"] = 0.0
+        self.balances["KRW"]["balance"] += proceeds - fee
+        return self._fill(ticker, "ask", "market", trades, executed, fee, requested_volume=volume)
+
+    def _fill(self, ticker, side, ord_type, trades, volume, fee, price=None, requested_volume=None):
+        """체결된 주문 기록 후 업비트 주문 접수 응답 형식으로 반환"""
+        order_id = str(uuid.uuid4())
+        created_at = datetime.now().astimezone().isoformat(timespec="seconds")
+        order = {
+            "uuid": order_id,
+            "side": side,
+            "ord_type": ord_type,
+            "price": None if price is None else str(price),
+            "state": "done",
+            "market": ticker,
+            "created_at": created_at,
+            "volume": None if requested_volume is None else str(requested_volume),
+            "remaining_volume": "0.0",
+            "reserved_fee": str(fee),
+            "remaining_fee": "0.0",
+            "paid_fee": str(fee),
+            "locked": "0.0",
+            "executed_volume": str(volume),
+            "trades_count": len(trades),
+            "trades": [
+                {"market": ticker, "price": str(p), "volume": str(v), "funds": str(p * v), "side": side,
+                 "created_at": created_at}
+                for p, v in trades
+            ],
+        }
+        self.orders[order_id] = order
+        if len(self.orders) > self.keep_orders:
+            self.orders.pop(next(iter(self.orders)))
+        self._save()
+        # 주문 직후 응답에는 체결 내역 없이 접수 정보만 포함 (업비트와 동일)
+        return {k: v for k, v in order.items() if k != "trades"} | {"state": "wait"}
+
+    def get_order(self, ticker_or_uuid, state="wait", **kwargs):
+        """uuid로 주문 조회 (체결 내역 포함)"""
+        order = self.orders.get(ticker_or_uuid)
+        if order is None:
+            return _error("order_not_found", "주문을 찾지 못했습니다.")
+        return order
+
+    def _save(self):
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"balances": self.balances, "updated_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, self.state_path)
+        self._state_version = _file_version(self.state_path)
+
+def _file_version(path):
+    """파일 변경 확인용 (inode, 크기, 수정 시각), 파일이 없으면 None
+
+    저장할 때마다 os.replace로 새 파일이 되므로 inode만으로도 대부분 구분됨
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,427 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 수집 / 판단 / 주문 실행을 별도 프로세스로 분리한 트레이딩 파이프라인
+#
+#   collector ──(시장 데이터)──▶ decider ──(거래 결정)──▶ executor
+#       └──────▶ 공유 메모리 시세 버퍼 (실시간 가격, 캔들) ◀── 읽기 ──┘
+#
+# - collector: 실시간 가격과 캔들을 공유 메모리 버퍼에 기록하고, 정해진 슬롯마다 시장 데이터를 decider로 전달
+# - decider: 차트 캡처, 반성, AI 결정 (느린 작업, Chrome이 멈춰도 다른 프로세스에 영향 없음)
+# - executor: 주문 실행과 기록, 결정을 기다리는 동안에도 손절 조건을 계속 확인
+# - supervisor(메인 프로세스): 각 프로세스의 생존 여부와 heartbeat를 확인해 재시작
+################################################################################
+
+def _setup_worker(name):
+    """워커 프로세스 공통 초기화 (재시작 시 terminate()의 SIGTERM도 finally 블록을 거쳐 종료)"""
+    from write_behind import install_signal_handlers
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [{name}] %(levelname)s %(message)s")
+    install_signal_handlers()
+
+def _resource_monitor(name):
+    """RESOURCE_MONITOR=true이면 워커별 자원 모니터 (보고서: resource_report_<워커>.json)"""
+    if os.getenv("RESOURCE_MONITOR", "false").lower() != "true":
+        return None
+    from resource_monitor import ResourceMonitor
+    base, ext = os.path.splitext(os.getenv("RESOURCE_REPORT_PATH", "resource_report.json"))
+    return ResourceMonitor(f"{base}_{name}{ext}")
+
+def _monitored(monitor, fn):
+    """모니터가 있으면 fn 호출마다 자원 사용량 기록 (워커의 사이클 단위)"""
+    return fn if monitor is None else monitor.wrap(fn)
+
+def _attach_market_buffer(bot, buffer_prefix):
+    """supervisor가 만든 공유 메모리 시세 버퍼에 연결하고 봇 모듈에 설정"""
+    from market_buffer import MarketDataBuffer
+    buffer = MarketDataBuffer(buffer_prefix)
+    bot.market_data_buffer = buffer
+    return buffer
+
+def collector_worker(heartbeat, market_queue, buffer_prefix, slots, lead_time, tick_interval, candle_interval,
+                     volatility_detector=None):
+    """시장 데이터 수집 프로세스 (시세 버퍼의 유일한 writer, 시장 급변 감지)"""
+    _setup_worker("collector")
+    import pyupbit
+    import main as bot
+    from scheduler import TradingScheduler
+    from volatility_detector import watch_volatility
+    buffer = _attach_market_buffer(bot, buffer_prefix)
+
+    def collect(slot):
+        market_data = bot.collect_market_data()
+        market_data["slot"] = slot
+        market_data["collected_at"] = time.time()
+        market_queue.put(market_data)
+        logger.info(f"{slot:%H:%M} 슬롯 시장 데이터 전달 완료")
+
+    send_market_data = _monitored(_resource_monitor("collector"), collect)
+
+    # 슬롯 시각 계산만 사용 (준비/실행은 decider, executor가 담당)
+    scheduler = TradingScheduler(prepare=None, execute=None, slots=slots, lead_time=lead_time)
+
+    async def slot_loop():
+        # 슬롯 시각보다 lead_time 먼저 수집해서 decider가 사전 준비할 수 있도록 전달
+        while True:
+            slot = await scheduler.wait_for_next_slot()
+            try:
+                await asyncio.to_thread(send_market_data, slot)
+            except Exception as e:
+                logger.error(f"시장 데이터 수집 중 오류 발생: {e}")
+
+    async def tick_loop():
+        # executor의 손절 판단용 실시간 가격
+        while True:
+            heartbeat.value = time.time()
+            try:
+                price = await asyncio.to_thread(pyupbit.get_current_price, "KRW-BTC")
+                if price:
+                    buffer.write_tick("KRW-BTC", time.time(), float(price))
+            except Exception as e:
+                logger.error(f"실시간 가격 조회 중 오류 발생: {e}")
+            await asyncio.sleep(tick_interval)
+
+    async def candle_loop():
+        # 처음에는 버퍼 용량만큼(최대 200개) 채우고, 이후에는 마지막으로 저장한 캔들부터 새 캔들까지 갱신
+        intervals = [interval for interval in buffer.series if interval != "tick"]
+        while True:
+            for interval in intervals:
+                try:
+                    count = buffer.candles_to_fetch("KRW-BTC", interval)
+                    df = await asyncio.to_thread(pyupbit.get_ohlcv, "KRW-BTC", interval=interval, count=count)
+                    buffer.write_candles("KRW-BTC", interval, df)
+                except Exception as e:
+                    logger.error(f"{interval} 캔들 조회 중 오류 발생: {e}")
+                await asyncio.sleep(0.2)  # API 호출 제한 고려
+            await asyncio.sleep(candle_interval)
+
+    tasks = set()
+
+    def trigger_cycle(reason):
+        # 시장 급변 시 슬롯 외 사이클: 지금 시각을 슬롯으로 보내면 decider가 준비되는 대로 바로 결정
+        task = asyncio.create_task(asyncio.to_thread(send_market_data, datetime.now()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return True  # decider가 큐의 순서대로 처리하므로 버려지지 않음
+
+    async def run():
+        loops = [slot_loop(), tick_loop(), candle_loop()]
+        if volatility_detector is not None:
+            loops.append(watch_volatility(volatility_detector,
+                                          lambda: buffer.get_ohlcv("KRW-BTC", "minute1", 60),
+                                          trigger_cycle, interval=candle_interval))
+        await asyncio.gather(*loops)
+
+    asyncio.run(run())
+
+def decider_worker(heartbeat, market_queue, order_queue, buffer_prefix):
+    """차트 캡처, 반성, AI 결정 프로세스"""
+    _setup_worker("decider")
+    import main as bot
+    _attach_market_buffer(bot, buffer_prefix)
+
+    def decide(market_data):
+        slot = market_data.pop("slot")
+        started = market_data.pop("collected_at")
+        try:
+            context = bot.build_trading_context(market_data, started)
+            heartbeat.value = time.time()
+
+            if context.get("gate_reason"):
+                order_queue.put({"type": "gate", "reason": context["gate_reason"],
+                                 "reflection": context["reflection"]})
+                bot.record_gate_skip(context["prepare_seconds"], context["prepare_seconds"])
+                return
+
+            # 슬롯 시각까지 기다린 뒤 최종 결정 요청
+            wait = (slot - datetime.now()).total_seconds()
+            if wait > 0:
+                time.sleep(wait)
+            heartbeat.value = time.time()
+            decision_started = time.time()
+            result = bot.request_trading_decision(context)
+            decision_seconds = time.time() - decision_started
+            order_queue.put({"type": "decision", "decision": result.model_dump(),
+                             "reflection": context["reflection"],
+                             "cycle_seconds": context["prepare_seconds"] + decision_seconds})
+            # 주문 실행 시간과 전체 사이클 시간은 executor가 기록
+            bot.record_cycle_metrics(context["prepare_seconds"], decision_seconds)
+        except Exception as e:
+            logger.error(f"거래 결정 중 오류 발생: {e}")
+
+    # 사이클마다 차트 캡처(크롬), 캔들 DataFrame, AI 호출까지 포함해 자원 사용량 기록
+    decide = _monitored(_resource_monitor("decider"), decide)
+    try:
+        while True:
+            heartbeat.value = time.time()
+            try:
+                market_data = market_queue.get(timeout=5)
+            except queue.Empty:
+                continue
+            decide(market_data)
+    finally:
+        bot.write_behind.close()  # 저장 대기 중인 거래 기록/스냅샷 저장
+
+def executor_worker(heartbeat, order_queue, buffer_prefix, stop_loss_pct, max_price_age, balance_refresh=300):
+    """주문 실행 프로세스 (거래 결정 실행 + 손절 감시)"""
+    _setup_worker("executor")
+    import main as bot
+    buffer = _attach_market_buffer(bot, buffer_prefix)
+    stop_loss = StopLossMonitor(bot, stop_loss_pct, balance_refresh)
+
+    def execute(order):
+        try:
+            if order["type"] == "gate":
+                bot.record_hold(order["reason"], order["reflection"])
+            else:
+                result = bot.TradingDecision(**order["decision"])
+                started = time.time()
+                bot.execute_decision(result, order["reflection"])
+                execute_seconds = time.time() - started
+                bot.log_metrics({"execute_seconds": execute_seconds,
+                                 "cycle_seconds": order["cycle_seconds"] + execute_seconds})
+        except Exception as e:
+            logger.error(f"주문 실행 중 오류 발생: {e}")
+        finally:
+            stop_loss.invalidate()  # 체결로 잔고가 바뀌었을 수 있으므로 다음 확인 때 다시 조회
+
+    execute = _monitored(_resource_monitor("executor"), execute)
+    try:
+        last_stop_loss = 0
+        while True:
+            heartbeat.value = time.time()
+
+            # 1. 손절 확인 (버퍼의 가장 최근 가격, 오래된 가격은 사용하지 않음)
+            price = buffer.latest_price("KRW-BTC", max_age=max_price_age)
+            if price and stop_loss_pct > 0 and time.time() - last_stop_loss > 60:
+                try:
+                    if stop_loss.check(price):
+                        last_stop_loss = time.time()
+                except Exception as e:
+                    logger.error(f"손절 확인 중 오류 발생: {e}")
+
+            # 2. 거래 결정 실행
+            try:
+                order = order_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            execute(order)
+    finally:
+        bot.write_behind.close()  # 저장 대기 중인 거래 기록/스냅샷 저장
+
+def recorder_worker(heartbeat, directory, markets, interval):
+    """호가 스냅샷 기록 프로세스 (백테스트용)"""
+    _setup_worker("recorder")
+    from orderbook_recorder import OrderbookRecorder
+    OrderbookRecorder(directory).run(markets, interval=interval, heartbeat=heartbeat)
+
+class StopLossMonitor:
+    """계좌별 BTC 잔고와 평균 매수가를 캐시해 두고 틱마다 현재가와 비교하는 손절 감시
+
+    잔고 조회(private API)는 매 틱이 아니라 refresh_interval초마다, 그리고 주문/손절 체결 뒤에만 실행해
+    주문에 필요한 API 호출 한도를 아낌. 손절 조건에 도달한 계좌만 잔고를 다시 확인한 뒤 매도
+    """
+
+    def __init__(self, bot, stop_loss_pct, refresh_interval=300):
+        self.bot = bot
+        self.stop_loss_pct = stop_loss_pct
+        self.refresh_interval = refresh_interval
+        self.positions = {}  # 계좌 이름 → (BTC 잔고, 평균 매수가)
+        self.refreshed_at = 0.0
+
+    def invalidate(self):
+        """다음 확인 때 잔고를 다시 조회 (주문 체결 후 호출)"""
+        self.refreshed_at = 0.0
+
+    def refresh(self):
+        """모든 계좌의 BTC 잔고와 평균 매수가 조회 (계좌별 동시 실행, 실패한 계좌는 이전 값 유지)"""
+        results = self.bot.get_accounts().fan_out(_btc_position)
+        for name, position in results.items():
+            if not isinstance(position, Exception):
+                self.positions[name] = position
+        self.refreshed_at = time.time()
+
+    def triggered(self, price):
+        """캐시한 평균 매수가 기준으로 손절 조건에 도달한 계좌 목록"""
+        return [account for account in self.bot.get_accounts()
+                if _should_stop(self.positions.get(account.name), price, self.stop_loss_pct)]
+
+    def check(self, price):
+        """현재가로 손절 조건을 확인하고 도달한 계좌는 보유 BTC 전량 매도
+
+        Returns:
+            bool: 손절 주문을 실행한 계좌가 있는지 여부
+        """
+        if time.time() - self.refreshed_at > self.refresh_interval:
+            self.refresh()
+        accounts = self.triggered(price)
+        if not accounts:
+            return False
+        from accounts import AccountRegistry
+        results = AccountRegistry(accounts).fan_out(
+            lambda account: check_account_stop_loss(self.bot, account, price, self.stop_loss_pct))
+        self.invalidate()
+        return any(result is True for result in results.values())
+
+def _btc_position(account):
+    """계좌의 (BTC 잔고, 평균 매수가), BTC가 없으면 (0, 0)"""
+    btc = next((b for b in account.client.get_balances() if b['currency'] == 'BTC'), None)
+    if btc is None:
+        return 0.0, 0.0
+    return float(btc['balance']), float(btc['avg_buy_price'])
+
+def _should_stop(position, price, stop_loss_pct):
+    """현재가가 평균 매수가 대비 stop_loss_pct% 이상 하락했는지 (5000원 이하 잔량은 제외)"""
+    if position is None:
+        return False
+    btc_balance, avg_buy_price = position
+    if not avg_buy_price or btc_balance * price <= 5000:
+        return False
+    return price <= avg_buy_price * (1 - stop_loss_pct / 100)
+
+def check_account_stop_loss(bot, account, price, stop_loss_pct):
+    """계좌 하나의 손절 확인 (최신 잔고로 다시 확인) 및 전량 매도"""
+    upbit = account.client
+    btc_balance, avg_buy_price = _btc_position(account)
+    if not _should_stop((btc_balance, avg_buy_price), price, stop_loss_pct):
+        return False
+
+    logger.warning(f"[{account.name}] 손절 조건 도달: 현재가 {price:,.0f} / 평균 매수가 {avg_buy_price:,.0f}")
+    order = upbit.sell_market_order("KRW-BTC", btc_balance)
+    if not bot.is_order_accepted(order):
+        logger.error(f"[{account.name}] 손절 매도 주문 실패: {order}")
+        return False
+    time.sleep(2)  # API 호출 제한 고려
+    bot.log_current_balances("sell", 100, f"[손절] 평균 매수가 대비 {stop_loss_pct}% 이상 하락", "", account)
+    return True
+
+class Supervisor:
+    """워커 프로세스를 시작하고, 종료되었거나 heartbeat가 끊긴 프로세스를 재시작"""
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self.workers = {}
+
+    def add(self, name, target, args, timeout):
+        """워커 등록 (timeout: heartbeat가 이 시간(초) 이상 갱신되지 않으면 멈춘 것으로 판단)"""
+        self.workers[name] = {
+            "target": target,
+            "args": args,
+            "timeout": timeout,
+            "heartbeat": mp.Value('d', 0.0),
+            "process": None,
+            "restarts": 0,
+            "next_start": 0,
+        }
+
+    def _start(self, name):
+        worker = self.workers[name]
+        worker["heartbeat"].value = time.time()
+        process = mp.Process(target=worker["target"], args=(worker["heartbeat"],) + worker["args"],
+                             name=name, daemon=True)
+        process.start()
+        worker["process"] = process
+        logger.info(f"{name} 프로세스 시작 (pid={process.pid})")
+
+    def _restart(self, name, reason):
+        worker = self.workers[name]
+        process = worker["process"]
+        logger.warning(f"{name} 프로세스 재시작: {reason}")
+        if process.is_alive():
+            process.terminate()
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+        # 연속으로 죽는 경우를 대비해 재시작 간격을 점점 늘림 (최대 60초)
+        worker["restarts"] += 1
+        worker["next_start"] = time.time() + min(2 ** worker["restarts"], 60)
+        worker["process"] = None
+
+    def run(self):
+        for name in self.workers:
+            self._start(name)
+        try:
+            while True:
+                time.sleep(self.check_interval)
+                now = time.time()
+                for name, worker in self.workers.items():
+                    process = worker["process"]
+                    if process is None:
+                        if now >= worker["next_start"]:
+                            self._start(name)
+                        continue
+                    if not process.is_alive():
+                        self._restart(name, f"종료됨 (exit code {process.exitcode})")
+                    elif now - worker["heartbeat"].value > worker["timeout"]:
+                        self._restart(name, f"{worker['timeout']}초 이상 응답 없음")
+                    elif now - worker["heartbeat"].value < self.check_interval * 2:
+                        worker["restarts"] = 0
+        finally:
+            for worker in self.workers.values():
+                if worker["process"] is not None and worker["process"].is_alive():
+                    worker["process"].terminate()
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [supervisor] %(levelname)s %(message)s")
+
+    import main as bot
+    from market_buffer import MarketDataBuffer
+    bot.get_accounts()  # 계좌별 API 키 확인
+    bot.init_db()
+
+    market_queue = mp.Queue()
+    order_queue = mp.Queue()
+
+    # 공유 메모리 시세 버퍼는 supervisor가 소유 (워커가 재시작되어도 데이터 유지)
+    buffer_prefix = f"btcbot{os.getpid()}"
+    market_buffer = MarketDataBuffer(buffer_prefix, create=True)
+
+    slots = os.getenv("TRADING_SLOTS", "09:00,15:00,21:00").split(",")
+    lead_time = int(os.getenv("PREWARM_LEAD_SECONDS", "180"))
+    tick_interval = float(os.getenv("TICK_INTERVAL_SECONDS", "5"))
+
+    volatility_detector = None
+    if os.getenv("VOLATILITY_TRIGGER", "true").lower() == "true":
+        from volatility_detector import VolatilityDetector
+        volatility_detector = VolatilityDetector(
+            return_z=float(os.getenv("VOLATILITY_RETURN_Z", "4")),
+            volume_z=float(os.getenv("VOLATILITY_VOLUME_Z", "4")),
+            cooldown=int(os.getenv("VOLATILITY_COOLDOWN_SECONDS", "3600")),
+            daily_cap=int(os.getenv("VOLATILITY_DAILY_CAP", "3"))
+        )
+
+    supervisor = Supervisor()
+    supervisor.add("collector", collector_worker,
+                   (market_queue, buffer_prefix, slots, lead_time, tick_interval,
+                    float(os.getenv("CANDLE_INTERVAL_SECONDS", "60")), volatility_detector),
+                   timeout=120)
+    supervisor.add("decider", decider_worker, (market_queue, order_queue, buffer_prefix),
+                   timeout=int(os.getenv("DECIDER_TIMEOUT_SECONDS", "600")))
+    supervisor.add("executor", executor_worker,
+                   (order_queue, buffer_prefix, float(os.getenv("STOP_LOSS_PCT", "0")), tick_interval * 3,
+                    float(os.getenv("STOP_LOSS_BALANCE_REFRESH_SECONDS", "300"))),
+                   timeout=60)
+    record_markets = [m.strip() for m in os.getenv("ORDERBOOK_RECORD_MARKETS", "").split(",") if m.strip()]
+    if record_markets:
+        supervisor.add("recorder", recorder_worker,
+                       (os.getenv("ORDERBOOK_DIR", "orderbooks"), record_markets,
+                        float(os.getenv("ORDERBOOK_INTERVAL_SECONDS", "0.5"))),
+                       timeout=60)
+    try:
+        supervisor.run()
+    finally:
+        market_buffer.close()
+
+if __name__ == "__main__":
+    main()
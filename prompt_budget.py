@@ -0,0 +1,196 @@
+import json
+import logging
+import re
+
+from news_pipeline import prompt_view
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 거래 결정 프롬프트 생성 (섹션별 토큰 계산 + 입력 토큰 예산)
+################################################################################
+
+SYSTEM_TEMPLATE = """비트코인 전문 트레이더로서 현재 상황을 분석하고 매수/매도/홀딩 결정을 내려주세요.
+다음 요소들을 고려해 주세요:
+
+- 기술적 지표와 시장 데이터
+- 최근 뉴스의 영향
+- 공포탐욕지수
+- 전반적인 시장 심리
+- 차트 패턴과 추세
+- 최근 거래 성과와 반성
+
+최근 거래 분석:
+{reflection}
+
+원연토의 투자 방법을 참고하여 현재 상황을 판단해주세요:
+
+{strategy_text}
+
+응답 형식:
+1. 결정 (매수/매도/홀딩)
+2. 매수/매도시 비율(1-100%), 홀딩시 0%
+3. 결정 이유
+
+매수/매도 결정시 확신의 정도를 비율에 반영해주세요."""
+
+USER_TEMPLATE = """현재 투자 상태: {balances}
+호가 지표: {orderbook}
+일봉 데이터: {df_daily}
+시간봉 데이터: {df_hourly}
+차트 지표: {chart_features}
+뉴스 헤드라인: {news_headlines}
+공포탐욕지수: {fear_greed_index}"""
+
+class PromptSection:
+    """프롬프트 섹션 하나
+
+    levels: 상세 → 간략 순서의 단계별 렌더링 함수 목록 (첫 번째가 원본)
+    priority: 낮을수록 예산 초과 시 먼저 줄임
+    params: levels와 같은 순서의 단계별 설정값 (선택, param()으로 현재 단계의 값 조회)
+    """
+
+    def __init__(self, name, priority, levels, params=None):
+        self.name = name
+        self.priority = priority
+        self.levels = levels
+        self.params = params
+        self.level = 0
+        self._texts = {}
+        self._tokens = {}
+
+    def text(self):
+        if self.level not in self._texts:
+            self._texts[self.level] = self.levels[self.level]()
+        return self._texts[self.level]
+
+    def tokens(self):
+        if self.level not in self._tokens:
+            self._tokens[self.level] = count_tokens(self.text())
+        return self._tokens[self.level]
+
+    def param(self):
+        return self.params[self.level] if self.params else None
+
+    def can_trim(self):
+        return self.level + 1 < len(self.levels)
+
+    def trim(self):
+        self.level += 1
+
+def fit_to_budget(sections, budget, fixed_tokens=0):
+    """입력 토큰 합계가 budget 이하가 될 때까지 우선순위가 낮은 섹션부터 한 단계씩 줄임
+
+    Returns:
+        int: 최종 입력 토큰 수 (모든 섹션을 최대한 줄여도 예산을 넘으면 그대로 반환)
+    """
+    total = fixed_tokens + sum(section.tokens() for section in sections)
+    while total > budget:
+        candidates = [section for section in sections if section.can_trim()]
+        if not candidates:
+            logger.warning(f"프롬프트 토큰 {total:,}개가 예산 {budget:,}개를 넘지만 더 줄일 섹션이 없습니다.")
+            break
+        section = min(candidates, key=lambda s: s.priority)
+        before = section.tokens()
+        section.trim()
+        total += section.tokens() - before
+    return total
+
+def truncate_to_tokens(text, max_tokens):
+    """문장 단위로 앞에서부터 max_tokens 안에 들어가는 만큼만 남기기 (간단한 추출 요약)"""
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+    sentences = re.split(r"(?<=[.!?다])\s+|\n+", text)
+    kept = []
+    used = 0
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept) + " (요약됨)"
+
+# 예산이 부족할 때 남길 핵심 호가 지표
+COMPACT_ORDERBOOK_FEATURES = ("mid", "spread_bps", "microprice_bps", "imbalance_5", "buy_slippage_10m",
+                              "sell_slippage_10m")
+
+def build_decision_sections(context, daily_windows=(20, 14, 7),
+                            hourly_windows=(12, 6), news_counts=(5, 3), reflection_tokens=(300, 120)):
+    """거래 결정 프롬프트의 섹션 목록 생성 (우선순위가 낮은 섹션일수록 먼저 줄임)
+
+    각 섹션의 첫 단계는 원본 그대로이고, 예산을 넘으면 다음 순서로 한 단계씩 줄임:
+    새 뉴스 수(마지막 단계는 감성 요약만) → 일봉 기간 → 호가 지표 수 → 시간봉 기간 → 반성 요약 → 전략 요약 → 차트 지표
+
+    호가는 원본 대신 미시구조 지표(스프레드, 마이크로프라이스, 잔량 불균형, 슬리피지)로 전달
+    """
+    from chart_features import compact_chart_features
+    from orderbook_features import summarize_orderbook
+    df_daily = context["df_daily"]
+    df_hourly = context["df_hourly"]
+    news = context["news_headlines"]  # news_pipeline.NewsPipeline.digest() 결과
+    new_count = len(news["new"]) if news else 0
+    reflection = context["reflection"] or ""
+    strategy_text = context["strategy_text"] or ""
+    orderbook = summarize_orderbook(context["orderbook"])
+    chart_features = context["chart_features"]
+
+    news_levels = (None,) + tuple(n for n in news_counts if n < new_count) + ((0,) if new_count else ())
+
+    def fixed(value):
+        return [lambda: value]
+
+    return [
+        PromptSection("news_headlines", 0,
+                      [lambda n=n: json.dumps(prompt_view(news, n), ensure_ascii=False) for n in news_levels],
+                      params=[new_count if n is None else n for n in news_levels]),
+        PromptSection("df_daily", 1,
+                      [lambda: df_daily.to_json()] + [lambda n=n: df_daily.tail(n).to_json() for n in daily_windows
+                                                      if n < len(df_daily)]),
+        PromptSection("orderbook", 2,
+                      [lambda: json.dumps(orderbook),
+                       lambda: json.dumps({k: v for k, v in orderbook.items() if k in COMPACT_ORDERBOOK_FEATURES})]),
+        PromptSection("df_hourly", 3,
+                      [lambda: df_hourly.to_json()] + [lambda n=n: df_hourly.tail(n).to_json() for n in hourly_windows
+                                                       if n < len(df_hourly)]),
+        PromptSection("reflection", 4,
+                      [lambda: reflection] + [lambda n=n: truncate_to_tokens(reflection, n) for n in reflection_tokens]),
+        PromptSection("strategy_text", 5,
+                      [lambda: strategy_text, lambda: truncate_to_tokens(strategy_text, 200)]),
+        PromptSection("chart_features", 6,
+                      [lambda: json.dumps(chart_features), lambda: json.dumps(compact_chart_features(chart_features))]),
+        PromptSection("balances", 9, fixed(json.dumps(context["filtered_balances"]))),
+        PromptSection("fear_greed_index", 9, fixed(json.dumps(context["fear_greed_index"]))),
+    ]
+
+def build_decision_prompt(context, budget=12000):
+    """입력 토큰 예산 안에서 거래 결정 프롬프트 생성
+
+    Returns:
+        tuple: (system 메시지, user 텍스트, 섹션별 토큰 수 dict)
+            dict에는 프롬프트에 넣은 새 헤드라인 수("news_shown")도 포함 (mark_sent에 전달)
+    """
+    sections = build_decision_sections(context)
+    empty = {section.name: "" for section in sections}
+    template_tokens = count_tokens(SYSTEM_TEMPLATE.format(**empty)) + count_tokens(USER_TEMPLATE.format(**empty))
+    total = fit_to_budget(sections, budget, template_tokens)
+
+    texts = {section.name: section.text() for section in sections}
+    breakdown = {section.name: section.tokens() for section in sections}
+    breakdown["template"] = template_tokens
+
+    trimmed = [f"{section.name}(단계 {section.level})" for section in sections if section.level]
+    summary = ", ".join(f"{name} {tokens:,}" for name, tokens in sorted(breakdown.items(), key=lambda x: -x[1]))
+    logger.info(f"프롬프트 토큰 {total:,} / 예산 {budget:,}: {summary}")
+    if trimmed:
+        logger.info(f"예산에 맞춰 줄인 섹션: {', '.join(trimmed)}")
+    breakdown["news_shown"] = next(section.param() for section in sections if section.name == "news_headlines")
+
+    system_content = SYSTEM_TEMPLATE.format(reflection=texts["reflection"], strategy_text=texts["strategy_text"])
+    user_text = USER_TEMPLATE.format(**{name: text for name, text in texts.items()
+                                        if name not in ("reflection", "strategy_text")})
+    return system_content, user_text, breakdown
@@ -0,0 +1,303 @@
+import functools
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 장기 실행 프로세스의 사이클별 메모리/자원 기록 (RESOURCE_MONITOR=true일 때만 사용)
+#
+# 사이클마다 RSS, tracemalloc 할당량과 증가 상위 위치, 열린 파일 디스크립터(종류별),
+# 자식 프로세스(크롬 등)를 기록하고, 여러 사이클에 걸친 증가 추세를 찾아 작은 JSON 보고서로 저장
+# - 자원 정보는 psutil이 있으면 psutil, 없으면 /proc(리눅스)에서 읽음
+################################################################################
+
+# 추세 판단 기준: 사이클당 평균 증가량이 이 값 이상이고, 대부분의 사이클에서 줄지 않으면 누수 의심
+GROWTH_THRESHOLDS = {
+    "rss_mb": 1.0,
+    "traced_mb": 0.5,
+    "fds": 0.5,
+    "sqlite_fds": 0.2,
+    "sockets": 0.5,
+    "children": 0.5,
+    "chrome_processes": 0.5,
+}
+
+def _page_size():
+    try:
+        return os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 4096
+
+def _proc_children(pid):
+    """/proc에서 pid의 모든 자손 프로세스 (pid, 이름) 목록"""
+    parents = {}
+    names = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 형식: pid (이름) 상태 ppid ... (이름에 공백/괄호가 있을 수 있어 마지막 ')' 기준으로 분리)
+        name = stat[stat.find("(") + 1:stat.rfind(")")]
+        ppid = int(stat[stat.rfind(")") + 2:].split()[1])
+        parents.setdefault(ppid, []).append(int(entry))
+        names[int(entry)] = name
+    descendants = []
+    stack = list(parents.get(pid, []))
+    while stack:
+        child = stack.pop()
+        descendants.append((child, names.get(child, "")))
+        stack.extend(parents.get(child, []))
+    return descendants
+
+def _classify_fd(target):
+    if target.startswith("socket:"):
+        return "sockets"
+    if target.startswith("pipe:") or target.startswith("anon_inode:"):
+        return "pipes"
+    if target.endswith((".db", ".db-journal", ".db-wal", ".db-shm")):
+        return "sqlite_fds"
+    return "files"
+
+def process_resources():
+    """현재 프로세스의 RSS(MB), 파일 디스크립터 수(종류별), 자손 프로세스 목록"""
+    pid = os.getpid()
+    usage = {"rss_mb": None, "fds": None, "sockets": 0, "pipes": 0, "sqlite_fds": 0, "files": 0}
+    children = []
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        process = psutil.Process(pid)
+        usage["rss_mb"] = process.memory_info().rss / 2**20
+        if hasattr(process, "num_fds"):
+            usage["fds"] = process.num_fds()
+        for f in process.open_files():
+            usage[_classify_fd(f.path)] += 1
+        usage["sockets"] = len(process.net_connections() if hasattr(process, "net_connections")
+                               else process.connections())
+        children = [(child.pid, child.name()) for child in process.children(recursive=True)]
+    elif os.path.exists("/proc/self/statm"):
+        with open("/proc/self/statm") as f:
+            usage["rss_mb"] = int(f.read().split()[1]) * _page_size() / 2**20
+        fds = os.listdir("/proc/self/fd")
+        usage["fds"] = len(fds)
+        for fd in fds:
+            try:
+                usage[_classify_fd(os.readlink(f"/proc/self/fd/{fd}"))] += 1
+            except OSError:
+                pass  # listdir 자체가 연 디스크립터 등 이미 닫힌 항목
+        children = _proc_children(pid)
+    else:
+        import resource
+        # 현재 RSS를 알 수 없는 환경에서는 최대 RSS로 대신 (macOS는 바이트, 리눅스는 KB 단위)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage["rss_mb"] = maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+    usage["children"] = len(children)
+    usage["chrome_processes"] = sum("chrom" in name.lower() for _, name in children)
+    usage["child_names"] = sorted({name for _, name in children})
+    return usage
+
+def growth_trend(values, min_slope, min_cycles=5):
+    """사이클별 값의 증가 추세 (최소제곱 기울기, 줄지 않은 구간 비율)
+
+    Returns:
+        dict 또는 None: 누수로 의심되면 추세 정보, 아니면 None
+    """
+    values = [v for v in values if v is not None]
+    n = len(values)
+    if n < min_cycles:
+        return None
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    slope = (sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+             / sum((i - mean_x) ** 2 for i in range(n)))
+    non_decreasing = sum(b >= a for a, b in zip(values, values[1:])) / (n - 1)
+    if slope < min_slope or non_decreasing < 0.7:
+        return None
+    return {"per_cycle": round(slope, 3), "first": values[0], "last": values[-1],
+            "non_decreasing": round(non_decreasing, 2), "cycles": n}
+
+class ResourceMonitor:
+    """거래 사이클마다 자원 사용량을 기록하고 증가 추세를 보고서로 저장
+
+    - warmup: 처음 몇 사이클은 캐시/지연 임포트로 늘어나는 게 정상이라 추세 계산에서 제외
+    - tracemalloc 증가 상위 위치는 warmup 직후 스냅샷 대비 누적 증가량 기준
+    """
+
+    def __init__(self, report_path="resource_report.json", top=10, frames=1, warmup=2, history=200):
+        self.report_path = report_path
+        self.top = top
+        self.warmup = warmup
+        self.history = history
+        self.samples = []
+        self.cycles = 0
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._baseline = None  # warmup 직후 tracemalloc 스냅샷
+        self._top_growth = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def wrap(self, fn, label=None):
+        """fn 실행 후마다 sample()을 호출하는 함수 반환 (예외가 나도 기록)"""
+        label = label or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._safe_sample(label, time.monotonic() - started)
+        return wrapper
+
+    def wrap_cycle(self, prepare, execute, label="cycle"):
+        """사전 준비와 실행을 한 사이클로 기록하는 (prepare, execute) 함수 쌍 반환 (스케줄러용)
+
+        - 실행이 끝난 뒤 한 번 기록하므로 사전 준비(차트 캡처, 캔들 DataFrame 생성 등)의 할당도 포함
+        - 사이클 시간은 사전 준비 + 실행 시간 (슬롯 시각까지 기다린 시간 제외)
+        - 사전 준비가 실패하거나 None을 반환하면 실행 단계 없이 바로 기록
+        """
+        prepared = {}
+
+        @functools.wraps(prepare)
+        def wrapped_prepare(*args, **kwargs):
+            started = time.monotonic()
+            context = None
+            try:
+                context = prepare(*args, **kwargs)
+                return context
+            finally:
+                prepared["seconds"] = time.monotonic() - started
+                if context is None:
+                    self._safe_sample(label, prepared["seconds"], prepared.pop("seconds"))
+
+        @functools.wraps(execute)
+        def wrapped_execute(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return execute(*args, **kwargs)
+            finally:
+                prepare_seconds = prepared.pop("seconds", 0.0)
+                self._safe_sample(label, prepare_seconds + time.monotonic() - started, prepare_seconds)
+
+        return wrapped_prepare, wrapped_execute
+
+    def _safe_sample(self, label, duration, prepare_duration=None):
+        try:
+            self.sample(label, duration=duration, prepare_duration=prepare_duration)
+        except Exception as e:
+            logger.error(f"자원 사용량 기록 중 오류 발생: {e}")
+
+    def sample(self, label="cycle", duration=None, prepare_duration=None):
+        """현재 자원 사용량 기록 후 추세 갱신, 보고서 저장"""
+        self.cycles += 1
+        traced, peak = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()  # 다음 사이클의 최대 할당량을 따로 측정
+        sample = {
+            "cycle": self.cycles,
+            "label": label,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "duration": round(duration, 2) if duration is not None else None,
+            "prepare_duration": round(prepare_duration, 2) if prepare_duration is not None else None,
+            "traced_mb": round(traced / 2**20, 2),
+            "traced_peak_mb": round(peak / 2**20, 2),
+        }
+        usage = process_resources()
+        sample.update({k: round(v, 1) if isinstance(v, float) else v for k, v in usage.items()})
+        self.samples.append(sample)
+        del self.samples[:-self.history]
+
+        if self.cycles == self.warmup:
+            self._baseline = self._snapshot()
+        elif self._baseline is not None:
+            self._top_growth = self._allocation_growth()
+
+        trends = self.trends()
+        for name, trend in trends.items():
+            logger.warning(f"자원 증가 추세 ({name}): 사이클당 +{trend['per_cycle']} "
+                           f"({trend['first']} → {trend['last']}, {trend['cycles']}사이클)")
+        logger.info(f"자원 사용량 ({label} #{self.cycles}): RSS {sample['rss_mb']}MB, "
+                    f"추적 {sample['traced_mb']}MB, fd {sample['fds']}, 자식 프로세스 {sample['children']}개")
+        self.write_report(trends)
+        return sample
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),  # 모니터 자신의 샘플 기록
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+    def _allocation_growth(self):
+        """warmup 직후 대비 가장 많이 늘어난 할당 위치"""
+        growth = []
+        for stat in self._snapshot().compare_to(self._baseline, "lineno")[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            growth.append({"location": f"{frame.filename}:{frame.lineno}",
+                           "size_diff_kb": round(stat.size_diff / 1024, 1),
+                           "count_diff": stat.count_diff})
+        return growth
+
+    def trends(self):
+        """warmup 이후 사이클에서 증가 추세를 보이는 지표"""
+        samples = self.samples[self.warmup:] if len(self.samples) > self.warmup else []
+        trends = {}
+        for name, min_slope in GROWTH_THRESHOLDS.items():
+            trend = growth_trend([s.get(name) for s in samples], min_slope)
+            if trend:
+                trends[name] = trend
+        return trends
+
+    def write_report(self, trends=None):
+        """보고서 JSON 저장 (최근 샘플은 요약 지표만)"""
+        report = {
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "cycles": self.cycles,
+            "trends": self.trends() if trends is None else trends,
+            "top_allocation_growth": self._top_growth,
+            "samples": self.samples,
+        }
+        tmp_path = f"{self.report_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.report_path)
+
+def print_report(path):
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    print(f"pid {report['pid']}, 시작 {report['started_at']}, 사이클 {report['cycles']}회")
+    first, last = report["samples"][0], report["samples"][-1]
+    for name in ("rss_mb", "traced_mb", "fds", "sqlite_fds", "sockets", "children", "chrome_processes"):
+        print(f"  {name:<18} {first.get(name)} → {last.get(name)}")
+    if report["trends"]:
+        print("증가 추세:")
+        for name, trend in report["trends"].items():
+            print(f"  {name:<18} 사이클당 +{trend['per_cycle']} ({trend['first']} → {trend['last']})")
+    else:
+        print("증가 추세 없음")
+    if report["top_allocation_growth"]:
+        print("할당 증가 상위 위치:")
+        for item in report["top_allocation_growth"]:
+            print(f"  {item['size_diff_kb']:>10,.1f} KB  {item['count_diff']:>+8}  {item['location']}")
+
+if __name__ == "__main__":
+    # 사용법: python resource_monitor.py [보고서.json] (기본 resource_report.json)
+    print_report(sys.argv[1] if len(sys.argv) > 1 else "resource_report.json")
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 주문 전 위험 관리 (VaR/CVaR, 최대 포지션, 일일 거래 금액 상한으로 주문 크기 제한)
+#
+# - 손실 분포: 저장된 시간봉 종가의 horizon시간 수익률 (과거 시뮬레이션)
+#   또는 1시간 수익률을 복원 추출해 더한 몬테카를로 시뮬레이션
+# - 현물 롱 포지션만 있으므로 손실은 BTC 보유 금액에 비례
+#   → BTC 1원당 VaR/CVaR를 한 번 계산하면 한도 내 최대 보유 금액을 바로 구할 수 있음
+# - 수익률 표본은 캔들이 바뀔 때만 다시 계산하고, 주문 시에는 캐시한 값으로 판단 (수 ms 이내)
+################################################################################
+
+def horizon_returns(close, horizon):
+    """종가 배열 → 겹치는 horizon 구간의 단순 수익률 배열"""
+    close = np.asarray(close, dtype=np.float64)
+    close = close[np.isfinite(close) & (close > 0)]
+    if len(close) <= horizon:
+        return np.zeros(0)
+    log_close = np.log(close)
+    return np.expm1(log_close[horizon:] - log_close[:-horizon])
+
+def bootstrap_returns(close, horizon, simulations=10000, seed=None):
+    """1시간 로그 수익률을 horizon개씩 복원 추출해 더한 몬테카를로 수익률 배열"""
+    close = np.asarray(close, dtype=np.float64)
+    close = close[np.isfinite(close) & (close > 0)]
+    if len(close) < 2:
+        return np.zeros(0)
+    steps = np.diff(np.log(close))
+    rng = np.random.default_rng(seed)
+    samples = steps[rng.integers(0, len(steps), size=(simulations, horizon))]
+    return np.expm1(samples.sum(axis=1))
+
+def var_cvar(returns, confidence=0.95):
+    """수익률 표본의 VaR와 CVaR (보유 금액 1원당 손실, 양수가 손실)"""
+    if len(returns) == 0:
+        return float("nan"), float("nan")
+    losses = -np.asarray(returns)
+    var = float(np.quantile(losses, confidence))
+    tail = losses[losses >= var]
+    return var, float(tail.mean())
+
+class PreTradeRisk:
+    """AI가 정한 주문 크기를 위험 한도에 맞게 줄이는 주문 전 점검
+
+    한도 (모두 총자산 = KRW + BTC 평가금액 대비 %):
+    - max_var_pct / max_cvar_pct: 주문 후 BTC 보유분의 horizon시간 VaR/CVaR 상한
+    - max_position_pct: 주문 후 BTC 보유 비중 상한
+    - max_daily_turnover_pct: 하루(자정 기준) 매수+매도 금액 합계 상한
+    매도는 위험을 줄이므로 일일 거래 금액 상한만 적용 (손절 매도는 이 점검을 거치지 않음)
+    일일 거래 금액은 state_path 파일로 프로세스 간 공유 (점검/기록 때마다 파일이 바뀌었으면 다시 읽음)
+    """
+
+    def __init__(self, max_var_pct=4.0, max_cvar_pct=6.0, max_position_pct=80.0, max_daily_turnover_pct=200.0,
+                 confidence=0.95, horizon=24, method="historical", simulations=10000, min_samples=100,
+                 state_path=None, seed=None):
+        self.max_var_pct = max_var_pct
+        self.max_cvar_pct = max_cvar_pct
+        self.max_position_pct = max_position_pct
+        self.max_daily_turnover_pct = max_daily_turnover_pct
+        self.confidence = confidence
+        self.horizon = horizon  # 손실을 평가할 보유 기간 (캔들 수)
+        self.method = method  # "historical" 또는 "monte_carlo"
+        self.simulations = simulations
+        self.min_samples = min_samples  # 이보다 표본이 적으면 VaR/CVaR 한도 대신 매수 차단
+        self.state_path = state_path
+        self.seed = seed
+
+        self.var = float("nan")  # BTC 1원당 VaR
+        self.cvar = float("nan")  # BTC 1원당 CVaR
+        self.samples = 0
+        self.refreshed_at = 0.0
+        self._last_candle = None
+        self.turnover_day = None
+        self.turnover_krw = 0.0
+        self._state_version = None
+        self._reload()
+
+    def _reload(self):
+        """일일 거래 금액 파일이 바뀌었으면 다시 읽음 (파이프라인에서 다른 프로세스가 기록한 거래 금액 반영)"""
+        if not self.state_path:
+            return
+        version = _file_version(self.state_path)
+        if version is None or version == self._state_version:
+            return
+        with open(self.state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.turnover_day = state.get("day")
+        self.turnover_krw = state.get("turnover_krw", 0.0)
+        self._state_version = version
+
+    def refresh(self, df):
+        """시간봉(candles.Candles 또는 pyupbit.get_ohlcv 형식 DataFrame)으로 손실 분포 갱신
+        (마지막 캔들이 같으면 건너뜀)"""
+        if df is None or len(df) == 0:
+            return
+        self.refreshed_at = time.time()
+        close = np.asarray(df['close'], dtype=np.float64)
+        last_candle = (df.index[-1], float(close[-1]))
+        if last_candle == self._last_candle:
+            return
+        if self.method == "monte_carlo":
+            returns = bootstrap_returns(close, self.horizon, self.simulations, self.seed)
+        else:
+            returns = horizon_returns(close, self.horizon)
+        self.var, self.cvar = var_cvar(returns, self.confidence)
+        self.samples = len(returns)
+        self._last_candle = last_candle
+        logger.info(f"위험 지표 갱신: {self.horizon}시간 VaR {self.var * 100:.2f}%, "
+                    f"CVaR {self.cvar * 100:.2f}% (신뢰수준 {self.confidence:.0%}, 표본 {self.samples}개)")
+
+    @property
+    def ready(self):
+        return self.samples >= self.min_samples and np.isfinite(self.cvar)
+
+    def _turnover_today(self, now):
+        self._reload()
+        day = datetime.fromtimestamp(now).date().isoformat()
+        if day != self.turnover_day:
+            self.turnover_day = day
+            self.turnover_krw = 0.0
+        return self.turnover_krw
+
+    def check(self, side, amount, krw, btc, price, now=None):
+        """주문 크기를 한도 내로 조정
+
+        Args:
+            side: "buy" 또는 "sell"
+            amount: 매수면 주문 금액(KRW), 매도면 주문 수량(BTC)
+            krw, btc: 현재 KRW/BTC 잔고
+            price: BTC 현재가
+        Returns:
+            tuple: (조정된 amount, 보고서 dict)
+        """
+        started = time.perf_counter()
+        now = now or time.time()
+        equity = krw + btc * price
+        exposure = btc * price
+        notional = amount if side == "buy" else amount * price
+        limits = {"requested": notional}
+
+        turnover = self._turnover_today(now)
+        limits["daily_turnover"] = equity * self.max_daily_turnover_pct / 100 - turnover
+        if side == "buy":
+            limits["position"] = equity * self.max_position_pct / 100 - exposure
+            if self.ready:
+                limits["var"] = equity * self.max_var_pct / 100 / self.var - exposure if self.var > 0 else notional
+                limits["cvar"] = equity * self.max_cvar_pct / 100 / self.cvar - exposure if self.cvar > 0 else notional
+            else:
+                limits["var"] = limits["cvar"] = 0.0  # 손실 분포를 모르면 매수하지 않음
+
+        binding = min(limits, key=limits.get)
+        allowed = max(0.0, min(limits.values()))
+        post_exposure = exposure + allowed if side == "buy" else exposure - allowed
+        report = {
+            "side": side,
+            "requested_krw": notional,
+            "allowed_krw": allowed,
+            "binding": binding if allowed < notional else None,
+            "equity": equity,
+            "post_position_pct": post_exposure / equity * 100 if equity else 0.0,
+            "post_var_pct": post_exposure * self.var / equity * 100 if equity else 0.0,
+            "post_cvar_pct": post_exposure * self.cvar / equity * 100 if equity else 0.0,
+            "turnover_today": turnover,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+        if report["binding"]:
+            logger.warning(f"위험 한도({binding})로 {side} 주문 축소: {notional:,.0f}원 → {allowed:,.0f}원")
+        adjusted = allowed if side == "buy" else allowed / price
+        return adjusted, report
+
+    def record_turnover(self, krw_amount, now=None):
+        """체결된 주문 금액을 일일 거래 금액에 반영"""
+        self._turnover_today(now or time.time())
+        self.turnover_krw += krw_amount
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"day": self.turnover_day, "turnover_krw": self.turnover_krw}, f)
+        os.replace(tmp_path, self.state_path)
+        self._state_version = _file_version(self.state_path)
+
+def _file_version(path):
+    """파일 변경 확인용 (inode, 크기, 수정 시각), 파일이 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 사전 준비(pre-warming) 기반 비동기 스케줄러
+################################################################################
+
+class TradingScheduler:
+    """정해진 시각(슬롯)마다 트레이딩을 실행하는 asyncio 스케줄러
+
+    - 슬롯 시각보다 lead_time 만큼 먼저 prepare()를 실행해 데이터 수집, 차트 캡처,
+      반성 생성을 끝내두고, 슬롯 시각에 execute(context)로 결정과 주문만 수행
+    - 매초 폴링하지 않고 다음 이벤트 시각까지 sleep
+    - 슬롯을 grace_period 이상 놓친 경우 건너뜀
+    - 이전 거래가 진행 중이면 끝난 뒤 실행하고, 이미 대기 중인 실행이 있으면 그 실행에 합침
+      (슬롯과 슬롯 외 실행 요청이 겹쳐도 버려지지 않고, 대기 중인 실행은 최대 하나)
+    """
+
+    def __init__(self, prepare, execute, slots=("09:00", "15:00", "21:00"),
+                 lead_time=180, grace_period=300):
+        self.prepare = prepare  # 사전 준비 함수: context 반환 (동기 함수)
+        self.execute = execute  # 결정/주문 함수: execute(context) (동기 함수)
+        self.slots = sorted(datetime.strptime(s, "%H:%M").time() for s in slots)
+        self.lead_time = timedelta(seconds=lead_time)  # 사전 준비 시작 시점 (슬롯 기준 몇 초 전)
+        self.grace_period = timedelta(seconds=grace_period)  # 슬롯을 놓쳤을 때 허용하는 지연
+        self._lock = None
+        self._waiting = 0  # 예약했지만 아직 시작하지 않은 실행 수 (0 또는 1)
+        self._last_slot = None
+        self._tasks = set()
+
+    def next_slot(self, now=None):
+        """now 기준으로 실행해야 할 다음 슬롯 시각 (지연 허용 범위 안의 지난 슬롯 포함)"""
+        now = now or datetime.now()
+        for day_offset in range(-1, 2):
+            day = (now + timedelta(days=day_offset)).date()
+            for slot_time in self.slots:
+                slot = datetime.combine(day, slot_time)
+                if self._last_slot is not None and slot <= self._last_slot:
+                    continue
+                if slot + self.grace_period < now:
+                    # 이미 실행 이력이 있는 상태에서 지나간 슬롯은 놓친 것으로 기록
+                    if self._last_slot is not None:
+                        logger.warning(f"{slot:%Y-%m-%d %H:%M} 슬롯을 놓쳐 건너뜁니다.")
+                        self._last_slot = slot
+                    continue
+                return slot
+        return datetime.combine((now + timedelta(days=2)).date(), self.slots[0])
+
+    async def _sleep_until(self, target):
+        """target 시각까지 대기 (시스템 시계 변경에 대비해 나눠서 대기)"""
+        while True:
+            remaining = (target - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 3600))
+
+    def _label(self, slot):
+        return f"{slot:%H:%M} 슬롯" if slot is not None else "슬롯 외 실행"
+
+    def _reserve(self, label):
+        """실행 예약 (이벤트 루프 안에서 호출)
+
+        Returns:
+            bool: 새 실행을 예약했으면 True, 이미 대기 중인 실행에 합쳤으면 False
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._waiting:
+            logger.info(f"대기 중인 거래 실행이 있어 {label}을 그 실행에 합칩니다.")
+            return False
+        if self._lock.locked():
+            logger.info(f"이전 거래가 진행 중이라 끝나는 대로 {label}을 실행합니다.")
+        self._waiting += 1
+        return True
+
+    async def run_slot(self, slot):
+        """하나의 슬롯 처리: 사전 준비 → 슬롯 시각 대기 → 결정 및 주문
+
+        slot이 None이면 슬롯 외 즉시 실행 (준비가 끝나는 대로 결정 및 주문)
+
+        Returns:
+            bool: 새로 실행했으면 True, 대기 중인 실행에 합쳤으면 False
+        """
+        label = self._label(slot)
+        if not self._reserve(label):
+            return False
+        await self._run_reserved(slot, label)
+        return True
+
+    async def _run_reserved(self, slot, label):
+        """예약한 실행 처리 (이전 거래가 끝날 때까지 대기한 뒤 실행)"""
+        try:
+            await self._lock.acquire()
+        finally:
+            self._waiting -= 1  # 시작했거나 대기 중에 취소됨
+        try:
+            await self._run_cycle(slot, label)
+        finally:
+            self._lock.release()
+
+    async def _run_cycle(self, slot, label):
+        """사전 준비 → 슬롯 시각 대기 → 결정 및 주문"""
+        started = datetime.now()
+        logger.info(f"{label} 사전 준비 시작")
+        try:
+            context = await asyncio.to_thread(self.prepare)
+        except Exception as e:
+            logger.error(f"사전 준비 중 오류 발생: {e}")
+            return
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.info(f"사전 준비 완료 ({elapsed:.1f}초 소요)")
+        if context is None:
+            logger.warning("사전 준비 결과가 없어 이번 슬롯을 건너뜁니다.")
+            return
+
+        if slot is not None:
+            await self._sleep_until(slot)
+            delay = (datetime.now() - slot).total_seconds()
+            logger.info(f"{label} 실행 (목표 시각 대비 {delay:.1f}초 지연)")
+        try:
+            await asyncio.to_thread(self.execute, context)
+        except Exception as e:
+            logger.error(f"거래 실행 중 오류 발생: {e}")
+
+    async def wait_for_next_slot(self):
+        """다음 슬롯의 사전 준비 시점까지 대기한 뒤 해당 슬롯 시각 반환"""
+        while True:
+            slot = self.next_slot()
+            logger.info(f"다음 거래 슬롯: {slot:%Y-%m-%d %H:%M}")
+            await self._sleep_until(slot - self.lead_time)
+            self._last_slot = slot
+            if slot + self.grace_period < datetime.now():
+                # 절전 등으로 대기 중에 슬롯이 지나가 버린 경우
+                logger.warning(f"{slot:%Y-%m-%d %H:%M} 슬롯을 놓쳐 건너뜁니다.")
+                continue
+            return slot
+
+    def trigger(self, reason):
+        """슬롯 외 거래 사이클 실행 요청 (이벤트 루프 안에서 호출)
+
+        진행 중인 거래가 있으면 끝나는 대로 실행하고, 대기 중인 실행(다음 슬롯 등)이 있으면 그 실행에 합침
+
+        Returns:
+            bool: 새 거래 사이클을 예약했는지 여부 (False이면 이미 예약된 사이클이 이 요청도 처리)
+        """
+        logger.info(f"슬롯 외 거래 실행 요청: {reason}")
+        return self._submit(None)
+
+    def _submit(self, slot):
+        label = self._label(slot)
+        if not self._reserve(label):
+            return False
+        self._spawn(self._run_reserved(slot, label))
+        return True
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run_forever(self):
+        """슬롯을 순서대로 무한히 처리"""
+        while True:
+            slot = await self.wait_for_next_slot()
+            # 준비가 다음 슬롯의 사전 준비 시점까지 이어질 수 있으므로 별도 태스크로 실행
+            self._submit(slot)
+
+    def run(self):
+        """블로킹 실행 진입점"""
+        asyncio.run(self.run_forever())
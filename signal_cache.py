@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 외부 신호(공포탐욕지수, 뉴스 등) TTL 캐시
+################################################################################
+
+class SignalCache:
+    """외부 데이터 소스별 TTL 캐시 (stale-while-revalidate + 서킷 브레이커)
+
+    - 소스마다 fetch 함수와 TTL을 등록
+    - TTL 이내의 값은 바로 반환하고, TTL이 지난 값은 그대로 반환하면서 백그라운드에서 갱신
+    - 캐시된 값이 전혀 없을 때만 호출한 쪽에서 직접 조회 (최초 1회)
+    - 연속으로 실패한 소스는 일정 시간 동안 호출하지 않음 (서킷 브레이커)
+    - 조회 결과는 JSON 파일에 저장되어 재시작 후에도 유지
+    """
+
+    def __init__(self, path="signal_cache.json"):
+        self.path = path
+        self._sources = {}  # 소스 이름 -> 설정 및 상태
+        self._entries = {}  # 소스 이름 -> {"value": 값, "fetched_at": 조회 시각}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def register(self, name, fetch, ttl, failure_threshold=3, cooldown=600):
+        """외부 데이터 소스 등록
+
+        Args:
+            name: 소스 이름 (캐시 키)
+            fetch: 인자 없이 호출하는 조회 함수, 실패 시 None 반환 또는 예외 발생
+            ttl: 값을 최신으로 간주하는 시간(초)
+            failure_threshold: 서킷 브레이커가 열리는 연속 실패 횟수
+            cooldown: 서킷 브레이커가 열린 뒤 재시도까지 대기 시간(초)
+        """
+        self._sources[name] = {
+            "fetch": fetch,
+            "ttl": ttl,
+            "failure_threshold": failure_threshold,
+            "cooldown": cooldown,
+            "failures": 0,
+            "open_until": 0,
+            "refreshing": False,
+        }
+
+    def get(self, name):
+        """캐시된 값 조회 (최신이 아니면 백그라운드 갱신 시작)"""
+        source = self._sources[name]
+        with self._lock:
+            entry = self._entries.get(name)
+
+        if entry is None:
+            # 캐시가 비어 있으면 한 번은 직접 조회할 수밖에 없음
+            return self._refresh(name)
+
+        age = time.time() - entry["fetched_at"]
+        if age > source["ttl"]:
+            self._refresh_in_background(name)
+        return entry["value"]
+
+    def _refresh_in_background(self, name):
+        """별도 스레드에서 값 갱신 (이미 갱신 중이면 무시)"""
+        source = self._sources[name]
+        with self._lock:
+            if source["refreshing"]:
+                return
+            source["refreshing"] = True
+        threading.Thread(target=self._refresh, args=(name,), daemon=True).start()
+
+    def _refresh(self, name):
+        """소스에서 값을 조회해 캐시에 저장하고 반환 (실패 시 기존 값 반환)"""
+        source = self._sources[name]
+        try:
+            if time.time() < source["open_until"]:
+                logger.warning(f"{name} 조회가 연속 실패하여 잠시 중단된 상태입니다.")
+                return self._cached_value(name)
+
+            try:
+                value = source["fetch"]()
+            except Exception as e:
+                logger.error(f"{name} 조회 중 오류 발생: {e}")
+                value = None
+
+            if value is None:
+                self._record_failure(name)
+                return self._cached_value(name)
+
+            with self._lock:
+                source["failures"] = 0
+                self._entries[name] = {"value": value, "fetched_at": time.time()}
+            self._save()
+            return value
+        finally:
+            source["refreshing"] = False
+
+    def _record_failure(self, name):
+        """실패 횟수 기록 및 서킷 브레이커 처리"""
+        source = self._sources[name]
+        with self._lock:
+            source["failures"] += 1
+            if source["failures"] >= source["failure_threshold"]:
+                source["open_until"] = time.time() + source["cooldown"]
+                source["failures"] = 0
+                logger.warning(f"{name} 조회가 {source['failure_threshold']}회 연속 실패하여 "
+                               f"{source['cooldown']}초 동안 조회를 중단합니다.")
+
+    def _cached_value(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+        return entry["value"] if entry else None
+
+    def _load(self):
+        """디스크에 저장된 캐시 불러오기"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"신호 캐시 파일 로드 중 오류 발생: {e}")
+            self._entries = {}
+
+    def _save(self):
+        """캐시를 디스크에 저장 (임시 파일에 쓴 뒤 교체)"""
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False)
+        tmp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"신호 캐시 파일 저장 중 오류 발생: {e}")
@@ -0,0 +1,228 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 거래 사이클 입력 스냅샷 저널
+#
+# AI에게 보여준 데이터(잔고, 호가, 일봉/시간봉, 뉴스, 공포탐욕지수, 전략, 반성, 차트)와
+# 결정을 사이클마다 저장해 나중에 재현/감사할 수 있도록 함
+#
+# - journal/blobs.bin: 섹션 데이터를 압축해 이어 붙이는 추가 전용 파일
+# - journal/index.db: 사이클(시각 → 섹션별 해시)과 블롭(해시 → 위치) 인덱스
+# - 섹션 내용이 이전 사이클과 같으면(해시 동일) 다시 저장하지 않음
+# - DataFrame/Candles는 열 단위(열마다 float64 배열)로 저장해 압축률을 높임
+################################################################################
+
+# 섹션 데이터 형식 표시 (압축 전 데이터의 첫 바이트)
+_FRAME = b"F"  # DataFrame (열 단위)
+_JSON = b"J"  # JSON으로 변환 가능한 값
+_DATA_URL = b"U"  # data URL 이미지 (디코딩한 이미지 바이트 저장)
+
+# 저장 방식 (blobs.bin에 저장된 데이터의 첫 바이트)
+_ZLIB = b"z"
+_RAW = b"r"  # 이미 압축된 이미지 등
+
+def encode_section(value):
+    """섹션 값을 바이트로 변환"""
+    if hasattr(value, "timestamps") and hasattr(value, "items"):
+        return _FRAME + _encode_candles(value)
+    if hasattr(value, "to_numpy") and hasattr(value, "columns"):
+        return _FRAME + _encode_frame(value)
+    if isinstance(value, str) and value.startswith("data:") and ";base64," in value:
+        import base64
+        header, encoded = value.split(",", 1)
+        return _DATA_URL + header.encode("utf-8") + b"\n" + base64.b64decode(encoded)
+    return _JSON + json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+
+def decode_section(data):
+    """encode_section()의 역변환"""
+    kind, body = data[:1], data[1:]
+    if kind == _FRAME:
+        return _decode_frame(body)
+    if kind == _DATA_URL:
+        import base64
+        header, image = body.split(b"\n", 1)
+        return header.decode("utf-8") + "," + base64.b64encode(image).decode("utf-8")
+    return json.loads(body.decode("utf-8"))
+
+def _encode_frame(df):
+    """DataFrame → [JSON 헤더 줄] + 인덱스(int64 초) + 열별 float64 배열"""
+    import numpy as np
+    numeric = all(np.issubdtype(dtype, np.number) for dtype in df.dtypes)
+    is_datetime = np.issubdtype(df.index.dtype, np.datetime64)
+    if not numeric or not is_datetime:
+        # 열 단위로 저장할 수 없는 형식은 JSON으로 저장
+        header = {"format": "json"}
+        return json.dumps(header).encode("utf-8") + b"\n" + df.to_json(orient="split").encode("utf-8")
+
+    header = {"format": "columns", "rows": len(df), "columns": [str(c) for c in df.columns]}
+    buffer = io.BytesIO()
+    buffer.write(json.dumps(header).encode("utf-8") + b"\n")
+    buffer.write(np.asarray(df.index, dtype="datetime64[s]").astype("<i8").tobytes())
+    for column in df.columns:
+        buffer.write(df[column].to_numpy(dtype="<f8").tobytes())
+    return buffer.getvalue()
+
+def _encode_candles(candles):
+    """candles.Candles → _encode_frame()과 같은 형식 (DataFrame으로 바꾸지 않고 열 배열을 그대로 기록)"""
+    header = {"format": "columns", "rows": len(candles), "columns": candles.columns}
+    buffer = io.BytesIO()
+    buffer.write(json.dumps(header).encode("utf-8") + b"\n")
+    buffer.write(candles.timestamps.astype("<i8").tobytes())
+    for _, values in candles.items():
+        buffer.write(values.astype("<f8").tobytes())
+    return buffer.getvalue()
+
+def _decode_frame(data):
+    import numpy as np
+    import pandas as pd
+    header_line, body = data.split(b"\n", 1)
+    header = json.loads(header_line)
+    if header["format"] == "json":
+        return pd.read_json(io.StringIO(body.decode("utf-8")), orient="split")
+
+    rows = header["rows"]
+    index = pd.to_datetime(np.frombuffer(body, dtype="<i8", count=rows), unit="s")
+    columns = {}
+    offset = rows * 8
+    for name in header["columns"]:
+        columns[name] = np.frombuffer(body, dtype="<f8", count=rows, offset=offset).copy()
+        offset += rows * 8
+    return pd.DataFrame(columns, index=index)
+
+class SnapshotJournal:
+    """사이클별 입력 스냅샷을 저장하고 시각으로 조회하는 추가 전용 저널"""
+
+    def __init__(self, directory="journal", compress_level=6):
+        self.directory = directory
+        self.compress_level = compress_level
+        self.blob_path = os.path.join(directory, "blobs.bin")
+        self.index_path = os.path.join(directory, "index.db")
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """index.db 연결 (블록이 끝나면 커밋 또는 롤백한 뒤 연결을 닫음)"""
+        if not self._initialized:
+            os.makedirs(self.directory, exist_ok=True)
+        with closing(sqlite3.connect(self.index_path)) as conn, conn:
+            if not self._initialized:
+                conn.execute('''CREATE TABLE IF NOT EXISTS blobs
+                                (hash TEXT PRIMARY KEY, offset INTEGER, length INTEGER, raw_size INTEGER)''')
+                conn.execute('''CREATE TABLE IF NOT EXISTS cycles
+                                (timestamp TEXT PRIMARY KEY, sections TEXT)''')
+                self._initialized = True
+            yield conn
+
+    def record(self, sections, timestamp=None):
+        """사이클 하나의 스냅샷 저장
+
+        Args:
+            sections: 섹션 이름 → 값 (DataFrame, data URL 문자열, JSON으로 변환 가능한 값)
+            timestamp: 사이클 시각 (기본값: 현재 시각)
+        Returns:
+            dict: 저장 통계 (timestamp, 새로 저장한 바이트 수, 재사용한 섹션 목록)
+        """
+        timestamp = (timestamp or datetime.now()).isoformat()
+        section_hashes = {}
+        new_bytes = 0
+        reused = []
+
+        with self._connect() as conn:
+            for name, value in sections.items():
+                data = encode_section(value)
+                digest = hashlib.sha256(data).hexdigest()
+                section_hashes[name] = digest
+                if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+                    reused.append(name)
+                    continue
+
+                if data[:1] == _DATA_URL:
+                    stored = _RAW + data
+                else:
+                    stored = _ZLIB + zlib.compress(data, self.compress_level)
+                with open(self.blob_path, "ab") as f:
+                    offset = f.tell()
+                    f.write(stored)
+                    f.flush()
+                    os.fsync(f.fileno())
+                conn.execute("INSERT INTO blobs VALUES (?, ?, ?, ?)", (digest, offset, len(stored), len(data)))
+                new_bytes += len(stored)
+
+            conn.execute("INSERT OR REPLACE INTO cycles VALUES (?, ?)",
+                         (timestamp, json.dumps(section_hashes, sort_keys=True)))
+
+        logger.info(f"스냅샷 저장: {timestamp} (새 데이터 {new_bytes:,} 바이트, "
+                    f"변경 없는 섹션 {len(reused)}/{len(sections)}개 재사용)")
+        return {"timestamp": timestamp, "new_bytes": new_bytes, "reused": reused}
+
+    def timestamps(self, start=None, end=None):
+        """저장된 사이클 시각 목록 (오래된 순)"""
+        query = "SELECT timestamp FROM cycles WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp"
+        with self._connect() as conn:
+            rows = conn.execute(query, (start.isoformat() if start else "",
+                                        end.isoformat() if end else "9999")).fetchall()
+        return [datetime.fromisoformat(row[0]) for row in rows]
+
+    def load(self, timestamp=None, sections=None):
+        """timestamp 시점(또는 그 직전)의 사이클 스냅샷 조회
+
+        Args:
+            timestamp: 조회할 시각 (기본값: 가장 최근 사이클)
+            sections: 읽을 섹션 이름 목록 (기본값: 전체)
+        Returns:
+            dict: {"timestamp": datetime, 섹션 이름: 값, ...} 또는 None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT timestamp, sections FROM cycles WHERE timestamp <= ? "
+                               "ORDER BY timestamp DESC LIMIT 1",
+                               (timestamp.isoformat() if timestamp else "9999",)).fetchone()
+            if row is None:
+                return None
+            section_hashes = json.loads(row[1])
+            names = [name for name in section_hashes if sections is None or name in sections]
+            locations = {}
+            for name in names:
+                locations[name] = conn.execute("SELECT offset, length FROM blobs WHERE hash = ?",
+                                               (section_hashes[name],)).fetchone()
+
+        snapshot = {"timestamp": datetime.fromisoformat(row[0])}
+        with open(self.blob_path, "rb") as f:
+            for name, (offset, length) in locations.items():
+                f.seek(offset)
+                stored = f.read(length)
+                data = zlib.decompress(stored[1:]) if stored[:1] == _ZLIB else stored[1:]
+                snapshot[name] = decode_section(data)
+        return snapshot
+
+    def stats(self):
+        """저널 크기 통계 (사이클 수, 블롭 수, 저장 바이트, 압축 전 바이트)"""
+        with self._connect() as conn:
+            cycles = conn.execute("SELECT COUNT(*) FROM cycles").fetchone()[0]
+            blobs, stored, raw = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(raw_size), 0) FROM blobs").fetchone()
+        return {"cycles": cycles, "blobs": blobs, "stored_bytes": stored, "raw_bytes": raw}
+
+if __name__ == "__main__":
+    # 사용법: python snapshot_journal.py [YYYY-MM-DDTHH:MM:SS]
+    # 해당 시각(없으면 가장 최근) 사이클의 스냅샷 요약 출력
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    journal = SnapshotJournal()
+    print(journal.stats())
+    snapshot = journal.load(datetime.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None)
+    if snapshot is None:
+        print("저장된 스냅샷이 없습니다.")
+    else:
+        for name, value in snapshot.items():
+            text = repr(value)
+            print(f"[{name}] {text[:300]}{'...' if len(text) > 300 else ''}")
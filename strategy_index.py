@@ -0,0 +1,148 @@
+import logging
+import math
+import re
+from collections import Counter
+
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 투자 전략 텍스트 검색 인덱스 (BM25)
+################################################################################
+
+_WORD_RE = re.compile(r"[0-9A-Za-z]+|[가-힣]+")
+
+def tokenize(text):
+    """검색용 토큰 분리
+
+    한글은 조사/어미가 붙어 단어가 잘 일치하지 않으므로 단어와 함께 2글자 단위(bigram)도 사용
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        tokens.append(word)
+        if "가" <= word[0] <= "힣" and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+def split_chunks(text, chunk_size=120, overlap=20):
+    """전략 텍스트를 단어 수 기준으로 겹치게 나누기"""
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_size - overlap, 1)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_size]))
+        if start + chunk_size >= len(words):
+            break
+    return chunks
+
+class StrategyIndex:
+    """전략/자막 텍스트를 한 번만 청크로 나눠 BM25 인덱스를 만들고,
+    현재 시장 상황과 관련된 청크만 골라 프롬프트에 넣기 위한 클래스"""
+
+    def __init__(self, text, chunk_size=120, overlap=20, k1=1.5, b=0.75):
+        self.full_text = text
+        self.full_tokens = count_tokens(text)
+        self.chunks = split_chunks(text, chunk_size, overlap)
+        self.k1 = k1
+        self.b = b
+
+        # 청크별 단어 빈도와 문서 빈도 계산
+        self._term_freqs = [Counter(tokenize(chunk)) for chunk in self.chunks]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0
+        doc_freq = Counter()
+        for tf in self._term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self.chunks)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+        # 누적 토큰 절감 통계
+        self.calls = 0
+        self.tokens_saved = 0
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """파일에서 전략 텍스트를 읽어 인덱스 생성"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logger.error(f"전략 파일을 읽을 수 없습니다: {e}")
+            text = ""
+        index = cls(text, **kwargs)
+        logger.info(f"전략 인덱스 생성 완료: 청크 {len(index.chunks)}개, 전체 {index.full_tokens} 토큰")
+        return index
+
+    def search(self, query, top_k=4):
+        """질의와 관련도가 높은 청크 번호 목록 (BM25 점수 순)"""
+        query_terms = set(tokenize(query))
+        scores = []
+        for i, tf in enumerate(self._term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1))
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(reverse=True)
+        return [i for _, i in scores[:top_k]]
+
+    def retrieve(self, query, top_k=4):
+        """질의와 관련된 청크만 원래 순서대로 이어 붙여 반환하고 토큰 절감량 기록"""
+        if len(self.chunks) <= top_k:
+            text = self.full_text
+        else:
+            selected = sorted(self.search(query, top_k))
+            if not selected:
+                # 관련 청크가 없으면 앞부분(전략 개요)을 사용
+                selected = list(range(top_k))
+            text = "\n...\n".join(self.chunks[i] for i in selected)
+
+        used_tokens = count_tokens(text)
+        saved = self.full_tokens - used_tokens
+        self.calls += 1
+        self.tokens_saved += saved
+        logger.info(f"전략 텍스트 토큰: 전체 {self.full_tokens} → 사용 {used_tokens} "
+                    f"(이번 호출 {saved} 절감, 누적 {self.tokens_saved} 절감 / {self.calls}회)")
+        return text
+
+def build_market_query(df_daily, df_hourly, fear_greed_index=None):
+    """현재 시장 상태(지표 값)를 전략 검색용 질의어로 변환"""
+    terms = ["매수", "매도", "진입", "손절", "추세"]
+    for df in (df_daily, df_hourly):
+        if df is None or df.empty:
+            continue
+        last = df.iloc[-1]
+        rsi = last.get("rsi")
+        if rsi is not None and not math.isnan(rsi):
+            if rsi >= 70:
+                terms += ["RSI", "과매수", "overbought", "고점"]
+            elif rsi <= 30:
+                terms += ["RSI", "과매도", "oversold", "저점"]
+        close, bbh, bbl = last.get("close"), last.get("bb_bbh"), last.get("bb_bbl")
+        if close is not None and bbh is not None and bbl is not None:
+            if close >= bbh:
+                terms += ["볼린저", "밴드", "상단", "돌파"]
+            elif close <= bbl:
+                terms += ["볼린저", "밴드", "하단", "이탈"]
+        macd_diff = last.get("macd_diff")
+        if macd_diff is not None and not math.isnan(macd_diff):
+            terms += ["MACD", "골든크로스" if macd_diff > 0 else "데드크로스"]
+        sma = last.get("sma_20")
+        if close is not None and sma is not None and not math.isnan(sma):
+            terms += ["상승", "이동평균선", "지지"] if close > sma else ["하락", "이동평균선", "저항"]
+        volume = df["volume"] if "volume" in df else None
+        if volume is not None and len(volume) > 1 and last["volume"] > volume.mean() * 1.5:
+            terms += ["거래량", "급증"]
+    if fear_greed_index:
+        classification = str(fear_greed_index.get("value_classification", "")).lower()
+        if "fear" in classification:
+            terms += ["공포", "fear"]
+        elif "greed" in classification:
+            terms += ["탐욕", "greed"]
+    return " ".join(terms)
@@ -22,6 +22,11 @@ def main():
     # 데이터 로드
     df = load_data()
 
+    # 여러 계좌를 운용하면 계좌별로 보기
+    if 'account' in df.columns and df['account'].nunique() > 1:
+        account = st.sidebar.selectbox('Account', sorted(df['account'].dropna().unique()))
+        df = df[df['account'] == account]
+
     # 기본 통계
     st.header('Basic Statistics')
     st.write(f"Total number of trades: {len(df)}")
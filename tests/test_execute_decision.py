@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pyupbit
+import pytest
+
+import main
+from accounts import Account
+from paper_exchange import PaperUpbit, SyntheticOrderbook
+from risk_engine import PreTradeRisk
+
+PRICE = 90_000_000
+
+@pytest.fixture
+def logged(monkeypatch):
+    rows = []
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(pyupbit, "get_current_price", lambda ticker: PRICE)
+    monkeypatch.setattr(main, "log_current_balances",
+                        lambda decision, percentage, reason, reflection, account=None: rows.append((decision, percentage)))
+    monkeypatch.setenv("RISK_ENABLED", "true")
+    return rows
+
+def make_account(size=0.5, max_position_pct=100.0):
+    client = PaperUpbit(krw=1_000_000, orderbook_source=SyntheticOrderbook(price=PRICE, volatility=0, size=size))
+    risk = PreTradeRisk(max_var_pct=100, max_cvar_pct=100, max_position_pct=max_position_pct,
+                        max_daily_turnover_pct=1000, min_samples=10)
+    rng = np.random.default_rng(1)
+    close = PRICE * np.exp(np.cumsum(rng.normal(0, 0.002, 300)))
+    risk.refresh(pd.DataFrame({"close": close}, index=pd.date_range("2024-01-01", periods=300, freq="h")))
+    return Account("test", client, risk=risk)
+
+def test_error_response_is_not_counted_as_fill(logged):
+    account = make_account(size=1e-8)  # 호가 잔량 부족 → {"error": ...} 응답
+    result = main.TradingDecision(decision="buy", percentage=50, reason="테스트")
+
+    main.execute_account_decision(account, result, "")
+
+    assert account.risk.turnover_krw == 0
+    assert logged == [("buy", 0)]
+
+def test_logs_executed_share_after_risk_clip(logged):
+    account = make_account(max_position_pct=40)  # 총자산의 40%까지만 매수
+    result = main.TradingDecision(decision="buy", percentage=50, reason="테스트")
+
+    main.execute_account_decision(account, result, "")
+
+    assert account.risk.turnover_krw == pytest.approx(400_000, rel=1e-3)
+    assert logged == [("buy", 40)]
+
+def test_is_order_accepted():
+    assert main.is_order_accepted({"uuid": "abc", "state": "wait"})
+    assert not main.is_order_accepted({"error": {"name": "insufficient_funds_bid", "message": ""}})
+    assert not main.is_order_accepted(None)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+import llm_client
+from fake_openai_server import FakeOpenAIServer
+from llm_client import LLMClient, LLMDeadlineExceeded
+
+REQUEST = {"model": "fake", "messages": [{"role": "user", "content": "현재 투자 상태"}]}
+
+@pytest.fixture
+def server():
+    server = FakeOpenAIServer(median=0.01, slow_rate=0, seed=1).start()
+    yield server
+    server.stop()
+
+class RecordingClient(LLMClient):
+    """취소된 요청 수를 세는 클라이언트 (헤지 요청 후 늦은 요청 취소 확인용)"""
+
+    cancelled = 0
+
+    async def _request(self, kwargs, timeout):
+        try:
+            return await super()._request(kwargs, timeout)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+def make_client(server, cls=LLMClient, **kwargs):
+    return cls(api_key="fake", base_url=server.base_url, **kwargs)
+
+def test_deadline_raises(server):
+    server.script.extend([(200, 2.0)] * 3)
+    client = make_client(server, deadline=0.5, backoff=0.01)
+
+    started = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(client.acreate(**REQUEST))
+    assert time.monotonic() - started < 1.5
+    assert client.calls[-1]["error"] is not None
+
+def test_retries_429_and_5xx_with_jitter(server, monkeypatch):
+    server.script.extend([(429, 0), (500, 0), (503, 0)])
+    sleeps = []
+
+    def uniform(low, high):
+        sleeps.append((low, high))
+        return high / 2
+
+    monkeypatch.setattr(llm_client.random, "uniform", uniform)
+    client = make_client(server, deadline=10, max_retries=3, backoff=0.02)
+
+    response = asyncio.run(client.acreate(**REQUEST))
+
+    assert response.choices[0].message.content
+    assert server.requests == 4
+    assert client.calls[-1]["attempts"] == 4
+    # full jitter: 0 ~ backoff * 2^(시도-1) 범위에서 무작위 대기
+    assert sleeps == [(0, 0.02), (0, 0.04), (0, 0.08)]
+
+def test_other_4xx_not_retried(server):
+    server.script.append((400, 0))
+    client = make_client(server, deadline=10, max_retries=3, backoff=0.01)
+
+    with pytest.raises(Exception) as error:
+        asyncio.run(client.acreate(**REQUEST))
+
+    assert not isinstance(error.value, LLMDeadlineExceeded)
+    assert getattr(error.value, "status_code", None) == 400
+    assert server.requests == 1
+
+def test_retries_stop_after_max_retries(server):
+    server.script.extend([(500, 0)] * 5)
+    client = make_client(server, deadline=10, max_retries=2, backoff=0.01)
+
+    with pytest.raises(Exception):
+        asyncio.run(client.acreate(**REQUEST))
+    assert server.requests == 3
+
+def test_hedge_fires_after_percentile_and_cancels_loser(server):
+    client = make_client(server, RecordingClient, deadline=10, hedge=True, hedge_percentile=95,
+                         hedge_min_samples=5)
+
+    async def run():
+        # 빠른 응답으로 지연 시간 기록을 채움 (기록이 부족하면 헤지 요청 없음)
+        server.script.extend([(200, 0.05)] * 5)
+        for _ in range(5):
+            await client.acreate(**REQUEST)
+        assert server.requests == 5
+        delay = client.hedge_delay()
+        assert delay is not None and delay < 1.0
+
+        # 빠른 응답은 헤지 요청 없이 완료
+        server.script.append((200, 0.0))
+        await client.acreate(**REQUEST)
+        assert server.requests == 6
+        assert client.calls[-1]["hedged"] is False
+
+        # 느린 요청: 백분위 지연 뒤에 헤지 요청을 보내고 먼저 온 응답 사용, 늦은 요청은 취소
+        server.script.extend([(200, 5.0), (200, 0.0)])
+        started = time.monotonic()
+        await client.acreate(**REQUEST)
+        elapsed = time.monotonic() - started
+        return delay, elapsed
+
+    delay, elapsed = asyncio.run(run())
+
+    assert server.requests == 8
+    assert client.calls[-1]["hedged"] is True
+    assert client.calls[-1]["attempts"] == 1
+    assert delay <= elapsed < 2.0
+    assert client.cancelled == 1
@@ -0,0 +1,53 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_buffer import CANDLE_UTC_OFFSET, MarketDataBuffer
+
+KST = timezone(timedelta(hours=9))
+
+@pytest.fixture
+def buffer():
+    buffer = MarketDataBuffer(f"test{os.getpid()}", create=True)
+    yield buffer
+    buffer.close()
+
+def hourly_candles(last_start):
+    """pyupbit.get_ohlcv처럼 KST naive 시각 인덱스를 가진 시간봉"""
+    index = pd.date_range(end=last_start, periods=5, freq="h")
+    return pd.DataFrame({c: np.arange(5.0) + 1 for c in ("open", "high", "low", "close", "volume", "value")},
+                        index=index)
+
+def kst_now():
+    return datetime.now(KST).replace(tzinfo=None)
+
+def test_fresh_candles_are_returned(buffer):
+    buffer.write_candles("KRW-BTC", "minute60", hourly_candles(kst_now().replace(minute=0, second=0, microsecond=0)))
+    candles = buffer.get_candles("KRW-BTC", "minute60", 5)
+    assert candles is not None and len(candles) == 5
+
+def test_stale_candles_return_none(buffer):
+    # 수집 프로세스가 3시간 전에 멈춘 경우
+    stale = kst_now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+    buffer.write_candles("KRW-BTC", "minute60", hourly_candles(stale))
+    assert buffer.get_candles("KRW-BTC", "minute60", 5) is None
+    assert buffer.get_ohlcv("KRW-BTC", "minute60", 5) is None
+    assert buffer.get_candles("KRW-BTC", "minute60", 5, max_delay=None) is not None
+
+def test_candles_to_fetch_covers_collector_outage(buffer):
+    assert buffer.candles_to_fetch("KRW-BTC", "minute60") == 200  # 비어 있으면 처음 채우기
+
+    last_start = datetime(2026, 10, 19, 9, 0)
+    buffer.write_candles("KRW-BTC", "minute60", hourly_candles(last_start))
+    # 저장된 시각은 KST naive 시각이므로 실제 현재 시각(UTC 기준 epoch)으로 바꿔서 전달
+    stored = pd.Timestamp(last_start).timestamp() - CANDLE_UTC_OFFSET
+
+    def fetch_count(elapsed):
+        return buffer.candles_to_fetch("KRW-BTC", "minute60", now=stored + elapsed.total_seconds())
+
+    assert fetch_count(timedelta(minutes=30)) == 2  # 진행 중인 캔들과 새 캔들
+    assert fetch_count(timedelta(hours=6, minutes=30)) == 8  # 6시간 조회 실패 후 빠진 캔들까지
+    assert fetch_count(timedelta(days=1000)) == buffer.buffer("KRW-BTC", "minute60").capacity
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+
+from news_pipeline import NewsPipeline, headline_key, score_headlines
+
+ITEMS = [
+    {"title": "Bitcoin surges to record high - Reuters", "date": "1 hour ago", "source": "Reuters"},
+    {"title": "Exchange hacked, bitcoin plunges", "date": "2 hours ago", "source": "CoinDesk"},
+]
+
+def test_same_headline_from_other_source_has_same_key():
+    assert headline_key("Bitcoin surges to record high - Reuters") == headline_key("bitcoin surges to record HIGH!")
+
+def test_scores_and_negation():
+    positive, negative, negated = score_headlines(["Bitcoin surges", "Bitcoin crashes", "Bitcoin does not surge"])
+    assert positive > 0 > negative
+    assert negated <= 0
+
+def test_digest_shows_new_headlines_once(tmp_path):
+    pipeline = NewsPipeline(str(tmp_path / "news.db"))
+
+    digest = pipeline.digest(ITEMS)
+    assert len(digest["new"]) == 2
+    assert digest["sentiment"]["count"] == 2
+    pipeline.mark_sent(digest)
+
+    again = pipeline.digest(ITEMS)
+    assert again["new"] == []
+    assert again["sentiment"]["count"] == 2
+
+def test_connections_are_closed(tmp_path):
+    pipeline = NewsPipeline(str(tmp_path / "news.db"))
+    with pipeline._connect() as conn:
+        pass
+    try:
+        conn.execute("SELECT 1")
+        raise AssertionError("블록이 끝난 연결이 닫히지 않았습니다.")
+    except sqlite3.ProgrammingError:
+        pass
+
+    for _ in range(20):
+        pipeline.mark_sent(pipeline.digest(ITEMS))
+    if os.path.isdir("/proc/self/fd"):
+        db_fds = [fd for fd in os.listdir("/proc/self/fd")
+                  if os.path.realpath(f"/proc/self/fd/{fd}") == os.path.realpath(pipeline.path)]
+        assert db_fds == []
+
+def test_only_headlines_in_prompt_are_marked_sent(tmp_path):
+    import pandas as pd
+
+    from prompt_budget import SYSTEM_TEMPLATE, USER_TEMPLATE, build_decision_prompt, build_decision_sections
+    from token_counter import count_tokens
+
+    pipeline = NewsPipeline(str(tmp_path / "news.db"), max_new=8)
+    items = [{"title": f"Bitcoin rally number {i} lifts market", "date": f"{i} hours ago", "source": "Reuters"}
+             for i in range(8)]
+    digest = pipeline.digest(items)
+    assert len(digest["new"]) == 8
+    candles = pd.DataFrame({"close": [1.0, 2.0]})
+    context = {"df_daily": candles, "df_hourly": candles, "news_headlines": digest, "reflection": "",
+               "strategy_text": "", "orderbook": None, "chart_features": {}, "filtered_balances": [],
+               "fear_greed_index": None}
+
+    # 뉴스 섹션이 3개 단계(원본 8개 → 5개 → 3개)까지 줄어야 들어가는 예산
+    sections = build_decision_sections(context)
+    news = sections[0]
+    news.level = news.params.index(3)
+    empty = {section.name: "" for section in sections}
+    budget = (count_tokens(SYSTEM_TEMPLATE.format(**empty)) + count_tokens(USER_TEMPLATE.format(**empty))
+              + sum(section.tokens() for section in sections))
+
+    _, user_text, breakdown = build_decision_prompt(context, budget=budget)
+    assert breakdown["news_shown"] == 3
+    pipeline.mark_sent(digest, breakdown["news_shown"])
+
+    shown = [item["title"] for item in digest["new"][:3]]
+    assert all(title in user_text for title in shown)
+    remaining = pipeline.digest()["new"]
+    assert {item["key"] for item in remaining} == {item["key"] for item in digest["new"][3:]}
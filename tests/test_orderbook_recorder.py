@@ -0,0 +1,23 @@
+import numpy as np
+
+from orderbook_recorder import OrderbookRecorder, OrderbookStore
+
+def orderbook(timestamp, ask_size=0.12345678, bid_size=1.23456789):
+    return {
+        "market": "KRW-BTC",
+        "timestamp": timestamp * 1000,
+        "orderbook_units": [
+            {"ask_price": 95_000_000.0, "ask_size": ask_size, "bid_price": 94_990_000.0, "bid_size": bid_size},
+            {"ask_price": 95_010_000.0, "ask_size": 0.00000001, "bid_price": 94_980_000.0, "bid_size": 3.5},
+        ],
+    }
+
+def test_sizes_keep_eight_decimals(tmp_path):
+    recorder = OrderbookRecorder(str(tmp_path), levels=2)
+    assert recorder.record(orderbook(1000))
+    recorder.close()
+
+    records = OrderbookStore(str(tmp_path)).range("KRW-BTC")
+    assert records["ask_size"].dtype == np.float64
+    assert records["ask_size"][0].tolist() == [0.12345678, 0.00000001]
+    assert records["bid_size"][0].tolist() == [1.23456789, 3.5]
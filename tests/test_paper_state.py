@@ -0,0 +1,46 @@
+import multiprocessing as mp
+
+from paper_exchange import PaperUpbit, SyntheticOrderbook
+from risk_engine import PreTradeRisk
+
+def _buy_in_other_process(state_path, risk_path, krw):
+    # 파이프라인의 executor처럼 별도 프로세스에서 자체 인스턴스로 체결
+    upbit = PaperUpbit(krw=1_000_000, orderbook_source=SyntheticOrderbook(seed=1), state_path=state_path)
+    order = upbit.buy_market_order("KRW-BTC", krw)
+    assert "error" not in order
+    PreTradeRisk(state_path=risk_path).record_turnover(krw)
+
+def run_in_other_process(*args):
+    process = mp.get_context("spawn").Process(target=_buy_in_other_process, args=args)
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+def test_fill_in_one_process_is_visible_in_another(tmp_path):
+    state_path = str(tmp_path / "paper_account.json")
+    risk_path = str(tmp_path / "risk_state.json")
+    # collector/decider처럼 체결 전에 만든 인스턴스
+    upbit = PaperUpbit(krw=1_000_000, orderbook_source=SyntheticOrderbook(seed=1), state_path=state_path)
+    risk = PreTradeRisk(state_path=risk_path, max_daily_turnover_pct=200)
+    assert upbit.get_balance("KRW") == 1_000_000
+    assert upbit.get_balance("KRW-BTC") == 0
+
+    run_in_other_process(state_path, risk_path, 100_000)
+
+    assert upbit.get_balance("KRW") < 1_000_000 - 100_000
+    assert upbit.get_balance("KRW-BTC") > 0
+    balances = {b["currency"]: float(b["balance"]) for b in upbit.get_balances()}
+    assert balances["BTC"] == upbit.get_balance("KRW-BTC")
+    assert upbit.get_avg_buy_price("KRW-BTC") > 0
+
+    _, report = risk.check("buy", 10_000, krw=900_000, btc=0.001, price=90_000_000)
+    assert report["turnover_today"] == 100_000
+
+    # 다른 프로세스의 체결 후에도 이 인스턴스의 주문은 최신 잔고에서 이어짐
+    run_in_other_process(state_path, risk_path, 100_000)
+    before = upbit.get_balance("KRW")
+    upbit.buy_market_order("KRW-BTC", 50_000)
+    assert upbit.get_balance("KRW") < before - 50_000
+    assert PaperUpbit(state_path=state_path).get_balance("KRW") == upbit.get_balance("KRW")
+    risk.record_turnover(50_000)
+    assert PreTradeRisk(state_path=risk_path).check("sell", 0.0001, 0, 1, 90_000_000)[1]["turnover_today"] == 250_000
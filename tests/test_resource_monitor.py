@@ -0,0 +1,41 @@
+import json
+import time
+
+from resource_monitor import ResourceMonitor, growth_trend
+
+def test_wrap_cycle_records_prepare_and_execute_as_one_sample(tmp_path):
+    monitor = ResourceMonitor(str(tmp_path / "report.json"), warmup=1)
+    held = []
+
+    def prepare():
+        held.append(bytearray(4 * 2**20))  # 사전 준비 단계의 큰 할당 (캔들 DataFrame 등)
+        time.sleep(0.05)
+        return {"ready": True}
+
+    def execute(context):
+        time.sleep(0.05)
+
+    prepare, execute = monitor.wrap_cycle(prepare, execute)
+    for _ in range(2):
+        execute(prepare())
+
+    assert monitor.cycles == 2
+    sample = monitor.samples[-1]
+    assert sample["prepare_duration"] >= 0.05
+    # 기록값은 소수점 2자리로 반올림되므로 여유를 둠
+    assert sample["duration"] >= sample["prepare_duration"] + 0.03
+    assert sample["traced_peak_mb"] >= 4  # 사전 준비의 할당이 사이클 최대 할당량에 포함
+    with open(tmp_path / "report.json", encoding="utf-8") as f:
+        assert json.load(f)["cycles"] == 2
+
+def test_wrap_cycle_samples_when_prepare_fails(tmp_path):
+    monitor = ResourceMonitor(str(tmp_path / "report.json"))
+    prepare, execute = monitor.wrap_cycle(lambda: None, lambda context: None)
+
+    assert prepare() is None
+    assert monitor.cycles == 1
+    assert monitor.samples[0]["prepare_duration"] is not None
+
+def test_growth_trend():
+    assert growth_trend([10, 11, 12, 13, 14, 15], min_slope=0.5)["per_cycle"] == 1.0
+    assert growth_trend([10, 12, 10, 12, 10, 12], min_slope=0.5) is None
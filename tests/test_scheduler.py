@@ -0,0 +1,59 @@
+import asyncio
+import time
+from datetime import datetime
+
+from scheduler import TradingScheduler
+
+def make_scheduler(prepare_seconds=0.2):
+    executed = []
+
+    def prepare():
+        time.sleep(prepare_seconds)
+        return {"prepared_at": time.time()}
+
+    scheduler = TradingScheduler(prepare=prepare, execute=executed.append, lead_time=0)
+    return scheduler, executed
+
+async def drain(scheduler):
+    while scheduler._tasks:
+        await asyncio.gather(*list(scheduler._tasks))
+
+def test_trigger_during_slot_runs_after_it():
+    scheduler, executed = make_scheduler()
+
+    async def run():
+        slot = asyncio.create_task(scheduler.run_slot(datetime.now()))
+        await asyncio.sleep(0.05)  # 슬롯 사전 준비 중
+        assert scheduler.trigger("급변") is True
+        await slot
+        await drain(scheduler)
+
+    asyncio.run(run())
+    assert len(executed) == 2
+    assert executed[0]["prepared_at"] < executed[1]["prepared_at"]
+
+def test_slot_during_trigger_cycle_is_not_skipped():
+    scheduler, executed = make_scheduler()
+
+    async def run():
+        assert scheduler.trigger("급변") is True
+        await asyncio.sleep(0.05)  # 급변 사이클 진행 중
+        assert await scheduler.run_slot(datetime.now()) is True
+        await drain(scheduler)
+
+    asyncio.run(run())
+    assert len(executed) == 2
+
+def test_pending_requests_are_coalesced():
+    scheduler, executed = make_scheduler()
+
+    async def run():
+        assert scheduler.trigger("급변 1") is True
+        await asyncio.sleep(0.05)
+        assert scheduler.trigger("급변 2") is True  # 진행 중인 사이클 뒤에 대기
+        assert scheduler.trigger("급변 3") is False  # 대기 중인 사이클에 합침
+        assert await scheduler.run_slot(datetime.now()) is False
+        await drain(scheduler)
+
+    asyncio.run(run())
+    assert len(executed) == 2
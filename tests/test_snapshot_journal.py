@@ -0,0 +1,40 @@
+import gc
+import os
+import sqlite3
+import warnings
+
+from snapshot_journal import SnapshotJournal
+
+def test_record_and_load_round_trip(tmp_path):
+    journal = SnapshotJournal(str(tmp_path / "journal"))
+    journal.record({"balances": [{"currency": "KRW", "balance": "1000"}], "reflection": "반성"})
+    stats = journal.record({"balances": [{"currency": "KRW", "balance": "1000"}], "reflection": "다른 반성"})
+
+    assert stats["reused"] == ["balances"]
+    snapshot = journal.load()
+    assert snapshot["reflection"] == "다른 반성"
+    assert journal.stats()["cycles"] >= 1
+
+def test_connections_are_closed(tmp_path):
+    journal = SnapshotJournal(str(tmp_path / "journal"))
+    journal.record({"reflection": "반성"})
+
+    with journal._connect() as conn:
+        pass
+    try:
+        conn.execute("SELECT 1")
+        raise AssertionError("블록이 끝난 연결이 닫히지 않았습니다.")
+    except sqlite3.ProgrammingError:
+        pass
+
+    # 반복 기록/조회에서 연결이 남지 않음 (닫히지 않은 연결은 gc 때 ResourceWarning)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        for _ in range(20):
+            journal.record({"reflection": "반성"})
+            journal.load()
+        gc.collect()
+    if os.path.isdir("/proc/self/fd"):
+        index_fds = [fd for fd in os.listdir("/proc/self/fd")
+                     if os.path.realpath(f"/proc/self/fd/{fd}") == os.path.realpath(journal.index_path)]
+        assert index_fds == []
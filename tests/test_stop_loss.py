@@ -0,0 +1,59 @@
+import main
+import pipeline
+from accounts import Account, AccountRegistry
+
+class FakeClient:
+    def __init__(self, btc, avg_buy_price):
+        self.btc = btc
+        self.avg_buy_price = avg_buy_price
+        self.balance_calls = 0
+        self.sells = []
+
+    def get_balances(self):
+        self.balance_calls += 1
+        return [{"currency": "KRW", "balance": "0", "avg_buy_price": "0"},
+                {"currency": "BTC", "balance": str(self.btc), "avg_buy_price": str(self.avg_buy_price)}]
+
+    def sell_market_order(self, ticker, volume):
+        self.sells.append(volume)
+        self.btc = 0
+        return {"uuid": "fake"}
+
+class FakeBot:
+    is_order_accepted = staticmethod(main.is_order_accepted)
+
+    def __init__(self, *clients):
+        self.registry = AccountRegistry([Account(f"a{i}", c) for i, c in enumerate(clients)])
+        self.logged = []
+
+    def get_accounts(self):
+        return self.registry
+
+    def log_current_balances(self, *args):
+        self.logged.append(args)
+
+def test_ticks_use_cached_balances(monkeypatch):
+    monkeypatch.setattr(pipeline.time, "sleep", lambda seconds: None)
+    client = FakeClient(btc=0.1, avg_buy_price=100_000_000)
+    monitor = pipeline.StopLossMonitor(FakeBot(client), stop_loss_pct=5, refresh_interval=300)
+
+    for _ in range(100):
+        assert monitor.check(99_000_000) is False
+    assert client.balance_calls == 1
+
+    monitor.invalidate()  # 주문 체결 후
+    monitor.check(99_000_000)
+    assert client.balance_calls == 2
+
+def test_sells_only_triggered_account(monkeypatch):
+    monkeypatch.setattr(pipeline.time, "sleep", lambda seconds: None)
+    losing = FakeClient(btc=0.1, avg_buy_price=100_000_000)
+    winning = FakeClient(btc=0.1, avg_buy_price=80_000_000)
+    bot = FakeBot(losing, winning)
+    monitor = pipeline.StopLossMonitor(bot, stop_loss_pct=5)
+
+    assert monitor.check(94_000_000) is True
+    assert losing.sells == [0.1]
+    assert winning.sells == []
+    assert winning.balance_calls == 1  # 손절 조건이 아닌 계좌는 다시 조회하지 않음
+    assert len(bot.logged) == 1
@@ -0,0 +1,45 @@
+import gzip
+import json
+
+from transcript_store import StaticTranscriptFetcher, TranscriptStore
+
+SEGMENTS = {
+    ("abc", "ko"): [{"text": "첫 번째", "start": 0.0, "duration": 1.5},
+                    {"text": "두 번째", "start": 1.5, "duration": 2.25}],
+    ("def", "ko"): [{"text": "다른 영상", "start": 0, "duration": 3}],
+}
+
+def test_fetches_each_video_once(tmp_path):
+    fetcher = StaticTranscriptFetcher(SEGMENTS)
+    store = TranscriptStore(str(tmp_path), fetcher)
+
+    assert store.get_text("abc") == "첫 번째 두 번째"
+    assert store.get_text("abc") == "첫 번째 두 번째"
+    store.get_segments("abc")
+
+    assert fetcher.calls == [("abc", "ko")]
+
+def test_gzip_round_trip_after_restart(tmp_path):
+    store = TranscriptStore(str(tmp_path), StaticTranscriptFetcher(SEGMENTS))
+    store.get_text("abc")
+
+    path = tmp_path / "abc.ko.json.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        record = json.load(f)
+    assert record["joined"] == "첫 번째 두 번째"
+
+    # 새 저장소(재시작)는 YouTube를 다시 조회하지 않고 디스크에서 읽음
+    fetcher = StaticTranscriptFetcher({})
+    restarted = TranscriptStore(str(tmp_path), fetcher)
+    assert restarted.get_segments("abc") == SEGMENTS[("abc", "ko")]
+    assert fetcher.calls == []
+
+def test_combined_text_skips_failed_ids(tmp_path):
+    fetcher = StaticTranscriptFetcher(SEGMENTS)
+    store = TranscriptStore(str(tmp_path), fetcher)
+
+    text = store.get_combined_text(["abc", "missing", "def"])
+
+    assert text == "첫 번째 두 번째\n\n다른 영상"
+    assert ("missing", "ko") in fetcher.calls
+    assert not (tmp_path / "missing.ko.json.gz").exists()
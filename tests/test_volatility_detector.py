@@ -0,0 +1,24 @@
+import time
+
+from volatility_detector import VolatilityDetector
+
+def spike(detector, now):
+    """평온한 1분봉으로 통계를 준비한 뒤 급등 봉 하나 반영"""
+    price = 100.0
+    for i in range(40):
+        price *= 1.0001 if i % 2 else 0.9999
+        detector.update(price, 10.0, now=now, observe_only=True)
+    return detector.update(price * 1.05, 10.0, now=now)
+
+def test_cooldown_charged_only_when_cycle_started():
+    now = time.time()
+    detector = VolatilityDetector(return_z=4, warmup=10, cooldown=3600, daily_cap=1)
+
+    assert spike(detector, now)
+    # 사이클을 시작하지 못했으면 차감하지 않으므로 다음 급변도 감지
+    assert detector.triggers_today == 0
+    assert spike(detector, now + 60)
+
+    detector.record_trigger(now + 60)
+    assert detector.triggers_today == 1
+    assert spike(detector, now + 120) is None  # 쿨다운/일일 상한
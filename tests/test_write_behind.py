@@ -0,0 +1,90 @@
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+from write_behind import _STOP, WriteBehindLogger
+
+SQL = "INSERT INTO t VALUES (?)"
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.commit()
+    conn.close()
+    return str(path)
+
+def count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+def run_with_timeout(fn, timeout=5):
+    """fn이 timeout 안에 끝나는지 여부 (막히면 False)"""
+    thread = threading.Thread(target=fn, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+def test_unopenable_db_does_not_stop_writer(tmp_path):
+    good = make_db(tmp_path / "good.db")
+    writer = WriteBehindLogger(flush_interval=0.01, max_queue=5)
+    writer.insert(str(tmp_path / "missing" / "bad.db"), SQL, (1,))  # 폴더가 없어 열 수 없음
+    assert writer.flush(timeout=5)
+    assert writer._thread.is_alive()
+
+    assert run_with_timeout(lambda: [writer.insert(good, SQL, (i,)) for i in range(20)])
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert count(good) == 20
+    assert writer.dropped == 1
+
+def test_dead_thread_is_restarted(tmp_path):
+    good = make_db(tmp_path / "good.db")
+    writer = WriteBehindLogger(flush_interval=0.01)
+    writer.insert(good, SQL, (1,))
+    assert writer.flush(timeout=5)
+    # 기록 스레드가 예기치 않게 끝난 상황
+    writer._queue.put((_STOP,))
+    writer._thread.join(5)
+    assert not writer._thread.is_alive()
+
+    writer.insert(good, SQL, (2,))
+    assert writer._thread.is_alive()
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert count(good) == 2
+
+def test_full_queue_writes_on_caller_thread(tmp_path):
+    good = make_db(tmp_path / "good.db")
+    writer = WriteBehindLogger(flush_interval=0.01, max_queue=5)
+    release = threading.Event()
+    writer.call(release.wait)  # 기록 스레드를 붙잡아 큐가 비지 않게 함
+
+    assert run_with_timeout(lambda: [writer.insert(good, SQL, (i,)) for i in range(20)])
+    assert writer.overflows > 0
+    assert count(good) == writer.overflows  # 넘친 기록은 바로 저장됨
+    assert not writer.flush(timeout=0.2)  # 기록 스레드가 멈춰 있으면 timeout 후 False
+
+    release.set()
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert count(good) == 20
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_flush_returns_false_when_thread_dies():
+    writer = WriteBehindLogger(flush_interval=0.01)
+    release = threading.Event()
+    writer.call(release.wait)
+    writer.call(sys.exit)  # SystemExit은 잡지 않으므로 기록 스레드가 끝남
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(writer.flush()), daemon=True)
+    waiter.start()
+    release.set()
+    waiter.join(5)
+    assert result == [False]  # timeout 없이도 막히지 않고 False
+    assert not writer._thread.is_alive()
+    writer.close()
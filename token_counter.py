@@ -0,0 +1,35 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# tiktoken이 설치되어 있으면 정확한 토큰 수를 사용하고, 없으면 근사치 계산
+# (tiktoken은 처음 토큰을 셀 때 임포트)
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    """gpt-4o 토크나이저 로드 (최초 1회)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            pass
+        except Exception as e:
+            logger.warning(f"토크나이저 로드 실패, 근사치로 계산합니다: {e}")
+    return _encoding
+
+def count_tokens(text):
+    """텍스트의 토큰 수 계산
+
+    tiktoken이 없으면 영문/숫자는 약 4글자당 1토큰, 한글 등 비 ASCII 문자는 1글자당 1토큰으로 근사
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
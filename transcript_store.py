@@ -0,0 +1,104 @@
+import gzip
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 유튜브 자막 저장소
+################################################################################
+
+def fetch_youtube_transcript(video_id, language):
+    """YouTube에서 자막 조회 (youtube_transcript_api는 실제로 필요할 때만 로드)"""
+    from youtube_transcript_api import YouTubeTranscriptApi
+    return YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+
+class StaticTranscriptFetcher:
+    """YouTube API 대신 미리 준비한 자막을 돌려주는 대체 fetcher (테스트/오프라인용)
+
+    transcripts: {(video_id, language): [{"text": ..., "start": ..., "duration": ...}, ...]}
+    """
+
+    def __init__(self, transcripts):
+        self.transcripts = transcripts
+        self.calls = []  # 조회 기록 (한 번만 조회하는지 확인용)
+
+    def __call__(self, video_id, language):
+        self.calls.append((video_id, language))
+        try:
+            return self.transcripts[(video_id, language)]
+        except KeyError:
+            raise LookupError(f"자막이 없습니다: {video_id} ({language})")
+
+class TranscriptStore:
+    """영상 ID와 언어별로 자막을 한 번만 조회해서 디스크에 저장하는 저장소
+
+    - 자막은 구간별 시작 시각/길이/텍스트를 열 단위 배열로 gzip JSON에 저장
+    - 이어 붙인 전체 텍스트도 함께 저장해 매번 join하지 않음
+    - 파일은 처음 요청될 때만 읽고, 이후에는 메모리에서 반환
+    """
+
+    def __init__(self, directory="transcripts", fetcher=fetch_youtube_transcript):
+        self.directory = directory
+        self.fetcher = fetcher
+        self._cache = {}  # (video_id, language) -> 저장된 자막 데이터
+        self._lock = threading.Lock()
+
+    def _path(self, video_id, language):
+        return os.path.join(self.directory, f"{video_id}.{language}.json.gz")
+
+    def _load(self, video_id, language):
+        """메모리 → 디스크 → YouTube 순서로 자막 데이터 조회"""
+        key = (video_id, language)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+            path = self._path(video_id, language)
+            if os.path.exists(path):
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    record = json.load(f)
+            else:
+                segments = self.fetcher(video_id, language)
+                record = {
+                    "video_id": video_id,
+                    "language": language,
+                    "start": [round(float(s.get("start", 0)), 2) for s in segments],
+                    "duration": [round(float(s.get("duration", 0)), 2) for s in segments],
+                    "text": [s["text"] for s in segments],
+                }
+                record["joined"] = " ".join(record["text"])
+                self._save(path, record)
+                logger.info(f"자막 저장 완료: {video_id} ({language}), 구간 {len(segments)}개")
+
+            self._cache[key] = record
+            return record
+
+    def _save(self, path, record):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def get_text(self, video_id, language="ko"):
+        """이어 붙인 자막 전체 텍스트"""
+        return self._load(video_id, language)["joined"]
+
+    def get_segments(self, video_id, language="ko"):
+        """구간별 자막 목록 (YouTubeTranscriptApi와 같은 형식)"""
+        record = self._load(video_id, language)
+        return [{"text": t, "start": s, "duration": d}
+                for t, s, d in zip(record["text"], record["start"], record["duration"])]
+
+    def get_combined_text(self, video_ids, language="ko"):
+        """여러 영상의 자막을 이어 붙인 텍스트 (조회에 실패한 영상은 건너뜀)"""
+        texts = []
+        for video_id in video_ids:
+            try:
+                texts.append(self.get_text(video_id, language))
+            except Exception as e:
+                logger.error(f"자막 조회 중 오류 발생 ({video_id}): {e}")
+        return "\n\n".join(texts)
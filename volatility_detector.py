@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 실시간 변동성 감지 (정해진 슬롯 외에 급변 시 거래 사이클 실행)
+################################################################################
+
+class EwmStats:
+    """지수가중 이동 평균/분산 (값 하나당 O(1) 갱신, 과거 데이터 저장 없음)"""
+
+    def __init__(self, span=60):
+        self.alpha = 2 / (span + 1)
+        self.mean = None
+        self.var = 0.0
+        self.count = 0
+
+    def zscore(self, value):
+        """현재 통계 기준 value의 z-score (분산이 없으면 0)"""
+        if self.mean is None or self.var <= 0:
+            return 0.0
+        return (value - self.mean) / math.sqrt(self.var)
+
+    def update(self, value):
+        self.count += 1
+        if self.mean is None:
+            self.mean = value
+            return
+        diff = value - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+
+class VolatilityDetector:
+    """1분봉 수익률/거래량의 이동 z-score로 시장 급변을 감지
+
+    - 수익률 |z| >= return_z 또는 거래량(로그) z >= volume_z 이면 급변으로 판단
+    - z-score는 새 값을 통계에 반영하기 전에 계산 (자기 자신에 희석되지 않도록)
+    - warmup개 이상 쌓이기 전에는 감지하지 않음
+    - 사이클을 실행한 뒤 cooldown초 동안, 그리고 하루 daily_cap회를 넘으면 사이클을 실행하지 않음 (AI 비용 상한)
+    - 쿨다운과 일일 횟수는 실제로 사이클을 시작했을 때만 차감 (record_trigger)
+    """
+
+    def __init__(self, span=60, return_z=4.0, volume_z=4.0, warmup=30, cooldown=3600, daily_cap=3):
+        self.returns = EwmStats(span)
+        self.volumes = EwmStats(span)
+        self.return_z = return_z
+        self.volume_z = volume_z
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.daily_cap = daily_cap
+
+        self.last_price = None
+        self.last_trigger = None
+        self.triggers_today = 0
+        self._day = None
+
+    def update(self, price, volume, now=None, observe_only=False):
+        """새 1분봉(종가, 거래량) 반영
+
+        observe_only=True이면 통계만 갱신하고 감지하지 않음 (시작 시 과거 데이터로 준비할 때)
+
+        Returns:
+            str: 사이클을 실행해야 하면 사유, 아니면 None
+                 (사이클을 시작했으면 record_trigger()로 쿨다운/일일 횟수 차감)
+        """
+        now = now or time.time()
+        if self.last_price is None or price <= 0:
+            self.last_price = price
+            return None
+        ret = math.log(price / self.last_price)
+        log_volume = math.log1p(max(volume, 0))
+        self.last_price = price
+
+        return_z = self.returns.zscore(ret)
+        volume_z = self.volumes.zscore(log_volume)
+        ready = self.returns.count >= self.warmup
+        self.returns.update(ret)
+        self.volumes.update(log_volume)
+        if not ready or observe_only:
+            return None
+        if abs(return_z) < self.return_z and volume_z < self.volume_z:
+            return None
+
+        reason = f"수익률 z={return_z:+.1f}, 거래량 z={volume_z:+.1f} (1분 수익률 {ret * 100:+.2f}%)"
+        return self._allow(reason, now)
+
+    def _reset_day(self, now):
+        day = datetime.fromtimestamp(now).date()
+        if day != self._day:
+            self._day = day
+            self.triggers_today = 0
+
+    def _allow(self, reason, now):
+        """쿨다운과 일일 상한 확인 (차감하지 않음)"""
+        self._reset_day(now)
+        if self.last_trigger is not None and now - self.last_trigger < self.cooldown:
+            logger.info(f"시장 급변 감지했지만 쿨다운 중이라 건너뜀: {reason}")
+            return None
+        if self.triggers_today >= self.daily_cap:
+            logger.info(f"시장 급변 감지했지만 오늘 실행 상한({self.daily_cap}회)에 도달: {reason}")
+            return None
+        logger.warning(f"시장 급변 감지: {reason}")
+        return reason
+
+    def record_trigger(self, now=None):
+        """급변으로 사이클을 시작했을 때 쿨다운과 일일 횟수 차감"""
+        now = now or time.time()
+        self._reset_day(now)
+        self.last_trigger = now
+        self.triggers_today += 1
+        logger.info(f"급변 사이클 실행 ({self.triggers_today}/{self.daily_cap}회)")
+
+async def watch_volatility(detector, fetch_candles, on_trigger, interval=60):
+    """완성된 1분봉이 생길 때마다 감지기에 반영하고, 급변이면 on_trigger(사유) 호출
+
+    Args:
+        fetch_candles: 최근 1분봉 DataFrame을 반환하는 동기 함수 (마지막 행은 진행 중인 봉)
+        on_trigger: 급변 시 호출할 함수, 새 사이클을 시작했으면 True 반환
+                    (False이면 쿨다운/일일 횟수를 차감하지 않음, 예: 이미 예약된 사이클에 합쳐진 경우)
+    """
+    last_seen = None
+    while True:
+        try:
+            df = await asyncio.to_thread(fetch_candles)
+            if df is not None and len(df) >= 2:
+                closed = df.iloc[:-1]
+                priming = last_seen is None  # 처음 받은 과거 봉으로는 통계만 준비
+                if not priming:
+                    closed = closed[closed.index > last_seen]
+                for _, row in closed.iterrows():
+                    reason = detector.update(float(row['close']), float(row['volume']), observe_only=priming)
+                    if reason and on_trigger(reason):
+                        detector.record_trigger()
+                if len(closed):
+                    last_seen = closed.index[-1]
+        except Exception as e:
+            logger.error(f"변동성 감지 중 오류 발생: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,251 @@
+import atexit
+import itertools
+import logging
+import queue
+import signal
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# 백그라운드 스레드에서 모아서 저장하는 SQLite 기록기 (write-behind)
+#
+# 거래 기록, 스냅샷, 사이클 지표 저장이 결정과 주문 사이에서 기다리지 않도록
+# 호출한 쪽은 큐에 넣기만 하고, 기록 스레드가 batch_size개 또는 flush_interval초마다
+# 데이터베이스별 트랜잭션 하나로 executemany 실행
+# - 정상 종료(atexit), SIGTERM/SIGHUP, 처리되지 않은 예외로 종료될 때 남은 기록을 저장
+# - SIGKILL처럼 처리할 수 없는 종료에서는 최대 flush_interval초 분량의 기록이 유실될 수 있음
+################################################################################
+
+_STOP = "stop"
+_FLUSH = "flush"
+_ROWS = "rows"
+_CALL = "call"
+
+class WriteBehindLogger:
+    """SQLite 행 추가와 저장 작업을 백그라운드 스레드에서 순서대로 일괄 처리
+
+    - insert()/insert_many(): 데이터베이스 경로와 SQL이 같은 연속된 행은 executemany 한 번으로 저장
+    - call(): 다른 저장 작업 (스냅샷 저널 등)을 같은 순서로 실행
+    - flush(): 그때까지 넣은 기록이 모두 저장될 때까지 대기 (기록 직후 다시 읽을 때 사용)
+    - enabled=False이거나 close() 이후에는 호출한 스레드에서 바로 저장
+    - 큐가 가득 차면 호출한 스레드에서 바로 저장 (거래 스레드가 큐 대기로 멈추지 않도록)
+    - 기록 스레드가 예기치 않게 종료되었으면 다음 기록 때 다시 시작
+    """
+
+    def __init__(self, batch_size=200, flush_interval=0.5, max_queue=10000, enabled=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.rows_written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.overflows = 0  # 큐가 가득 차서 바로 저장한 횟수
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    # 기록 요청 ---------------------------------------------------------------------
+
+    def insert(self, path, sql, params):
+        """행 하나 추가"""
+        self.insert_many(path, sql, [params])
+
+    def insert_many(self, path, sql, rows):
+        """같은 SQL로 여러 행 추가"""
+        rows = list(rows)
+        if not rows:
+            return
+        def write():
+            self._write_rows([(path, sql, params) for params in rows], {})
+        if not self._start():
+            write()
+            return
+        self._enqueue((_ROWS, path, sql, rows), write)
+
+    def call(self, fn, *args, **kwargs):
+        """저장 작업 fn(*args, **kwargs)을 기록 스레드에서 실행 (실패하면 로그만 남김)"""
+        def run():
+            self._run_call(fn, args, kwargs)
+        if not self._start():
+            run()
+            return
+        self._enqueue((_CALL, fn, args, kwargs), run)
+
+    def _enqueue(self, item, fallback):
+        """큐에 넣고, 가득 찼으면 기다리지 않고 fallback()으로 바로 저장 (이 경우 큐의 기록보다 먼저 저장될 수 있음)"""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.overflows += 1
+            if self.overflows == 1 or self.overflows % 1000 == 0:
+                logger.warning(f"기록 큐가 가득 차서({self._queue.maxsize:,}건) 바로 저장합니다 (누적 {self.overflows:,}회).")
+            fallback()
+
+    def flush(self, timeout=None):
+        """지금까지 넣은 기록이 저장될 때까지 대기
+
+        Returns:
+            bool: timeout 안에 모두 저장되었는지 여부 (기록 스레드가 멈췄거나 종료되면 False)
+        """
+        if self._thread is None:
+            return True
+        if not self._thread.is_alive() and not self._start():
+            return self._queue.empty()  # close() 이후
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(0.1 if deadline is None else max(min(0.1, deadline - time.monotonic()), 0)):
+            thread = self._thread
+            if thread is None or not thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return False
+        return True
+
+    def close(self, timeout=10):
+        """남은 기록을 저장하고 기록 스레드 종료 (이후 기록은 바로 저장)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put((_STOP,))
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.error(f"기록 스레드가 {timeout}초 안에 끝나지 않았습니다 (대기 중 {self._queue.qsize()}건).")
+        if self.rows_written or self.dropped:
+            logger.info(f"백그라운드 기록 종료: 행 {self.rows_written:,}개, 배치 {self.batches:,}회, 실패 {self.dropped}개")
+
+    # 기록 스레드 -------------------------------------------------------------------
+
+    def _start(self):
+        """기록 스레드 시작 (최초 1회, 예기치 않게 종료되었으면 다시 시작), 바로 저장해야 하면 False"""
+        if not self.enabled or self._closed:
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._closed:
+                    return False
+                if self._thread is None:
+                    atexit.register(self.close)
+                elif not self._thread.is_alive():
+                    logger.error(f"기록 스레드가 종료되어 다시 시작합니다 (대기 중 {self._queue.qsize()}건).")
+                else:
+                    return True
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self):
+        connections = {}
+        try:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                # 배치가 차거나 flush/종료 요청이 오거나 flush_interval이 지날 때까지 모음
+                while len(batch) < self.batch_size and batch[-1][0] not in (_FLUSH, _STOP):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                try:
+                    if self._process(batch, connections):
+                        break
+                except Exception as e:
+                    # 배치 하나의 오류로 스레드가 끝나지 않도록 로그만 남기고 계속 (대기 중인 flush는 깨움)
+                    logger.error(f"기록 배치 처리 중 오류 발생: {e}")
+                    for item in batch:
+                        if item[0] == _FLUSH:
+                            item[1].set()
+                    if any(item[0] == _STOP for item in batch):
+                        break
+        finally:
+            for conn in connections.values():
+                conn.close()
+
+    def _process(self, batch, connections):
+        """배치 처리 (요청 순서 유지), 종료 요청이 있으면 True"""
+        rows = []
+        stop = False
+        for item in batch:
+            kind = item[0]
+            if kind == _ROWS:
+                _, path, sql, params = item
+                rows.extend((path, sql, p) for p in params)
+                continue
+            self._write_rows(rows, connections)
+            rows = []
+            if kind == _CALL:
+                self._run_call(*item[1:])
+            elif kind == _FLUSH:
+                item[1].set()
+            elif kind == _STOP:
+                stop = True
+        self._write_rows(rows, connections)
+        return stop
+
+    def _write_rows(self, rows, connections):
+        """데이터베이스별 트랜잭션 하나로 저장, 실패하면 행 단위로 다시 시도해 문제 행만 버림
+
+        데이터베이스를 열 수 없으면 그 데이터베이스의 행만 버리고 다른 데이터베이스는 계속 저장
+        """
+        by_path = {}
+        for path, sql, params in rows:
+            by_path.setdefault(path, []).append((sql, params))
+        for path, items in by_path.items():
+            conn = connections.get(path)
+            try:
+                if conn is None:
+                    conn = sqlite3.connect(path, timeout=30)
+                    if threading.current_thread() is self._thread:
+                        connections[path] = conn
+                with conn:
+                    for sql, group in itertools.groupby(items, key=lambda item: item[0]):
+                        conn.executemany(sql, [params for _, params in group])
+                self.rows_written += len(items)
+                self.batches += 1
+            except sqlite3.Error as e:
+                if conn is None:
+                    self.dropped += len(items)
+                    logger.error(f"{path}를 열 수 없어 기록 {len(items)}건을 버립니다: {e}")
+                    continue
+                logger.error(f"{path} 일괄 저장 실패, 행 단위로 다시 시도: {e}")
+                for sql, params in items:
+                    try:
+                        with conn:
+                            conn.execute(sql, params)
+                        self.rows_written += 1
+                    except sqlite3.Error as e:
+                        self.dropped += 1
+                        logger.error(f"{path} 기록 실패: {e}")
+            finally:
+                if conn is not None and connections.get(path) is not conn:
+                    conn.close()
+
+    @staticmethod
+    def _run_call(fn, args, kwargs):
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"백그라운드 저장 작업({getattr(fn, '__qualname__', fn)}) 중 오류 발생: {e}")
+
+def install_signal_handlers(signals=("SIGTERM", "SIGHUP")):
+    """종료 신호를 SystemExit로 바꿔 finally/atexit에서 남은 기록을 저장할 수 있게 함 (메인 스레드에서 호출)
+
+    이미 다른 핸들러가 설정된 신호는 그대로 둠
+    """
+    def handle(signum, frame):
+        raise SystemExit(128 + signum)
+
+    for name in signals:
+        signum = getattr(signal, name, None)
+        if signum is not None and signal.getsignal(signum) in (signal.SIG_DFL, None):
+            signal.signal(signum, handle)